@@ -5,9 +5,27 @@ from flask_pymongo import PyMongo
 from dotenv import load_dotenv
 import os
 from config import Config
-from blueprints.upload import upload_bp
+from blueprints.upload import upload_bp, send_followup_call
 from blueprints.records import records_bp
 from blueprints.calls import calls_bp
+from blueprints.stats import stats_bp
+from blueprints.metrics import metrics_bp, register_runtime_metrics
+from blueprints.profiles import profiles_bp
+from services.index_manager import IndexManager
+from services.data_parser import create_parse_pool
+from services.champ_cache import ChampLookupCache
+from services.scheduler_service import FollowUpScheduler
+from services.bulk_call_service import BulkCallService
+from services.post_call_pipeline import PostCallPipeline
+from services.intent_classifier import BatchIntentClassifier
+from services.call_log_writer import CallLogWriteBuffer
+from services.analysis_cache import CallAnalysisCache
+from services.status_ledger import CallStatusLedger
+from services.call_rollups import CallRollups
+from services.twilio_service import create_twilio_client, create_recording_session
+from utils.rate_limiter import TokenBucket
+from utils.metrics import MongoCommandMetrics, instrument_app
+from utils.profiler import install_profiler
 # from blueprints.twili o import twilio_bp  # Import Twilio Blueprint
 
 def create_app():
@@ -26,16 +44,126 @@ def create_app():
     app.config["NGROK_URL"] = os.getenv("NGROK_URL")
     app.config["ALLOWED_EXTENSIONS"] = ['xlsx', 'xls']
 
-    # Initialize PyMongo
-    mongo = PyMongo(app)
+    # Initialize PyMongo, timing every MongoDB command when metrics are enabled
+    if app.config["METRICS_ENABLED"]:
+        mongo = PyMongo(app, event_listeners=[MongoCommandMetrics()])
+    else:
+        mongo = PyMongo(app)
     app.mongo = mongo
 
+    # Create the indexes every query relies on and report any that are missing or unused
+    app.index_manager = IndexManager(mongo.db)
+    if app.config["INDEX_BOOTSTRAP_ENABLED"]:
+        app.index_manager.ensure_indexes()
+        app.index_manager.log_report(explain_queries=app.config["INDEX_EXPLAIN_CHECK"])
+
+    # Champ details served to /voice without a database round trip
+    app.champ_cache = ChampLookupCache(
+        maxsize=app.config["CHAMP_CACHE_MAX_SIZE"],
+        ttl=app.config["CHAMP_CACHE_TTL_SECONDS"]
+    )
+
+    # One pooled Twilio client shared by every request and background worker
+    app.twilio_client = create_twilio_client(app.config)
+    app.recording_session = create_recording_session(app.config)
+
+    # Sheet parsing pool shared by every 'parallel' upload; its workers load pandas once
+    app.parse_pool = None
+    if app.config["UPLOAD_PARSE_MODE"] == "parallel":
+        app.parse_pool = create_parse_pool(app.config["PARSE_WORKERS"])
+
     # Register Blueprints
     app.register_blueprint(upload_bp)
     app.register_blueprint(records_bp)
     app.register_blueprint(calls_bp)
+    app.register_blueprint(stats_bp)
     # app.register_blueprint(twilio_bp)  # Register Twilio Blueprint
 
+    # This process's share of the Twilio calls-per-second quota, used by bulk calls and follow-ups
+    processes = max(1, app.config["CALL_RATE_LIMIT_PROCESSES"])
+    app.call_rate_limiter = TokenBucket(
+        rate=app.config["TWILIO_CALLS_PER_SECOND"] / processes,
+        capacity=max(1, app.config["TWILIO_CALLS_BURST"] // processes)
+    )
+    app.bulk_caller = BulkCallService(
+        app,
+        rate_limiter=app.call_rate_limiter,
+        workers=app.config["BULK_CALL_WORKERS"],
+        stale_seconds=app.config["BULK_CALL_STALE_SECONDS"]
+    )
+
+    # Follow-up scheduler: jobs live in MongoDB, one dispatcher thread fires them
+    app.scheduler = FollowUpScheduler(
+        app,
+        handler=send_followup_call,
+        lookahead_seconds=app.config["SCHEDULER_LOOKAHEAD_SECONDS"],
+        max_in_memory=app.config["SCHEDULER_MAX_IN_MEMORY"],
+        workers=app.config["SCHEDULER_WORKERS"],
+        misfire_grace_seconds=app.config["SCHEDULER_MISFIRE_GRACE_SECONDS"],
+        stale_seconds=app.config["SCHEDULER_STALE_SECONDS"]
+    )
+
+    # Post-call pipeline: recordings are transcribed off the status-callback request thread
+    # Status callbacks and post-call stages update call_logs through one write-behind buffer
+    app.call_log_writer = CallLogWriteBuffer(
+        app,
+        flush_interval_ms=app.config["CALL_LOG_FLUSH_INTERVAL_MS"],
+        max_pending=app.config["CALL_LOG_FLUSH_MAX_PENDING"]
+    )
+
+    # Drops redelivered status callbacks before they cause any work
+    app.status_ledger = CallStatusLedger(app)
+
+    # Per-sheet call outcome counters, written together with the buffered call log updates
+    app.call_rollups = CallRollups(app)
+    app.call_log_writer.add_flush_listener(app.call_rollups.flush)
+
+    # Processing the same recording again reuses its transcription and intent
+    app.analysis_cache = CallAnalysisCache(
+        app,
+        ttl_days=app.config["ANALYSIS_CACHE_TTL_DAYS"],
+        enabled=app.config["ANALYSIS_CACHE_ENABLED"]
+    )
+
+    app.post_call_pipeline = PostCallPipeline(
+        app,
+        workers=app.config["POST_CALL_WORKERS"],
+        poll_seconds=app.config["POST_CALL_POLL_SECONDS"],
+        max_attempts=app.config["POST_CALL_MAX_ATTEMPTS"],
+        stale_seconds=app.config["POST_CALL_STALE_SECONDS"],
+        retry_backoff_seconds=app.config["POST_CALL_RETRY_BACKOFF_SECONDS"]
+    )
+    app.intent_classifier = BatchIntentClassifier(
+        app,
+        batch_size=app.config["INTENT_BATCH_SIZE"],
+        max_wait_seconds=app.config["INTENT_BATCH_WAIT_SECONDS"],
+        max_attempts=app.config["POST_CALL_MAX_ATTEMPTS"],
+        retry_backoff_seconds=app.config["POST_CALL_RETRY_BACKOFF_SECONDS"]
+    )
+
+    # Prometheus metrics: request latency per route, dependency latency and background service gauges
+    if app.config["METRICS_ENABLED"]:
+        instrument_app(app)
+        register_runtime_metrics(app)
+        app.register_blueprint(metrics_bp)
+
+    # On-demand request profiling; when disabled no hooks are registered at all
+    if app.config["PROFILER_ENABLED"]:
+        install_profiler(app)
+        app.register_blueprint(profiles_bp)
+
+    # Background workers start last: any of them may place a call or update call_logs
+    # as soon as it runs, which touches every service created above
+    if app.config["CALL_LOG_WRITE_BEHIND_ENABLED"]:
+        app.call_log_writer.start()
+    if app.config["POST_CALL_PIPELINE_ENABLED"]:
+        app.post_call_pipeline.start()
+        app.intent_classifier.start()
+    if app.config["SCHEDULER_ENABLED"]:
+        app.scheduler.start()
+    if app.config["BULK_CALL_RESUME_ENABLED"]:
+        app.bulk_caller.start()
+
     return app
 
 if __name__ == "__main__":
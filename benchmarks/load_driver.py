@@ -0,0 +1,135 @@
+# benchmarks/load_driver.py
+"""
+End-to-end load test of the call lifecycle against benchmarks/simulator.py.
+
+Seeds champ records into the benchmark database, places every call through
+POST /make_call/<record_id> from a pool of concurrent clients, then waits
+until the simulator has delivered a final status for each call and the
+post-call pipeline has processed every call it enqueued. Reports make_call
+throughput and latency, the status callback latency distribution, and
+end-to-end throughput.
+
+Usage, with the simulator and the app already running (see benchmarks/simulator.py):
+    python -m benchmarks.load_driver --calls 2000 --concurrency 100
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from pymongo import MongoClient
+
+from benchmarks.scenarios import latency_summary
+from benchmarks.workbooks import roster_records
+
+LOAD_TEST_SHEET = "Load test"
+
+
+def seed_records(db, count):
+    """
+    Replace the load-test sheet with ``count`` fresh champ records.
+
+    Returns:
+        list: Ids of the inserted records, as strings.
+    """
+    from services.data_parser import DataParser
+    parser = DataParser()
+    db.champ_details.delete_many({"sheet_name": LOAD_TEST_SHEET})
+    records = [parser.normalize_record(record, LOAD_TEST_SHEET) for record in roster_records(count, seed=424242)]
+    return [str(_id) for _id in db.champ_details.insert_many(records).inserted_ids]
+
+
+def place_calls(app_url, record_ids, concurrency):
+    """
+    POST /make_call for every record from ``concurrency`` client threads.
+
+    Returns:
+        tuple: (latencies in seconds, number of failed requests, elapsed seconds)
+    """
+    session = requests.Session()
+    session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=concurrency))
+
+    def make_call(record_id):
+        start = time.perf_counter()
+        try:
+            ok = session.post(f"{app_url}/make_call/{record_id}", timeout=60).status_code == 200
+        except requests.RequestException:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(make_call, record_ids))
+    elapsed = time.perf_counter() - start
+
+    return [latency for latency, _ in results], sum(1 for _, ok in results if not ok), elapsed
+
+
+def wait_until(predicate, timeout, interval=1.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(interval)
+    return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay concurrent calls through the app against the simulator.")
+    parser.add_argument("--app-url", default="http://localhost:5000")
+    parser.add_argument("--simulator-url", default="http://localhost:8765")
+    parser.add_argument("--mongo-uri", default=os.environ.get("BENCH_MONGO_URI", "mongodb://localhost:27017/hour4u_benchmark"),
+                        help="Database the app under test uses; its name must contain 'bench'")
+    parser.add_argument("--calls", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--timeout", type=float, default=900, help="Seconds to wait for calls to finish")
+    args = parser.parse_args(argv)
+
+    db = MongoClient(args.mongo_uri).get_default_database()
+    if "bench" not in db.name:
+        parser.error(f"Refusing to load test against database '{db.name}'; use a name containing 'bench'")
+
+    requests.post(f"{args.simulator_url}/_sim/reset", timeout=10).raise_for_status()
+    record_ids = seed_records(db, args.calls)
+    call_log_filter = {"sheet_name": LOAD_TEST_SHEET}
+    db.call_logs.delete_many(call_log_filter)
+
+    print(f"Placing {len(record_ids)} calls with {args.concurrency} concurrent clients...")
+    started = time.perf_counter()
+    latencies, failed, elapsed = place_calls(args.app_url, record_ids, args.concurrency)
+    placed = len(record_ids) - failed
+    print(f"make_call: {placed / elapsed:.1f} calls/s, {failed} failed, latency {latency_summary(latencies)}")
+
+    def simulator_stats():
+        return requests.get(f"{args.simulator_url}/_sim/stats", timeout=10).json()
+
+    all_final = wait_until(lambda: sum(simulator_stats()["terminal"].values()) >= placed, args.timeout)
+    calls_done = time.perf_counter() - started
+    stats = simulator_stats()
+    print(f"Final statuses delivered for {sum(stats['terminal'].values())}/{placed} calls "
+          f"after {calls_done:.1f}s {'' if all_final else '(timed out)'}")
+
+    # Calls that completed or were not picked are processed by the post-call pipeline
+    expected = stats["terminal"]["completed"] + stats["terminal"]["no-answer"]
+    processed_filter = dict(call_log_filter, processing_status={"$in": ["done", "failed"]})
+    all_processed = wait_until(lambda: db.call_logs.count_documents(processed_filter) >= expected, args.timeout)
+    total = time.perf_counter() - started
+    processed = db.call_logs.count_documents(processed_filter)
+
+    stats = simulator_stats()
+    print(f"Post-call processing finished for {processed}/{expected} calls after {total:.1f}s "
+          f"{'' if all_processed else '(timed out)'}")
+    print(f"End-to-end throughput: {processed / total:.2f} calls/s")
+    print(f"Status callbacks: {stats['callbacks_sent']} sent, {stats['callback_errors']} errors, "
+          f"latency {stats['callback_latency']}")
+    print(f"/voice TwiML fetch latency: {stats['voice_latency']}")
+    print(f"Simulated OpenAI requests: {stats['openai_requests']}")
+
+    return 0 if all_final and all_processed and not failed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,276 @@
+# benchmarks/run.py
+"""
+Benchmarks for ingestion and the record and call APIs.
+
+Every scenario runs in a fresh process, so its peak RSS is its own. The peak
+RSS of the processes it starts, such as the forkserver pool workers of the
+'parallel' parse mode, is sampled from /proc and added to it. Results are
+compared with a stored baseline: a throughput drop or a peak RSS growth beyond
+the tolerance is reported as a regression and the run exits with status 1.
+
+The baseline is machine-specific, so none is committed. Create one on the
+machine the benchmarks run on before relying on the comparison:
+    python -m benchmarks.run --save-baseline          # writes benchmarks/baseline.json
+Running without a baseline file is an error; pass --no-compare to only report.
+
+Usage (from the repository root):
+    python -m benchmarks.run                          # default sizes, all scenarios
+    python -m benchmarks.run --preset full            # 1k-200k rows, 1-50 sheets
+    python -m benchmarks.run --scenarios parse_excel,normalize_record --rows 20000 --sheets 10
+    python -m benchmarks.run --save-baseline          # store the results as the new baseline
+    python -m benchmarks.run --no-compare             # report only, without a baseline
+
+The upload, records_pagination and voice_lookup scenarios need a local mongod.
+They use BENCH_MONGO_URI (default mongodb://localhost:27017/hour4u_benchmark),
+and its database name must contain 'bench' because its collections are emptied.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import threading
+import traceback
+
+from benchmarks.scenarios import SCENARIOS, MONGO_SCENARIOS
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+PRESETS = {
+    "quick": {"rows": [1000], "sheets": [1]},
+    "default": {"rows": [1000, 20000], "sheets": [1, 10]},
+    "full": {"rows": [1000, 20000, 200000], "sheets": [1, 10, 50]},
+}
+
+# Variants run for each size
+VARIANTS = {
+    "parse_excel": [{"mode": "dataframe"}, {"mode": "streaming"}, {"mode": "parallel"}],
+}
+
+
+def _peak_rss_mb(who=resource.RUSAGE_SELF):
+    """
+    Peak resident set size of this process, or of its waited-for children, in MB.
+    """
+    peak = resource.getrusage(who).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class DescendantPeakRss:
+    """
+    Samples the peak RSS (VmHWM) of every descendant process from /proc.
+
+    RUSAGE_CHILDREN only covers children that have been waited for, which
+    leaves out forkserver pool workers: they are children of the forkserver,
+    not of the scenario process. Each descendant's VmHWM is read until it
+    exits, and the peaks of all of them are summed.
+    """
+
+    def __init__(self, interval=0.02):
+        self.interval = interval
+        self.available = os.path.isdir("/proc/self")
+        self._peaks = {}
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def start(self):
+        if self.available:
+            self._thread.start()
+
+    def stop(self):
+        """
+        Returns:
+            float: Sum of the descendants' peak RSS in MB, or None without /proc.
+        """
+        if not self.available:
+            return None
+        self._stopped.set()
+        self._thread.join()
+        self._sample()
+        return sum(self._peaks.values()) / 1024
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self._sample()
+
+    def _sample(self):
+        parents = {}
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/stat") as stat:
+                    # The command name may contain spaces; ppid is the second field after it
+                    parents[int(entry)] = int(stat.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+
+        descendants, frontier = set(), {os.getpid()}
+        while frontier:
+            frontier = {pid for pid, ppid in parents.items() if ppid in frontier} - descendants
+            descendants |= frontier
+
+        for pid in descendants:
+            try:
+                with open(f"/proc/{pid}/status") as status:
+                    for line in status:
+                        if line.startswith("VmHWM:"):
+                            self._peaks[pid] = max(self._peaks.get(pid, 0), int(line.split()[1]))
+                            break
+            except (OSError, ValueError):
+                continue
+
+
+def _run_in_child(name, params, queue):
+    try:
+        descendants = DescendantPeakRss()
+        descendants.start()
+        result = SCENARIOS[name](**params)
+        workers_mb = descendants.stop()
+        if workers_mb is None:
+            # Without /proc, fall back to the children that have been waited for
+            workers_mb = _peak_rss_mb(resource.RUSAGE_CHILDREN)
+        result["worker_peak_rss_mb"] = round(workers_mb, 1)
+        result["peak_rss_mb"] = round(_peak_rss_mb() + workers_mb, 1)
+        queue.put(result)
+    except Exception:
+        queue.put({"error": traceback.format_exc()})
+
+
+def run_scenario(name, params):
+    """
+    Run one scenario in a freshly spawned process.
+
+    Returns:
+        dict: The scenario's measurements plus peak_rss_mb, or {"error": ...}.
+    """
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_run_in_child, args=(name, params, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def scenario_key(name, params):
+    return name + "[" + ",".join(f"{key}={value}" for key, value in sorted(params.items())) + "]"
+
+
+def compare(key, result, baseline, tolerance):
+    """
+    Compare a result with its baseline entry. Results without an entry are not compared.
+
+    Returns:
+        list: Human-readable regressions; empty when within tolerance.
+    """
+    regressions = []
+    if result.get("parity") is False:
+        regressions.append("normalize_frame output differs from normalize_record")
+
+    expected = (baseline or {}).get(key)
+    if not expected:
+        return regressions
+    if result["throughput"] < expected["throughput"] * (1 - tolerance):
+        regressions.append(
+            f"throughput {result['throughput']:.1f} {result['unit']} is below baseline {expected['throughput']:.1f}"
+        )
+    if result["peak_rss_mb"] > expected["peak_rss_mb"] * (1 + tolerance):
+        regressions.append(f"peak RSS {result['peak_rss_mb']} MB is above baseline {expected['peak_rss_mb']} MB")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run ingestion and API benchmarks.")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help="Comma-separated scenarios: " + ", ".join(SCENARIOS))
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="default")
+    parser.add_argument("--rows", help="Comma-separated row counts, overrides the preset")
+    parser.add_argument("--sheets", help="Comma-separated sheet counts, overrides the preset")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed relative throughput drop and RSS growth (default: 0.2)")
+    parser.add_argument("--no-compare", action="store_true", help="Report results without a baseline comparison")
+    parser.add_argument("--skip-mongo", action="store_true", help="Skip scenarios that need mongod")
+    args = parser.parse_args(argv)
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    if args.skip_mongo:
+        names = [name for name in names if name not in MONGO_SCENARIOS]
+
+    rows = [int(value) for value in args.rows.split(",")] if args.rows else PRESETS[args.preset]["rows"]
+    sheets = [int(value) for value in args.sheets.split(",")] if args.sheets else PRESETS[args.preset]["sheets"]
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+    elif not (args.save_baseline or args.no_compare):
+        # Without a baseline nothing could be reported as a regression; say so instead of passing silently
+        parser.error(
+            f"No baseline at {args.baseline}. Create one on this machine with "
+            f"'python -m benchmarks.run --save-baseline' (same --preset/--rows/--sheets), "
+            f"or pass --no-compare to only report results."
+        )
+    compared = baseline if not args.no_compare else None
+
+    results = {}
+    failures = []
+    uncompared = []
+    for name in names:
+        # normalize_record works on rows in memory; sheets make no difference there
+        sizes = [(row_count, 1) for row_count in rows] if name == "normalize_record" else \
+            [(row_count, sheet_count) for row_count in rows for sheet_count in sheets if sheet_count <= row_count]
+        for row_count, sheet_count in sizes:
+            for variant in VARIANTS.get(name, [{}]):
+                params = {"rows": row_count, "sheets": sheet_count, **variant}
+                key = scenario_key(name, params)
+                result = run_scenario(name, params)
+
+                if "error" in result:
+                    print(f"ERROR      {key}\n{result['error']}")
+                    failures.append(key)
+                    continue
+
+                results[key] = result
+                regressions = compare(key, result, compared, args.tolerance)
+                status = "REGRESSION" if regressions else "ok"
+                if compared is not None and key not in compared:
+                    status = "REGRESSION" if regressions else "new"
+                    uncompared.append(key)
+                print(f"{status:<10} {key}: {result['throughput']:.1f} {result['unit']}, "
+                      f"{result['seconds']:.3f}s, peak RSS {result['peak_rss_mb']} MB "
+                      f"(workers {result['worker_peak_rss_mb']} MB)")
+                for regression in regressions:
+                    print(f"           - {regression}")
+                if regressions:
+                    failures.append(key)
+
+    if args.save_baseline:
+        baseline.update({
+            key: {"throughput": result["throughput"], "peak_rss_mb": result["peak_rss_mb"], "unit": result["unit"]}
+            for key, result in results.items()
+        })
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(baseline, baseline_file, indent=2, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+
+    if uncompared and not args.save_baseline:
+        print(f"Warning: {len(uncompared)} result(s) have no baseline entry and were not compared; "
+              f"add them with --save-baseline")
+
+    if failures and not args.save_baseline:
+        print(f"{len(failures)} benchmark(s) failed or regressed")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
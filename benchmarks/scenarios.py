@@ -0,0 +1,242 @@
+# benchmarks/scenarios.py
+
+import os
+import statistics
+import tempfile
+import time
+import uuid
+
+from benchmarks.workbooks import write_workbook, roster_records
+
+REQUIRED_FIELDS = ['Name', 'Number', 'Shift Name', 'Shift Timings', 'Dress Code', 'Work Description', 'date']
+
+
+def latency_summary(samples):
+    """
+    p50/p95/p99 and mean of latencies given in seconds, reported in milliseconds.
+    """
+    ordered = sorted(samples)
+    if not ordered:
+        return {}
+
+    def percentile(fraction):
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000
+
+    return {
+        "p50_ms": round(percentile(0.50), 3),
+        "p95_ms": round(percentile(0.95), 3),
+        "p99_ms": round(percentile(0.99), 3),
+        "mean_ms": round(statistics.mean(ordered) * 1000, 3)
+    }
+
+
+def _create_app():
+    """
+    Build the real app against the benchmark database, without background threads or network access.
+    """
+    os.environ.setdefault("SCHEDULER_ENABLED", "false")
+    os.environ.setdefault("BULK_CALL_RESUME_ENABLED", "false")
+    os.environ.setdefault("POST_CALL_PIPELINE_ENABLED", "false")
+    os.environ.setdefault("CALL_LOG_WRITE_BEHIND_ENABLED", "false")
+    os.environ.setdefault("TWILIO_FAKE_TRANSPORT", "true")
+    os.environ["MONGO_URI"] = os.environ.get("BENCH_MONGO_URI", "mongodb://localhost:27017/hour4u_benchmark")
+
+    from app import create_app
+    app = create_app()
+    # The benchmark empties its collections; never let it touch a real database
+    if "bench" not in app.mongo.db.name:
+        raise RuntimeError(f"Refusing to benchmark against database '{app.mongo.db.name}'; use a name containing 'bench'")
+    _reset_database(app)
+    return app
+
+
+def _reset_database(app):
+    db = app.mongo.db
+    for name in ("champ_details", "followup_jobs", "call_logs", "call_rollups"):
+        db[name].delete_many({})
+    app.champ_cache.clear()
+
+
+def _seed_records(app, rows, sheets):
+    """
+    Insert normalized records directly, bypassing /upload.
+
+    Returns:
+        list: The inserted records.
+    """
+    from services.data_parser import DataParser
+    parser = DataParser()
+    per_sheet = max(1, rows // sheets)
+    records = []
+    for index in range(sheets):
+        records.extend(
+            parser.normalize_record(record, f"Site {index + 1}")
+            for record in roster_records(per_sheet, seed=index)
+        )
+    collection = app.mongo.db.champ_details
+    for start in range(0, len(records), 10000):
+        collection.insert_many(records[start:start + 10000])
+    return records
+
+
+def parse_excel(rows, sheets, mode="dataframe"):
+    """
+    DataParser.parse_excel ('dataframe', 'parallel') or iter_excel_chunks ('streaming') over a generated workbook.
+    """
+    from services.data_parser import DataParser, create_parse_pool
+
+    # At least two workers, so the pool path runs even on a single-CPU machine
+    pool = create_parse_pool(max(2, os.cpu_count() or 1)) if mode == "parallel" else None
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_workbook(os.path.join(directory, "roster.xlsx"), rows, sheets)
+        parser = DataParser()
+        if pool is not None:
+            # The pool is app-scoped in production; time it with its workers already loaded
+            parser.parse_excel(path, REQUIRED_FIELDS, pool=pool)
+
+        start = time.perf_counter()
+        if mode == "streaming":
+            parsed = sum(len(chunk) for chunk in parser.iter_excel_chunks(path, REQUIRED_FIELDS))
+        else:
+            parsed = len(parser.parse_excel(path, REQUIRED_FIELDS, pool=pool))
+        elapsed = time.perf_counter() - start
+
+    if pool is not None:
+        pool.shutdown()
+
+    return {"seconds": elapsed, "throughput": parsed / elapsed, "unit": "rows/s", "rows_parsed": parsed}
+
+
+def normalize_record(rows, sheets=1):
+    """
+    Row-by-row normalize_record against the vectorized normalize_frame, including a parity check.
+    """
+    import pandas as pd
+    from services.data_parser import DataParser
+
+    parser = DataParser()
+    records = roster_records(rows)
+
+    start = time.perf_counter()
+    by_row = [parser.normalize_record(record, "Site 1") for record in records]
+    elapsed = time.perf_counter() - start
+
+    frame_start = time.perf_counter()
+    by_frame = parser.normalize_frame(pd.DataFrame(records, dtype=object), "Site 1")
+    frame_elapsed = time.perf_counter() - frame_start
+
+    return {
+        "seconds": elapsed,
+        "throughput": rows / elapsed,
+        "unit": "rows/s",
+        "vectorized_throughput": rows / frame_elapsed,
+        "parity": by_row == by_frame
+    }
+
+
+def upload(rows, sheets):
+    """
+    Full POST /upload of a generated workbook through the Flask test client.
+    """
+    app = _create_app()
+    client = app.test_client()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_workbook(os.path.join(directory, "roster.xlsx"), rows, sheets)
+        with open(path, "rb") as workbook:
+            start = time.perf_counter()
+            response = client.post(
+                "/upload",
+                data={"file": (workbook, "roster.xlsx")},
+                content_type="multipart/form-data"
+            )
+            elapsed = time.perf_counter() - start
+
+    if response.status_code not in (200, 201):
+        raise RuntimeError(f"/upload returned {response.status_code}: {response.get_data(as_text=True)[:200]}")
+    _reset_database(app)
+    return {"seconds": elapsed, "throughput": rows / elapsed, "unit": "rows/s"}
+
+
+def records_pagination(rows, sheets, per_page=50, depth=None):
+    """
+    GET /records at depth: walks keyset cursors page by page, then requests the same depth with ?page=.
+    """
+    app = _create_app()
+    client = app.test_client()
+    _seed_records(app, rows, sheets)
+    depth = depth or max(1, rows // per_page)
+
+    samples = []
+    cursor = None
+    start = time.perf_counter()
+    for _ in range(depth):
+        url = f"/records?per_page={per_page}" + (f"&cursor={cursor}" if cursor else "")
+        request_start = time.perf_counter()
+        response = client.get(url)
+        samples.append(time.perf_counter() - request_start)
+        cursor = response.get_json()["data"]["next_cursor"]
+        if cursor is None:
+            break
+    elapsed = time.perf_counter() - start
+
+    offset_start = time.perf_counter()
+    client.get(f"/records?per_page={per_page}&page={len(samples)}")
+    offset_elapsed = time.perf_counter() - offset_start
+
+    _reset_database(app)
+    return {
+        "seconds": elapsed,
+        "throughput": len(samples) / elapsed,
+        "unit": "pages/s",
+        "pages": len(samples),
+        "cursor_last_page_ms": round(samples[-1] * 1000, 3),
+        "offset_last_page_ms": round(offset_elapsed * 1000, 3),
+        **latency_summary(samples)
+    }
+
+
+def voice_lookup(rows, sheets, requests=2000):
+    """
+    POST /voice latency for known numbers, first with an empty champ cache, then warm.
+    """
+    app = _create_app()
+    client = app.test_client()
+    records = _seed_records(app, rows, sheets)
+    numbers = [record["Number"] for record in records[::max(1, len(records) // requests)][:requests]]
+
+    def run():
+        samples = []
+        for number in numbers:
+            request_start = time.perf_counter()
+            client.post("/voice", data={"To": number, "CallSid": f"CA{uuid.uuid4().hex}"})
+            samples.append(time.perf_counter() - request_start)
+        return samples
+
+    app.champ_cache.clear()
+    cold = run()
+    start = time.perf_counter()
+    warm = run()
+    elapsed = time.perf_counter() - start
+
+    _reset_database(app)
+    return {
+        "seconds": elapsed,
+        "throughput": len(warm) / elapsed,
+        "unit": "requests/s",
+        "cold": latency_summary(cold),
+        **latency_summary(warm)
+    }
+
+
+SCENARIOS = {
+    "parse_excel": parse_excel,
+    "normalize_record": normalize_record,
+    "upload": upload,
+    "records_pagination": records_pagination,
+    "voice_lookup": voice_lookup,
+}
+
+# Scenarios that need a running mongod at BENCH_MONGO_URI
+MONGO_SCENARIOS = {"upload", "records_pagination", "voice_lookup"}
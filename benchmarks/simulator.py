@@ -0,0 +1,361 @@
+# benchmarks/simulator.py
+"""
+Local stand-in for the Twilio and OpenAI APIs used by the call pipeline.
+
+Implements calls.create, recordings.list, recording fetch and the MP3
+download, and drives every created call through a realistic lifecycle by
+POSTing status callbacks (initiated, ringing, then in-progress and completed,
+or no-answer/busy) to the call's StatusCallback, fetching its TwiML Url when
+it is answered. Whisper transcriptions and chat completions are answered
+after a configurable latency.
+
+Run it, then start the app against it:
+    python -m benchmarks.simulator --port 8765 --answer-rate 0.8
+    TWILIO_API_BASE=http://localhost:8765 OPENAI_API_BASE=http://localhost:8765/v1 \\
+        NGROK_URL=http://localhost:5000 python app.py
+
+GET /_sim/stats reports callback and TwiML fetch latencies; POST /_sim/reset clears state.
+"""
+
+import argparse
+import heapq
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+from flask import Flask, Response, jsonify, request
+
+from benchmarks.scenarios import latency_summary
+
+TERMINAL_STATUSES = ("completed", "no-answer", "busy")
+
+
+class CallLifecycleSimulator:
+    """
+    Schedules and delivers the status callbacks of simulated calls.
+
+    A single dispatcher thread sleeps until the next event is due and hands
+    it to a pool of delivery threads, so thousands of concurrent calls cost
+    one heap entry each.
+    """
+
+    def __init__(self, answer_rate=0.8, busy_rate=0.1, ring_seconds=3.0, talk_seconds=20.0,
+                 jitter=0.5, jitter_ms=200, duplicate_rate=0.0, callback_workers=32, seed=None):
+        self.answer_rate = answer_rate
+        self.busy_rate = busy_rate
+        self.ring_seconds = ring_seconds
+        self.talk_seconds = talk_seconds
+        self.jitter = jitter
+        self.jitter_ms = jitter_ms
+        self.duplicate_rate = duplicate_rate
+        self.random = random.Random(seed)
+
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_maxsize=callback_workers))
+        self.session.mount("https://", HTTPAdapter(pool_maxsize=callback_workers))
+        self._executor = ThreadPoolExecutor(max_workers=callback_workers, thread_name_prefix="callback")
+        self._heap = []
+        self._sequence = 0
+        self._condition = threading.Condition()
+        self._lock = threading.Lock()
+        self.reset()
+
+        threading.Thread(target=self._dispatch, name="lifecycle-dispatcher", daemon=True).start()
+
+    def reset(self):
+        with self._lock:
+            self.calls = {}
+            self.recordings = {}
+            self.callback_latencies = []
+            self.voice_latencies = []
+            self.callback_errors = 0
+            self.callbacks_sent = 0
+            self.terminal = {status: 0 for status in TERMINAL_STATUSES}
+            self._terminal_calls = set()
+            self.openai_requests = {"transcriptions": 0, "chat_completions": 0}
+
+    def _delay(self, seconds):
+        return max(0.0, seconds * self.random.uniform(1 - self.jitter, 1 + self.jitter))
+
+    def create_call(self, account_sid, params):
+        call_sid = f"CA{uuid.uuid4().hex}"
+        call = {
+            "sid": call_sid,
+            "account_sid": account_sid,
+            "to": params.get("To"),
+            "from": params.get("From"),
+            "status": "queued",
+            "url": params.get("Url"),
+            "status_callback": params.get("StatusCallback"),
+            "start_time": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "uri": f"/2010-04-01/Accounts/{account_sid}/Calls/{call_sid}.json"
+        }
+        with self._lock:
+            self.calls[call_sid] = call
+
+        # Plan the whole lifecycle up front
+        now = time.monotonic()
+        at = now + self._delay(0.2)
+        events = [(at, "initiated")]
+        at += self._delay(1.0)
+        events.append((at, "ringing"))
+        roll = self.random.random()
+        if roll < self.answer_rate:
+            at += self._delay(self.ring_seconds)
+            events.append((at, "in-progress"))
+            at += self._delay(self.talk_seconds)
+            events.append((at, "completed"))
+        else:
+            at += self._delay(self.ring_seconds * 5)
+            events.append((at, "busy" if roll < self.answer_rate + self.busy_rate else "no-answer"))
+
+        with self._condition:
+            for sequence_number, (due, status) in enumerate(events):
+                # Extra delivery jitter can reorder events, as it does in production
+                due += self.random.uniform(0, self.jitter_ms / 1000.0)
+                self._push(due, call_sid, status, sequence_number, events[0][0])
+                if self.random.random() < self.duplicate_rate:
+                    self._push(due + self._delay(1.0), call_sid, status, sequence_number, events[0][0])
+            self._condition.notify()
+        return call
+
+    def _push(self, due, call_sid, status, sequence_number, started):
+        self._sequence += 1
+        heapq.heappush(self._heap, (due, self._sequence, call_sid, status, sequence_number, started))
+
+    def _dispatch(self):
+        while True:
+            with self._condition:
+                while not self._heap or self._heap[0][0] > time.monotonic():
+                    timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+                    self._condition.wait(timeout)
+                event = heapq.heappop(self._heap)
+            self._executor.submit(self._deliver, *event[2:])
+
+    def _deliver(self, call_sid, status, sequence_number, started):
+        call = self.calls.get(call_sid)
+        if call is None:
+            return
+        duration = int(time.monotonic() - started) if status == "completed" else 0
+
+        # Side effects happen on the first delivery only; duplicates just repeat the callback
+        with self._lock:
+            first_delivery = status not in call.setdefault("delivered", set())
+            call["delivered"].add(status)
+        if first_delivery and status == "in-progress" and call["url"]:
+            self._fetch_twiml(call)
+        if first_delivery and status == "completed":
+            self._add_recording(call)
+
+        if not call["status_callback"]:
+            return
+        form = {
+            "CallSid": call_sid,
+            "AccountSid": call["account_sid"],
+            "CallStatus": status,
+            "SequenceNumber": str(sequence_number),
+            "To": call["to"],
+            "From": call["from"],
+            "CallDuration": str(duration),
+            "StartTime": call["start_time"],
+            "EndTime": datetime.utcnow().isoformat(timespec="seconds") + "Z" if status in TERMINAL_STATUSES else "",
+            "Timestamp": datetime.utcnow().isoformat()
+        }
+        request_start = time.perf_counter()
+        try:
+            response = self.session.post(call["status_callback"], data=form, timeout=30)
+            failed = response.status_code >= 400
+        except requests.RequestException:
+            failed = True
+        elapsed = time.perf_counter() - request_start
+
+        with self._lock:
+            self.callbacks_sent += 1
+            self.callback_latencies.append(elapsed)
+            if failed:
+                self.callback_errors += 1
+            elif status in TERMINAL_STATUSES and call_sid not in self._terminal_calls:
+                # Duplicated deliveries count once
+                self._terminal_calls.add(call_sid)
+                self.terminal[status] += 1
+
+    def _fetch_twiml(self, call):
+        request_start = time.perf_counter()
+        try:
+            self.session.post(call["url"], data={"CallSid": call["sid"], "To": call["to"], "From": call["from"]}, timeout=30)
+        except requests.RequestException:
+            return
+        with self._lock:
+            self.voice_latencies.append(time.perf_counter() - request_start)
+
+    def _add_recording(self, call):
+        recording_sid = f"RE{uuid.uuid4().hex}"
+        with self._lock:
+            self.recordings[recording_sid] = {
+                "sid": recording_sid,
+                "account_sid": call["account_sid"],
+                "call_sid": call["sid"],
+                "status": "completed",
+                "uri": f"/2010-04-01/Accounts/{call['account_sid']}/Recordings/{recording_sid}.json"
+            }
+
+    def stats(self):
+        with self._lock:
+            callback_latencies = list(self.callback_latencies)
+            voice_latencies = list(self.voice_latencies)
+            stats = {
+                "calls": len(self.calls),
+                "recordings": len(self.recordings),
+                "callbacks_sent": self.callbacks_sent,
+                "callback_errors": self.callback_errors,
+                "terminal": dict(self.terminal),
+                "openai_requests": dict(self.openai_requests)
+            }
+        with self._condition:
+            stats["events_pending"] = len(self._heap)
+        stats["callback_latency"] = latency_summary(callback_latencies)
+        stats["voice_latency"] = latency_summary(voice_latencies)
+        return stats
+
+
+def create_simulator(lifecycle, openai_latency_ms=800, recording_kb=200, yes_rate=0.7):
+    """
+    Build the simulator's Flask app.
+    """
+    app = Flask(__name__)
+    audio = os.urandom(recording_kb * 1024)
+
+    def openai_delay():
+        time.sleep(lifecycle.random.uniform(0.5, 1.5) * openai_latency_ms / 1000.0)
+
+    @app.route('/2010-04-01/Accounts/<account_sid>/Calls.json', methods=['POST'])
+    def create_call(account_sid):
+        call = lifecycle.create_call(account_sid, request.form)
+        return jsonify({key: value for key, value in call.items() if key != "delivered"}), 201
+
+    @app.route('/2010-04-01/Accounts/<account_sid>/Recordings.json', methods=['GET'])
+    def list_recordings(account_sid):
+        call_sid = request.args.get("CallSid")
+        with lifecycle._lock:
+            recordings = [
+                recording for recording in lifecycle.recordings.values()
+                if call_sid is None or recording["call_sid"] == call_sid
+            ]
+        return jsonify({
+            "recordings": recordings,
+            "first_page_uri": request.full_path,
+            "next_page_uri": None,
+            "previous_page_uri": None,
+            "page": 0,
+            "page_size": 50,
+            "uri": request.full_path
+        })
+
+    @app.route('/2010-04-01/Accounts/<account_sid>/Recordings/<recording_sid>.json', methods=['GET'])
+    def fetch_recording(account_sid, recording_sid):
+        recording = lifecycle.recordings.get(recording_sid)
+        if recording is None:
+            return jsonify({"code": 20404, "message": "The requested resource was not found", "status": 404}), 404
+        return jsonify(recording)
+
+    @app.route('/2010-04-01/Accounts/<account_sid>/Recordings/<recording_sid>.mp3', methods=['GET'])
+    def download_recording(account_sid, recording_sid):
+        if recording_sid not in lifecycle.recordings:
+            return Response(status=404)
+        # Unique content per recording, so content-addressed caches see distinct audio
+        return Response(recording_sid.encode() + audio, mimetype="audio/mpeg")
+
+    @app.route('/v1/audio/transcriptions', methods=['POST'])
+    def transcriptions():
+        with lifecycle._lock:
+            lifecycle.openai_requests["transcriptions"] += 1
+        openai_delay()
+        if request.form.get("language") == "hi":
+            return jsonify({"text": "हाँ, मैं शिफ्ट में आऊँगा।"})
+        return jsonify({"text": "Yes, I will come to the shift."})
+
+    @app.route('/v1/chat/completions', methods=['POST'])
+    def chat_completions():
+        with lifecycle._lock:
+            lifecycle.openai_requests["chat_completions"] += 1
+        openai_delay()
+        body = request.get_json(force=True)
+        prompt = body["messages"][-1]["content"]
+
+        if "Calls: " in prompt:
+            # Batch intent classification
+            calls = json.loads(prompt.split("Calls: ", 1)[1])
+            content = json.dumps({"results": [
+                {
+                    "id": call["id"],
+                    "intent": "yes" if lifecycle.random.random() < yes_rate else "no",
+                    "future_notify_interest": lifecycle.random.choice(["yes", "no", "unknown"])
+                }
+                for call in calls
+            ]})
+        else:
+            content = "Yes, I will come to the shift."
+
+        return jsonify({
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", ""),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        })
+
+    @app.route('/_sim/stats', methods=['GET'])
+    def stats():
+        return jsonify(lifecycle.stats())
+
+    @app.route('/_sim/reset', methods=['POST'])
+    def reset():
+        lifecycle.reset()
+        return ('', 204)
+
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate the Twilio and OpenAI APIs locally.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--answer-rate", type=float, default=0.8, help="Share of calls that are answered")
+    parser.add_argument("--busy-rate", type=float, default=0.1, help="Share of calls that end busy")
+    parser.add_argument("--ring-seconds", type=float, default=3.0, help="Mean time from ringing to answer")
+    parser.add_argument("--talk-seconds", type=float, default=20.0, help="Mean call duration once answered")
+    parser.add_argument("--jitter", type=float, default=0.5, help="Relative spread of every delay")
+    parser.add_argument("--jitter-ms", type=float, default=200, help="Extra random delivery delay per callback")
+    parser.add_argument("--duplicate-rate", type=float, default=0.0, help="Share of callbacks delivered twice")
+    parser.add_argument("--callback-workers", type=int, default=32)
+    parser.add_argument("--openai-latency-ms", type=float, default=800)
+    parser.add_argument("--recording-kb", type=int, default=200)
+    parser.add_argument("--yes-rate", type=float, default=0.7, help="Share of intents classified as 'yes'")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    lifecycle = CallLifecycleSimulator(
+        answer_rate=args.answer_rate,
+        busy_rate=args.busy_rate,
+        ring_seconds=args.ring_seconds,
+        talk_seconds=args.talk_seconds,
+        jitter=args.jitter,
+        jitter_ms=args.jitter_ms,
+        duplicate_rate=args.duplicate_rate,
+        callback_workers=args.callback_workers,
+        seed=args.seed
+    )
+    app = create_simulator(lifecycle, args.openai_latency_ms, args.recording_kb, args.yes_rate)
+    app.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
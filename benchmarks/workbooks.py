@@ -0,0 +1,87 @@
+# benchmarks/workbooks.py
+
+import random
+from datetime import date, timedelta
+
+from openpyxl import Workbook
+
+COLUMNS = ['Name', 'Number', 'Shift Name', 'Shift Timings', 'Dress Code', 'Work Description', 'date']
+
+FIRST_NAMES = ["Aarav", "Vivaan", "Aditya", "Priya", "Ananya", "Rohan", "Kavya", "Ishaan", "Neha", "Arjun"]
+LAST_NAMES = ["Sharma", "Verma", "Gupta", "Singh", "Patel", "Kumar", "Yadav", "Mehta", "Joshi", "Rao"]
+SHIFTS = [("Morning Shift", "07:00 - 15:00"), ("Day Shift", "09:00-17:00"), ("Evening", "15:00 - 23:00"),
+          ("Night Shift", "23:00-07:00")]
+DRESS_CODES = ["Black trousers, white shirt", "Company T-shirt", "Formal", "Safety vest and shoes"]
+WORK_DESCRIPTIONS = ["Warehouse picking", "Event usher", "Retail billing", "Delivery loading", "Housekeeping"]
+
+
+def roster_rows(count, seed=0, start=date(2024, 1, 1), days=3):
+    """
+    Generate roster rows shaped like real uploads.
+
+    Numbers mix the formats normalize_number handles (10 digits, 91-prefixed,
+    already '+91'), shift names sometimes carry the ' Shift' suffix, timings
+    have stray spaces, and a sheet covers only a few distinct dates written
+    as DD/MM/YYYY or YYYY-MM-DD.
+
+    Args:
+        count (int): Number of rows.
+        seed (int): Random seed, so runs are reproducible.
+        start (date): First shift date.
+        days (int): Number of distinct shift dates.
+
+    Returns:
+        list: Rows as lists in COLUMNS order.
+    """
+    rng = random.Random(seed)
+    dates = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        dates.append(day.strftime('%d/%m/%Y') if offset % 2 else day.isoformat())
+
+    rows = []
+    for index in range(count):
+        digits = f"{9000000000 + seed * 1000003 + index:010d}"[-10:]
+        number = rng.choice([digits, f"91{digits}", f"+91{digits}", f" {digits} "])
+        shift_name, timings = rng.choice(SHIFTS)
+        rows.append([
+            f" {rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} ",
+            number,
+            shift_name,
+            timings,
+            rng.choice(DRESS_CODES),
+            rng.choice(WORK_DESCRIPTIONS),
+            rng.choice(dates),
+        ])
+    return rows
+
+
+def write_workbook(path, rows, sheets=1, seed=0):
+    """
+    Write a roster workbook with ``rows`` spread evenly over ``sheets`` sheets.
+
+    Args:
+        path (str): Destination .xlsx path.
+        rows (int): Total number of data rows.
+        sheets (int): Number of sheets.
+        seed (int): Random seed.
+
+    Returns:
+        str: ``path``.
+    """
+    workbook = Workbook(write_only=True)
+    per_sheet, remainder = divmod(rows, sheets)
+    for index in range(sheets):
+        sheet = workbook.create_sheet(f"Site {index + 1}")
+        sheet.append(COLUMNS)
+        for row in roster_rows(per_sheet + (1 if index < remainder else 0), seed=seed + index):
+            sheet.append(row)
+    workbook.save(path)
+    return path
+
+
+def roster_records(count, seed=0):
+    """
+    Roster rows as dictionaries keyed by column name, as DataParser sees them.
+    """
+    return [dict(zip(COLUMNS, row)) for row in roster_rows(count, seed=seed)]
@@ -1,14 +1,13 @@
 # blueprints/calls.py 
 
-from flask import Blueprint, request, current_app, url_for, Response
-from services.twilio_service import TwilioService
+from flask import Blueprint, request, current_app, Response
+from services.call_service import CallService, CallInitiationError
+from services.champ_cache import CACHED_FIELDS
+from services.index_manager import SELECTIVE_FILTER_FIELDS
+from services.status_ledger import status_rank
 from utils.response import success_response, error_response
-from bson.objectid import ObjectId
 from datetime import datetime
 import logging
-import openai
-import requests
-from io import BytesIO
 from twilio.twiml.voice_response import VoiceResponse  # Ensure this import is present
 
 
@@ -24,65 +23,7 @@ def make_call(record_id):
     Initiate a call using Twilio by passing the record ID.
     """
     try:
-        # Fetch the record from MongoDB using record_id
-        mongo = current_app.mongo
-        champ_details = mongo.db.champ_details
-        record = champ_details.find_one({"_id": ObjectId(record_id)})
-
-        if not record:
-            return error_response("Record not found", 404)
-
-        phone_number = record.get("Number")
-        name = record.get("Name", "")
-        shift_timings = record.get("Shift Timings", "")
-        work_description = record.get("Work Description", "")
-        dress_code = record.get("Dress Code", "")
-        sheet_name = record.get("sheet_name", "")
-
-        if not phone_number:
-            return error_response("Phone number not found in the record", 400)
-
-        # Initialize Twilio Service
-        twilio_service = TwilioService()
-
-        # TwiML and Status Callback URLs using Ngrok
-        ngrok_url = current_app.config.get("NGROK_URL")
-        if not ngrok_url:
-            return error_response("NGROK_URL is not configured in environment variables", 500)
-
-        twiml_url = f"{ngrok_url}{url_for('calls.voice')}"
-        status_callback_url = f"{ngrok_url}{url_for('calls.call_status_callback')}"
-
-        # Initiate the call
-        call_sid = twilio_service.initiate_call(
-            to_number=phone_number,
-            twiml_url=twiml_url,
-            status_callback_url=status_callback_url
-        )
-
-        # Store call initiation data in MongoDB
-        call_logs = mongo.db.call_logs
-        call_log = {
-            "Name": name,
-            "Number": phone_number,
-            "call_initiated_timestamp": datetime.utcnow(),
-            "call_status": "initiated",
-            "Work Description": work_description,
-            "sheet_name": sheet_name,
-            "call_sid": call_sid,
-            "Recording SID": "",
-            "Transcription_Hindi": "",
-            "Transcription_English": "",
-            "Intent": "",
-            "future_notify_interest": "",
-            "Call Start Time": "",
-            "Call End Time": "",
-            "Called Number": phone_number,
-            "Call Date": datetime.utcnow().strftime('%Y-%m-%d'),
-            "Call Duration (seconds)": 0,
-            "Timestamp": datetime.utcnow()
-        }
-        call_logs.insert_one(call_log)
+        call_sid = CallService().initiate_call_for_record(record_id)
 
         return success_response(
             "Call initiated successfully",
@@ -90,75 +31,88 @@ def make_call(record_id):
             status=200
         )
 
+    except CallInitiationError as e:
+        return error_response(e.message, e.status)
     except Exception as e:
         logger.error(f"Error in make_call endpoint: {str(e)}")
         return error_response(f"An error occurred: {str(e)}", 500)
 
-def initiate_call_from_scheduler(record_id):
+
+# Query parameters accepted by the filter-based bulk endpoint, mapped to champ_details fields
+BULK_CALL_FILTER_FIELDS = {
+    "sheet_name": "sheet_name",
+    "work_description": "Work Description",
+    "date": "date",
+    "shift_name": "Shift Name",
+    "shift_timings": "Shift Timings"
+}
+
+
+def _start_bulk_calls(query, description):
+    batch = current_app.bulk_caller.start_batch(query, description)
+    if not batch:
+        return error_response("No records found for the specified filter", 404)
+    return success_response(
+        "Bulk calls queued successfully",
+        data=current_app.bulk_caller.progress(batch),
+        status=202
+    )
+
+
+@calls_bp.route('/make_calls/sheet/<string:sheet_name>', methods=['POST'])
+def make_calls_for_sheet(sheet_name):
     """
-    Function to initiate a call using Twilio, to be called from the scheduler.
+    Queue calls for every record of a sheet. Returns a batch id with progress counters.
     """
     try:
-        with current_app.app_context():
-            # Fetch the record from MongoDB using record_id
-            mongo = current_app.mongo
-            champ_details = mongo.db.champ_details
-            record = champ_details.find_one({"_id": ObjectId(record_id)})
-
-            if not record:
-                logger.error(f"Record not found for id: {record_id}")
-                return None
-
-            # Initiate the call (this logic is already in place)
-            phone_number = record.get("Number")
-            name = record.get("Name", "")
-            shift_timings = record.get("Shift Timings", "")
-            work_description = record.get("Work Description", "")
-            dress_code = record.get("Dress Code", "")
-            sheet_name = record.get("sheet_name", "")
-
-            if not phone_number:
-                logger.error(f"Phone number not found for record_id {record_id}")
-                return None
-
-            # Initialize Twilio Service
-            twilio_service = TwilioService()
-
-            # TwiML and Status Callback URLs using Ngrok
-            ngrok_url = current_app.config.get("NGROK_URL")
-            if not ngrok_url:
-                logger.error("NGROK_URL is not configured.")
-                return None
-
-            twiml_url = f"{ngrok_url}{url_for('calls.voice')}"
-            status_callback_url = f"{ngrok_url}{url_for('calls.call_status_callback')}"
-
-            # Initiate the call via Twilio
-            call_sid = twilio_service.initiate_call(
-                to_number=phone_number,
-                twiml_url=twiml_url,
-                status_callback_url=status_callback_url
-            )
-
-            if call_sid:
-                logger.info(f"Call initiated successfully for record_id {record_id}, call_sid {call_sid}")
-                
-                # Log call initiation in MongoDB
-                call_logs = mongo.db.call_logs
-                call_logs.insert_one({
-                    "record_id": record_id,
-                    "call_sid": call_sid,
-                    "status": "initiated",
-                    "initiated_at": datetime.utcnow()
-                })
-            else:
-                logger.error(f"Failed to initiate call for record_id {record_id}")
-
-            return call_sid
+        return _start_bulk_calls({"sheet_name": sheet_name}, {"sheet_name": sheet_name})
+    except Exception as e:
+        logger.error(f"Error in make_calls_for_sheet endpoint: {str(e)}")
+        return error_response(f"An error occurred: {str(e)}", 500)
+
 
+@calls_bp.route('/make_calls', methods=['POST'])
+def make_calls_by_filter():
+    """
+    Queue calls for every record matching a JSON filter.
+    Accepted keys: sheet_name, work_description, date, shift_name, shift_timings;
+    at least one of sheet_name, work_description and date is required.
+    """
+    try:
+        filters = request.get_json(silent=True) or {}
+        if not isinstance(filters, dict) or not filters:
+            return error_response("No filter provided", 400)
+
+        invalid_fields = set(filters.keys()) - set(BULK_CALL_FILTER_FIELDS)
+        if invalid_fields:
+            return error_response(f"Invalid filter fields: {', '.join(invalid_fields)}", 400)
+        # Plain values only, so a filter cannot smuggle in query operators
+        if any(isinstance(value, (dict, list)) for value in filters.values()):
+            return error_response("Filter values must be plain values", 400)
+
+        query = {BULK_CALL_FILTER_FIELDS[key]: value for key, value in filters.items()}
+        # shift_name and shift_timings alone would scan every record
+        if not set(query) & set(SELECTIVE_FILTER_FIELDS):
+            return error_response("Filter must include sheet_name, work_description or date", 400)
+        return _start_bulk_calls(query, filters)
     except Exception as e:
-        logger.error(f"Error initiating call for record_id {record_id}: {str(e)}")
-        return None
+        logger.error(f"Error in make_calls_by_filter endpoint: {str(e)}")
+        return error_response(f"An error occurred: {str(e)}", 500)
+
+
+@calls_bp.route('/make_calls/batch/<string:batch_id>', methods=['GET'])
+def get_call_batch(batch_id):
+    """
+    Fetch the progress counters of a bulk call batch.
+    """
+    batch = current_app.bulk_caller.get_batch(batch_id)
+    if not batch:
+        return error_response("Batch not found", 404)
+    return success_response(
+        "Batch fetched successfully",
+        data=current_app.bulk_caller.progress(batch),
+        status=200
+    )
 
 
 @calls_bp.route('/voice', methods=['POST'])
@@ -169,10 +123,17 @@ def voice():
     try:
         response = VoiceResponse()
 
-        # Fetch user details based on 'To' number
+        # Fetch user details based on the CallSid or the 'To' number, from the cache when possible
+        call_sid = request.form.get('CallSid', '')
         to_number = request.form.get('To', '')
-        mongo = current_app.mongo
-        user = mongo.db.champ_details.find_one({"Number": to_number})
+        champ_cache = current_app.champ_cache
+        user = champ_cache.get_by_call(call_sid) or champ_cache.get_by_number(to_number)
+        if user is None:
+            mongo = current_app.mongo
+            projection = {field: 1 for field in CACHED_FIELDS}
+            record = mongo.db.champ_details.find_one({"Number": to_number}, projection)
+            if record:
+                user = champ_cache.put(record, call_sid=call_sid)
 
         if user:
             name = user.get("Name", "")
@@ -217,11 +178,14 @@ def voice():
 def call_status_callback():
     """
     Receives call status updates from Twilio and updates MongoDB accordingly.
+    Redelivered events are dropped, and a call log never moves back to an earlier status.
     """
+    recorded = False
     try:
         # Extract parameters from Twilio's request
         call_sid = request.form.get('CallSid')
         call_status = request.form.get('CallStatus')
+        sequence_number = request.form.get('SequenceNumber', type=int)
         to_number = request.form.get('To')
         from_number = request.form.get('From')
         call_duration = request.form.get('CallDuration', '0')
@@ -242,9 +206,10 @@ def call_status_callback():
 
         mapped_status = status_mapping.get(call_status, call_status)
 
-        # Initialize MongoDB connection
-        mongo = current_app.mongo
-        call_logs = mongo.db.call_logs
+        # A duplicate delivery has been handled already, including any post-call processing
+        if not current_app.status_ledger.record(call_sid, call_status, sequence_number):
+            return ('', 204)
+        recorded = True
 
         # Update the corresponding call_log in MongoDB
         update_fields = {
@@ -257,111 +222,28 @@ def call_status_callback():
             "Timestamp": datetime.utcnow()
         }
 
-        # Update based on CallSid
-        result = call_logs.update_one({"call_sid": call_sid}, {"$set": update_fields})
-
-        if result.matched_count == 1:
-            logger.info(f"Call status updated for CallSid {call_sid}: {mapped_status}")
-
-            # If call is completed or not picked, fetch recording and process transcription
-            if mapped_status in ['completed', 'not picked']:
-                # Fetch Recording SID
-                twilio_service = TwilioService()
-                recording_sid = twilio_service.fetch_recording_sid(call_sid)
-
-                if recording_sid:
-                    # Update Recording SID in MongoDB
-                    call_logs.update_one({"call_sid": call_sid}, {"$set": {"Recording SID": recording_sid}})
-
-                    # Fetch Recording URL
-                    recording = twilio_service.client.recordings(recording_sid).fetch()
-                    recording_url = f"https://api.twilio.com{recording.uri.replace('.json', '.mp3')}"
-
-                    # Stream the recording directly to OpenAI without saving to disk
-                    response = requests.get(recording_url, auth=(twilio_service.account_sid, twilio_service.auth_token))
-                    if response.status_code == 200:
-                        audio_stream = BytesIO(response.content)
-                        # Add 'name' attribute to BytesIO object
-                        audio_stream.name = "recording.mp3"
-
-                        # Transcribe using OpenAI
-                        openai_api_key = current_app.config.get("OPENAI_API_KEY")
-                        openai.api_key = openai_api_key
-
-                        # Function to transcribe audio
-                        def transcribe_audio(audio_file, language='hi'):
-                            try:
-                                transcript = openai.Audio.transcribe("whisper-1", audio_file, language=language)
-                                return transcript['text']
-                            except Exception as e:
-                                logger.error(f"OpenAI transcription error: {str(e)}")
-                                return ""
-
-                        # Transcribe in Hindi
-                        transcription_hindi = transcribe_audio(audio_stream, language='hi')
-
-                        # Reset the stream position
-                        audio_stream.seek(0)
-
-                        # Transcribe in English
-                        transcription_english = transcribe_audio(audio_stream, language='en')
-
-                        # Extract Intent and future_notify_interest using OpenAI GPT
-                        def extract_intent(transcription):
-                            try:
-                                prompt = (
-                                    "Firstly identify what is the intent of person, is it yes or no. "
-                                    "Then give output for future_notify_interest from the transcription.\n\n"
-                                    f"Transcription: {transcription}\n\n"
-                                    "Intent and future_notify_interest:"
-                                )
-                                # Using ChatCompletion API with gpt-4
-                                response = openai.ChatCompletion.create(
-                                    model="gpt-4",
-                                    messages=[
-                                        {"role": "system", "content": "You are a helpful assistant."},
-                                        {"role": "user", "content": prompt}
-                                    ],
-                                    max_tokens=50,
-                                    n=1,
-                                    temperature=0.5,
-                                )
-                                result = response.choices[0].message['content'].strip()
-                                return result
-                            except Exception as e:
-                                logger.error(f"OpenAI intent extraction error: {str(e)}")
-                                return ""
-
-                        intent_future = extract_intent(transcription_english)
-                        intent, future_notify_interest = "", ""
-                        if intent_future:
-                            parts = intent_future.split("\n")
-                            if len(parts) >= 2:
-                                intent = parts[0].split(":")[-1].strip()
-                                future_notify_interest = parts[1].split(":")[-1].strip()
-                            elif len(parts) == 1:
-                                intent = parts[0].split(":")[-1].strip()
-
-                        # Update call_logs with transcription and intent
-                        call_logs.update_one(
-                            {"call_sid": call_sid},
-                            {"$set": {
-                                "Transcription_Hindi": transcription_hindi,
-                                "Transcription_English": transcription_english,
-                                "Intent": intent,
-                                "future_notify_interest": future_notify_interest
-                            }}
-                        )
-                    else:
-                        logger.warning(f"Failed to fetch recording for CallSid {call_sid}")
-        else:
-            logger.warning(f"No call log found for CallSid {call_sid}")
+        # Written in the next bulk flush, and only if no later status was stored already
+        current_app.call_log_writer.update_status(call_sid, status_rank(call_status), update_fields)
+        logger.info(f"Call status updated for CallSid {call_sid}: {mapped_status}")
+
+        # Finished calls are handed to the post-call pipeline; the callback does no processing itself
+        if mapped_status in ['completed', 'not picked']:
+            current_app.post_call_pipeline.enqueue(call_sid)
+
+        # Counted last, so a callback that fails above is not counted again when Twilio retries it
+        current_app.call_rollups.record_status(call_sid, mapped_status)
 
         # Return a 204 No Content response to Twilio
         return ('', 204)
 
     except Exception as e:
-        logger.error(f"OpenAI transcription error: {str(e)}")
+        logger.error(f"Error in call_status_callback endpoint: {str(e)}")
+        # Twilio retries a failed callback; the retry must not be dropped as a duplicate
+        if recorded:
+            try:
+                current_app.status_ledger.release(call_sid, call_status, sequence_number)
+            except Exception as release_error:
+                logger.error(f"Could not release status event for CallSid {call_sid}: {str(release_error)}")
         return error_response("An internal error occurred.", 500)
     
     
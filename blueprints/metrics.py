@@ -0,0 +1,41 @@
+# blueprints/metrics.py
+
+from flask import Blueprint, Response, current_app
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+def register_runtime_metrics(app):
+    """
+    Expose queue depths, backlogs and cache counters of the app's background services.
+    Values are read when /metrics is scraped, so they cost nothing in between.
+    """
+    registry = app.metrics
+
+    registry.callback("followup_scheduler_queue_depth", "Follow-up jobs held in the scheduler heap",
+                      lambda: app.scheduler.queue_depth)
+    registry.callback("followup_jobs_pending", "Follow-up jobs waiting to fire, across all processes",
+                      app.scheduler.pending_count)
+    registry.callback("call_log_writes_pending", "Call log updates waiting in the write-behind buffer",
+                      lambda: app.call_log_writer.stats()["pending"])
+    registry.callback("call_log_write_operations_total", "Write operations issued by the call log buffer",
+                      lambda: app.call_log_writer.stats()["operations_written"], "counter")
+    registry.callback("champ_cache_hits_total", "Champ lookup cache hits",
+                      lambda: app.champ_cache.stats()["hits"], "counter")
+    registry.callback("champ_cache_misses_total", "Champ lookup cache misses",
+                      lambda: app.champ_cache.stats()["misses"], "counter")
+    registry.callback("analysis_cache_hits_total", "Transcription and intent cache hits",
+                      lambda: app.analysis_cache.stats()["hits"], "counter")
+    registry.callback("analysis_cache_misses_total", "Transcription and intent cache misses",
+                      lambda: app.analysis_cache.stats()["misses"], "counter")
+    registry.callback("status_callbacks_duplicate_total", "Redelivered status callbacks that were dropped",
+                      lambda: app.status_ledger.duplicates, "counter")
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Request latency, dependency latency and error counts, and background service gauges
+    in the Prometheus text format.
+    """
+    return Response(current_app.metrics.render(), mimetype="text/plain; version=0.0.4")
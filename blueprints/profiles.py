@@ -0,0 +1,39 @@
+# blueprints/profiles.py
+
+from flask import Blueprint, request, current_app, send_file
+
+from utils.response import success_response, error_response
+
+profiles_bp = Blueprint('profiles', __name__)
+
+
+@profiles_bp.before_request
+def require_profiler_token():
+    """
+    Profiles expose code paths and timings; only callers holding PROFILER_TOKEN may read them.
+    """
+    token = current_app.config["PROFILER_TOKEN"]
+    if not token or request.headers.get("X-Profile") != token:
+        return error_response("A valid X-Profile token is required", 403)
+
+
+@profiles_bp.route('/profiles', methods=['GET'])
+def list_profiles():
+    """
+    Recently saved request profiles, newest first.
+    '.folded' files are collapsed stacks for flamegraph.pl or speedscope;
+    '.prof' files are cProfile stats for pstats, snakeviz or flameprof.
+    """
+    profiles = current_app.profile_store.list()
+    return success_response("Profiles retrieved successfully", {"profiles": profiles, "count": len(profiles)})
+
+
+@profiles_bp.route('/profiles/<string:name>', methods=['GET'])
+def download_profile(name):
+    """
+    Download one saved profile by name.
+    """
+    path = current_app.profile_store.path(name)
+    if path is None:
+        return error_response("Profile not found", 404)
+    return send_file(path, as_attachment=True, download_name=name)
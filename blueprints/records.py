@@ -3,9 +3,14 @@
 from flask import Blueprint, request, current_app
 from bson.objectid import ObjectId
 from bson.errors import InvalidId
+from pymongo import UpdateOne, UpdateMany
+from pymongo.errors import BulkWriteError
+import base64
+import itertools
 
-from utils.response import success_response, error_response
+from utils.response import success_response, error_response, ndjson_stream_response, csv_stream_response
 from services.data_parser import DataParser
+from services.index_manager import SELECTIVE_FILTER_FIELDS
 
 records_bp = Blueprint('records', __name__)
 
@@ -25,12 +30,110 @@ ALLOWED_UPDATE_FIELDS = {
     "future-shift-interest"
 }
 
+# Fields a bulk update may select records by
+BULK_FILTER_FIELDS = ALLOWED_UPDATE_FIELDS | {"sheet_name"}
+
+
+def normalize_update_fields(data, parser=None):
+    """
+    Validate update fields against ALLOWED_UPDATE_FIELDS and normalize their values
+    the same way uploaded records are normalized.
+
+    Args:
+        data (dict): Field names mapped to new values.
+        parser (DataParser, optional): Parser to reuse across many calls.
+
+    Returns:
+        dict: Normalized fields, ready for $set.
+
+    Raises:
+        ValueError: If a field is not allowed or a date is invalid.
+    """
+    invalid_fields = set(data.keys()) - ALLOWED_UPDATE_FIELDS
+    if invalid_fields:
+        raise ValueError(f"Invalid fields for update: {', '.join(invalid_fields)}")
+
+    parser = parser or DataParser()
+    update_data = {}
+
+    for field, value in data.items():
+        if field == "Number":
+            update_data["Number"] = parser.normalize_number(str(value).strip())
+        elif field == "date":
+            update_data["date"] = parser.validate_and_normalize_date(str(value).strip())
+        elif field == "Shift Name":
+            # Normalize Shift Name by removing ' Shift' suffix if present
+            shift_name = str(value).strip()
+            if shift_name.endswith(' Shift'):
+                shift_name = shift_name.replace(' Shift', '').strip()
+            update_data["Shift Name"] = shift_name
+        elif field == "Shift Timings":
+            # Normalize Shift Timings by removing spaces around '-' and ensuring "HH:MM-HH:MM"
+            update_data["Shift Timings"] = str(value).strip().replace(' ', '')
+        else:
+            # For other fields, simply strip whitespace
+            update_data[field] = str(value).strip()
+
+    return update_data
+
+
+def encode_cursor(last_id):
+    """
+    Build the opaque next_cursor token from the _id of the last record of a page.
+    """
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """
+    Decode a next_cursor token back into an ObjectId.
+
+    Raises:
+        ValueError: If the token is malformed.
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        return ObjectId(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (InvalidId, TypeError, ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+
+# Columns of CSV exports, in order
+CSV_FIELDS = [
+    "_id", "Name", "Number", "Shift Name", "Shift Timings", "Dress Code", "Work Description",
+    "date", "sheet_name", "Recording SID", "12h follow-up", "2h follow-up", "Dress-update",
+    "future-shift-interest"
+]
+
+# Output formats that are streamed instead of returned as one JSON payload
+STREAM_FORMATS = ("ndjson", "csv")
+
+
+def stream_records(cursor, output_format, not_found_message, filename):
+    """
+    Stream the documents of a cursor as NDJSON or CSV, batch by batch as the cursor yields them.
+    Returns a 404 error if the cursor is empty.
+    """
+    cursor = cursor.batch_size(current_app.config.get("STREAM_BATCH_SIZE", 500))
+
+    # Peek at the first document so an empty result can still be a 404
+    first = next(cursor, None)
+    if first is None:
+        return error_response(not_found_message, 404)
+
+    records = itertools.chain([first], cursor)
+    if output_format == "csv":
+        return csv_stream_response(records, CSV_FIELDS, filename=filename)
+    return ndjson_stream_response(records)
+
+
 @records_bp.route('/records', methods=['GET'])
 def get_all_records():
     """
     Fetch all records from the champ_details collection.
     Optional Query Parameters:
-        - page: Page number for pagination (default: 1)
+        - cursor: next_cursor token from the previous page (keyset pagination on _id)
+        - page: Page number for offset pagination (deprecated, slows down on deep pages)
         - per_page: Number of records per page (default: 20)
         - sheet_name: Filter by sheet_name
         - work_description: Filter by Work Description
@@ -40,10 +143,13 @@ def get_all_records():
         collection = mongo.db.champ_details
         
         # Fetch query parameters for filtering and pagination
-        page = int(request.args.get('page', 1))
+        page = request.args.get('page')
         per_page = int(request.args.get('per_page', 20))
+        cursor_token = request.args.get('cursor')
         sheet_name = request.args.get('sheet_name')
         work_description = request.args.get('work_description')
+        if per_page < 1:
+            raise ValueError("per_page must be positive")
         
         query = {}
         if sheet_name:
@@ -51,22 +157,38 @@ def get_all_records():
         if work_description:
             query['Work Description'] = work_description
         
-        # Calculate pagination
-        skip = (page - 1) * per_page
-        cursor = collection.find(query).skip(skip).limit(per_page)
+        if page is not None and not cursor_token:
+            # Legacy offset pagination
+            page = int(page)
+            skip = (page - 1) * per_page
+            cursor = collection.find(query).sort('_id', 1).skip(skip).limit(per_page + 1)
+        else:
+            # Keyset pagination: resume right after the last _id of the previous page
+            if cursor_token:
+                query['_id'] = {'$gt': decode_cursor(cursor_token)}
+            cursor = collection.find(query).sort('_id', 1).limit(per_page + 1)
         
         records = []
         for record in cursor:
             record['_id'] = str(record['_id'])  # Convert ObjectId to string
             records.append(record)
         
+        # The extra record only tells whether another page exists
+        has_more = len(records) > per_page
+        records = records[:per_page]
+        next_cursor = encode_cursor(records[-1]['_id']) if has_more else None
+        
+        data = {
+            "per_page": per_page,
+            "next_cursor": next_cursor,
+            "records": records
+        }
+        if page is not None and not cursor_token:
+            data["page"] = page
+        
         return success_response(
             message="Records fetched successfully",
-            data={
-                "page": page,
-                "per_page": per_page,
-                "records": records
-            },
+            data=data,
             status=200
         )
     except ValueError:
@@ -100,6 +222,8 @@ def get_record_by_name(name):
 def get_records_by_sheet(sheet_name):
     """
     Fetch all records associated with a specific sheet_name.
+    Optional Query Parameters:
+        - format: 'json' (default), or 'ndjson' / 'csv' to stream records as the cursor yields them
     """
     try:
         mongo = current_app.mongo
@@ -107,6 +231,10 @@ def get_records_by_sheet(sheet_name):
         
         cursor = collection.find({"sheet_name": sheet_name})
         
+        output_format = request.args.get('format', 'json').lower()
+        if output_format in STREAM_FORMATS:
+            return stream_records(cursor, output_format, "No records found for the specified sheet_name", f"{sheet_name}.{output_format}")
+        
         records = []
         for record in cursor:
             record['_id'] = str(record['_id'])  # Convert ObjectId to string
@@ -127,6 +255,8 @@ def get_records_by_sheet(sheet_name):
 def get_records_by_work_description(work_description):
     """
     Fetch all records matching the provided Work Description.
+    Optional Query Parameters:
+        - format: 'json' (default), or 'ndjson' / 'csv' to stream records as the cursor yields them
     """
     try:
         mongo = current_app.mongo
@@ -134,6 +264,10 @@ def get_records_by_work_description(work_description):
         
         cursor = collection.find({"Work Description": work_description})
         
+        output_format = request.args.get('format', 'json').lower()
+        if output_format in STREAM_FORMATS:
+            return stream_records(cursor, output_format, "No records found for the specified Work Description", f"{work_description}.{output_format}")
+        
         records = []
         for record in cursor:
             record['_id'] = str(record['_id'])  # Convert ObjectId to string
@@ -176,40 +310,11 @@ def update_record(name=None, record_id=None):
         else:
             return error_response("Invalid request parameters", 400)
         
-        # Validate the fields to be updated
-        invalid_fields = set(data.keys()) - ALLOWED_UPDATE_FIELDS
-        if invalid_fields:
-            return error_response(f"Invalid fields for update: {', '.join(invalid_fields)}", 400)
-        
-        # Initialize DataParser for normalization
-        parser = DataParser()
-        
-        # Prepare the update data
-        update_data = {}
-        
-        for field, value in data.items():
-            if field == "Number":
-                normalized_number = parser.normalize_number(str(value).strip())
-                update_data["Number"] = normalized_number
-            elif field == "date":
-                try:
-                    normalized_date = parser.validate_and_normalize_date(str(value).strip())
-                    update_data["date"] = normalized_date
-                except ValueError as ve:
-                    return error_response(str(ve), 400)
-            elif field == "Shift Name":
-                # Normalize Shift Name by removing ' Shift' suffix if present
-                shift_name = str(value).strip()
-                if shift_name.endswith(' Shift'):
-                    shift_name = shift_name.replace(' Shift', '').strip()
-                update_data["Shift Name"] = shift_name
-            elif field == "Shift Timings":
-                # Normalize Shift Timings by removing spaces around '-' and ensuring "HH:MM-HH:MM"
-                shift_timings = str(value).strip().replace(' ', '')
-                update_data["Shift Timings"] = shift_timings
-            else:
-                # For other fields, simply strip whitespace
-                update_data[field] = str(value).strip()
+        # Validate and normalize the fields to be updated
+        try:
+            update_data = normalize_update_fields(data)
+        except ValueError as ve:
+            return error_response(str(ve), 400)
         
         # Perform the update
         mongo = current_app.mongo
@@ -227,17 +332,149 @@ def update_record(name=None, record_id=None):
             
             # Replace the document
             collection.replace_one(query, updated_document)
+            current_app.champ_cache.invalidate_record(existing_record["_id"])
             return success_response("Record successfully updated", status=200)
         else:
             # For PATCH, apply partial updates using $set
-            result = collection.update_one(query, {"$set": update_data})
-            if result.matched_count == 0:
+            previous = collection.find_one_and_update(query, {"$set": update_data}, projection={"_id": 1})
+            if previous is None:
                 return error_response("Record not found", 404)
+            current_app.champ_cache.invalidate_record(previous["_id"])
             return success_response("Record successfully updated", status=200)
     
     except Exception as e:
         return error_response(f"An error occurred: {str(e)}", 500)
 
+@records_bp.route('/records/bulk', methods=['PATCH'])
+def bulk_update_records():
+    """
+    Apply many partial updates with a single unordered bulk write.
+    Accepts either:
+        - a list of {"id": <record _id>, "fields": {...}} objects, as the JSON body or under "updates"
+        - {"filter": {<field>: <value>, ...}, "$set": {...}} to update every matching record;
+          the filter must include one of SELECTIVE_FILTER_FIELDS
+    Fields are validated and normalized exactly as in PATCH /records/id/<record_id>.
+    """
+    try:
+        data = request.get_json(silent=True)
+        if not data:
+            return error_response("No data provided for update", 400)
+
+        collection = current_app.mongo.db.champ_details
+        parser = DataParser()
+
+        if isinstance(data, dict) and "filter" in data:
+            return _bulk_update_by_filter(collection, parser, data.get("filter"), data.get("$set"))
+
+        updates = data.get("updates") if isinstance(data, dict) else data
+        if not isinstance(updates, list) or not updates:
+            return error_response("Provide a list of updates or a filter with $set", 400)
+        max_items = current_app.config.get("BULK_UPDATE_MAX_ITEMS", 1000)
+        if len(updates) > max_items:
+            return error_response(f"Too many updates in one request (maximum {max_items})", 400)
+
+        # Validate every item up front; invalid items are reported and skipped
+        results = []
+        valid = []
+        for index, item in enumerate(updates):
+            result = {"index": index, "id": item.get("id") if isinstance(item, dict) else None}
+            results.append(result)
+            try:
+                if not isinstance(item, dict) or not isinstance(item.get("fields"), dict) or not item["fields"]:
+                    raise ValueError("Each update needs an id and a non-empty fields object")
+                try:
+                    obj_id = ObjectId(item.get("id"))
+                except (InvalidId, TypeError):
+                    raise ValueError("Invalid record ID format")
+                valid.append((result, obj_id, normalize_update_fields(item["fields"], parser)))
+            except ValueError as ve:
+                result.update({"status": "invalid", "error": str(ve)})
+
+        # One lookup tells which of the ids exist, so missing records are reported per item
+        existing_ids = set()
+        if valid:
+            existing_ids = {
+                record["_id"] for record in
+                collection.find({"_id": {"$in": [obj_id for _, obj_id, _ in valid]}}, {"_id": 1})
+            }
+
+        operations = []
+        written = []
+        for result, obj_id, update_data in valid:
+            if obj_id not in existing_ids:
+                result.update({"status": "not_found", "error": "Record not found"})
+                continue
+            result["status"] = "updated"
+            operations.append(UpdateOne({"_id": obj_id}, {"$set": update_data}))
+            written.append((result, obj_id))
+
+        matched_count = modified_count = 0
+        if operations:
+            try:
+                bulk_result = collection.bulk_write(operations, ordered=False)
+                matched_count, modified_count = bulk_result.matched_count, bulk_result.modified_count
+            except BulkWriteError as bwe:
+                matched_count = bwe.details.get("nMatched", 0)
+                modified_count = bwe.details.get("nModified", 0)
+                for error in bwe.details.get("writeErrors", []):
+                    written[error["index"]][0].update({"status": "failed", "error": error.get("errmsg", "Write failed")})
+
+        for result, obj_id in written:
+            current_app.champ_cache.invalidate_record(obj_id)
+
+        return success_response(
+            message="Bulk update processed",
+            data={
+                "matched_count": matched_count,
+                "modified_count": modified_count,
+                "results": results
+            },
+            status=200
+        )
+
+    except Exception as e:
+        return error_response(f"An error occurred: {str(e)}", 500)
+
+
+def _bulk_update_by_filter(collection, parser, query, fields):
+    """
+    Apply one normalized $set to every record matching a filter of plain field values.
+    """
+    if not isinstance(query, dict) or not query:
+        return error_response("filter must be a non-empty object", 400)
+    if not isinstance(fields, dict) or not fields:
+        return error_response("$set must be a non-empty object", 400)
+
+    invalid_filter_fields = set(query.keys()) - BULK_FILTER_FIELDS
+    if invalid_filter_fields:
+        return error_response(f"Invalid fields for filter: {', '.join(invalid_filter_fields)}", 400)
+    # Plain values only, so a filter cannot smuggle in query operators
+    if any(isinstance(value, (dict, list)) for value in query.values()):
+        return error_response("filter values must be plain values", 400)
+    if not set(query) & set(SELECTIVE_FILTER_FIELDS):
+        return error_response(f"filter must include one of: {', '.join(SELECTIVE_FILTER_FIELDS)}", 400)
+
+    try:
+        update_data = normalize_update_fields(fields, parser)
+    except ValueError as ve:
+        return error_response(str(ve), 400)
+
+    bulk_result = collection.bulk_write([UpdateMany(query, {"$set": update_data})], ordered=False)
+
+    if bulk_result.modified_count:
+        # The affected records are not known individually; dropping the cache is cheaper than looking them up
+        current_app.champ_cache.clear()
+
+    return success_response(
+        message="Bulk update processed",
+        data={
+            "matched_count": bulk_result.matched_count,
+            "modified_count": bulk_result.modified_count
+        },
+        status=200
+    )
+
+
 @records_bp.route('/records/id/<string:record_id>', methods=['DELETE'])
 def delete_record_by_id(record_id):
     """
@@ -258,6 +495,7 @@ def delete_record_by_id(record_id):
     result = collection.delete_one({"_id": obj_id})
 
     if result.deleted_count == 1:
+        current_app.champ_cache.invalidate_record(obj_id)
         return success_response("Record successfully deleted", status=200)
     else:
         return error_response("Record not found", 404)
@@ -279,6 +517,8 @@ def delete_records_by_sheet_id(sheet_name):
         deleted_count = result.deleted_count
 
         if deleted_count > 0:
+            # A whole sheet is gone; dropping the cache is cheaper than tracking its entries
+            current_app.champ_cache.clear()
             return success_response(f"Records successfully deleted. Total records deleted: {deleted_count}", status=200)
         else:
             return error_response("No records found for the specified sheet_name", 404)
@@ -0,0 +1,73 @@
+# blueprints/stats.py
+
+from flask import Blueprint, request, current_app
+
+from services.call_rollups import ROLLUP_STATUSES, ROLLUP_INTENTS
+from utils.response import success_response, error_response
+
+stats_bp = Blueprint('stats', __name__)
+
+
+def _format_group(rollup):
+    """
+    Shape a call_rollups document for the response, with every counter present.
+    """
+    status = rollup.get("status", {})
+    intent = rollup.get("intent", {})
+    return {
+        "sheet_name": rollup.get("sheet_name", ""),
+        "call_date": rollup.get("call_date", ""),
+        "work_description": rollup.get("work_description", ""),
+        "calls": rollup.get("calls", 0),
+        "status": {name: status.get(name, 0) for name in ROLLUP_STATUSES},
+        "intent": {name: intent.get(name, 0) for name in ROLLUP_INTENTS}
+    }
+
+
+@stats_bp.route('/stats', methods=['GET'])
+def get_stats():
+    """
+    Call outcome counts per sheet, call date and Work Description, read from the call_rollups collection.
+    Optional Query Parameters:
+        - sheet_name: Filter by sheet_name
+        - work_description: Filter by Work Description
+        - date: Call date (YYYY-MM-DD)
+        - date_from / date_to: Inclusive call date range (YYYY-MM-DD)
+    """
+    try:
+        query = {}
+        if request.args.get('sheet_name'):
+            query['sheet_name'] = request.args['sheet_name']
+        if request.args.get('work_description'):
+            query['work_description'] = request.args['work_description']
+
+        date = request.args.get('date')
+        date_from = request.args.get('date_from')
+        date_to = request.args.get('date_to')
+        if date:
+            query['call_date'] = date
+        elif date_from or date_to:
+            query['call_date'] = {}
+            if date_from:
+                query['call_date']['$gte'] = date_from
+            if date_to:
+                query['call_date']['$lte'] = date_to
+
+        cursor = current_app.mongo.db.call_rollups.find(query, {"_id": 0}).sort(
+            [("call_date", 1), ("sheet_name", 1), ("work_description", 1)]
+        )
+
+        groups = [_format_group(rollup) for rollup in cursor]
+        totals = {
+            "calls": sum(group["calls"] for group in groups),
+            "status": {name: sum(group["status"][name] for group in groups) for name in ROLLUP_STATUSES},
+            "intent": {name: sum(group["intent"][name] for group in groups) for name in ROLLUP_INTENTS}
+        }
+
+        return success_response(
+            message="Stats fetched successfully",
+            data={"groups": groups, "totals": totals},
+            status=200
+        )
+    except Exception as e:
+        return error_response(f"An error occurred: {str(e)}", 500)
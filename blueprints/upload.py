@@ -2,22 +2,25 @@
 
 from flask import Blueprint, request, current_app
 from werkzeug.utils import secure_filename
+from werkzeug.exceptions import RequestEntityTooLarge
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 
 from services.data_parser import DataParser
+from services.call_service import CallService
 from utils.response import success_response, error_response
+from utils.metrics import track_dependency
 
-import io
-import threading
-import time
-import requests
+from utils.shift_time import IST, shift_start_datetime
+
+import logging
+import os
+import tempfile
 from datetime import datetime, timedelta
-import pytz
-from bson.objectid import ObjectId
 
 upload_bp = Blueprint('upload', __name__)
 
-# IST Timezone
-IST = pytz.timezone('Asia/Kolkata')
+logger = logging.getLogger(__name__)
 
 
 def allowed_file(filename, allowed_extensions):
@@ -28,72 +31,273 @@ def allowed_file(filename, allowed_extensions):
            filename.rsplit('.', 1)[1].lower() in allowed_extensions
 
 
-def extract_shift_start_time(shift_time):
+# Follow-up calls placed before each shift starts
+FOLLOWUP_OFFSETS = [
+    ('1st follow-up', timedelta(hours=00, minutes=36, seconds=00)),
+    ('2nd follow-up', timedelta(hours=00, minutes=34, seconds=35)),
+]
+
+
+def build_followup_jobs(record_id, shift_datetime_ist):
     """
-    Extract the start time from the shift time.
-    Example input: "12:00-14:00", return "12:00"
+    Build the follow-up jobs for the given record, one per entry in FOLLOWUP_OFFSETS.
+    Follow-ups that are already in the past are skipped, and each follow-up is
+    kept at least 1 second after the previous one.
+
+    Returns:
+        list: List of (record_id, followup_type, run_at) tuples for the scheduler.
     """
-    return shift_time.split('-')[0].strip()  # Extract "12:00"
+    now_ist = datetime.now(IST)
+    jobs = []
+    previous_run_at = None
+
+    for followup_type, offset in FOLLOWUP_OFFSETS:
+        run_at = shift_datetime_ist - offset
+        if previous_run_at and run_at <= previous_run_at:
+            run_at = previous_run_at + timedelta(seconds=1)
+
+        if run_at > now_ist:
+            jobs.append((record_id, followup_type, run_at))
+            previous_run_at = run_at
+            logger.info(f"{followup_type} call for record {record_id} scheduled at {run_at}.")
+        else:
+            logger.info(f"{followup_type} call for record {record_id} is in the past and won't be scheduled.")
+
+    return jobs
 
 
-def schedule_api_requests(record_id, shift_datetime_ist):
+def send_followup_call(record_id, followup_type):
     """
-    Schedule two API requests for the given record:
-    1. 12 hours, 1 minute, and 30 seconds before the shift time.
-    2. 2 hours, 14 minutes, and 35 seconds before the shift time.
+    Place a follow-up call for the record. Called by the follow-up scheduler
+    inside an application context; errors propagate so the job is marked failed.
     """
-    now_ist = datetime.now(IST)
+    logger.info(f"Placing {followup_type} call for record {record_id}")
+    # Follow-ups share the account-wide calls-per-second quota with bulk dialing
+    current_app.call_rate_limiter.acquire()
+    call_sid = CallService().initiate_call_for_record(record_id, followup_type=followup_type)
+    logger.info(f"{followup_type} call for record {record_id} initiated with CallSid {call_sid}.")
 
-    # Calculate times for the API requests
-    time_before_shift_1 = shift_datetime_ist - timedelta(hours=00, minutes=36, seconds=00)
-    time_before_shift_2 = shift_datetime_ist - timedelta(hours=00, minutes=34, seconds=35)
-
-    # Convert times to seconds for delay calculations
-    delay_for_first_call = (time_before_shift_1 - now_ist).total_seconds()
-    delay_for_second_call = (time_before_shift_2 - now_ist).total_seconds()
-
-    # Function to send POST request with 1-second gap
-    def send_post_with_gap(record_id, followup_type, delay, previous_delay=0):
-        if delay > 0:
-            # Introduce a cumulative delay based on previous calls
-            cumulative_delay = delay + previous_delay
-            threading.Timer(cumulative_delay, send_post_request, args=[record_id, followup_type]).start()
-            print(f"{followup_type} POST API request for record {record_id} scheduled in {cumulative_delay} seconds.")
-            return cumulative_delay + 1  # Adding 1 second gap for the next call
-        else:
-            print(f"{followup_type} POST API request for record {record_id} is in the past and won't be scheduled.")
-            return previous_delay
 
-    # Initialize previous_delay to 0
-    previous_delay = 0
+REQUIRED_FIELDS = [
+    'Name', 'Number', 'Shift Name', 'Shift Timings',
+    'Dress Code', 'Work Description', 'date'
+]
+
+
+# Natural key of a champ_details record; backed by a unique index. Shift Timings is
+# not part of it, so a corrected shift time updates the record instead of adding one.
+# A champ therefore holds one shift per date and sheet; see reject_key_collisions
+NATURAL_KEY_FIELDS = ('Number', 'date', 'sheet_name')
+
+# Rejected rows listed in the upload response; the count covers all of them
+MAX_REPORTED_REJECTIONS = 100
+
+# Fields tracked per record after upload; set on insert, never overwritten by a re-upload
+DEFAULT_FIELDS = {
+    "Recording SID": "",
+    "12h follow-up": "",
+    "2h follow-up": "",
+    "Dress-update": "",
+    "future-shift-interest": ""
+}
 
-    # Schedule the first API call
-    previous_delay = send_post_with_gap(record_id, '1st follow-up', delay_for_first_call, previous_delay)
 
-    # Schedule the second API call with a 1-second gap
-    previous_delay = send_post_with_gap(record_id, '2nd follow-up', delay_for_second_call, previous_delay)
+def reject_key_collisions(records, seen_keys):
+    """
+    Split off the records whose natural key already appeared earlier in the upload.
+
+    The natural key can't hold two shifts of one champ on the same date and
+    sheet: a second row would overwrite the first in 'upsert' mode and be
+    dropped by the unique index in 'insert' mode. The first row is kept and
+    every later one is rejected, so the caller can report it.
 
+    Args:
+        records (list): Normalized records from DataParser.
+        seen_keys (set): Natural keys of the upload's earlier records; updated in place.
 
-def send_post_request(record_id, followup_type):
+    Returns:
+        tuple: (accepted records, rejected rows as dicts naming the key and shift)
     """
-    Sends a POST request to `calls.py` to initiate the call.
+    accepted, rejected = [], []
+    for record in records:
+        key = tuple(record.get(field) for field in NATURAL_KEY_FIELDS)
+        if key in seen_keys:
+            rejected.append({
+                **{field: record.get(field) for field in NATURAL_KEY_FIELDS},
+                "Shift Timings": record.get("Shift Timings"),
+                "reason": "Another row of this upload has the same Number, date and sheet; "
+                          "a champ can hold one shift per date and sheet"
+            })
+            continue
+        seen_keys.add(key)
+        accepted.append(record)
+    return accepted, rejected
+
+
+def schedule_followups(records, record_ids):
     """
-    print(f"Sending {followup_type} POST API request for record {record_id}")
-    url = f"http://localhost:5000/make_call/{record_id}"
-    try:
-        response = requests.post(url)
-        if response.status_code == 200:
-            print(f"{followup_type} POST API request for record {record_id} successful.")
+    Build and persist the follow-up jobs of newly stored records.
+
+    Args:
+        records (list): Stored records.
+        record_ids (list): Their ObjectIds, in the same order.
+    """
+    followup_jobs = []
+    for record, inserted_id in zip(records, record_ids):
+        shift_date = record.get("date")  # Assuming 'date' is stored as "YYYY-MM-DD"
+        shift_time = record.get("Shift Timings")  # Shift time, e.g., "12:00-14:00"
+        record_id = str(inserted_id)
+
+        if shift_date and shift_time:
+            try:
+                shift_datetime_ist = shift_start_datetime(shift_date, shift_time)
+                followup_jobs.extend(build_followup_jobs(record_id, shift_datetime_ist))
+
+            except Exception as e:
+                logger.error(f"Error scheduling API calls for record {record_id}: {str(e)}")
         else:
-            print(f"Error: {followup_type} POST API request for record {record_id} failed with status code {response.status_code}")
-    except Exception as e:
-        print(f"Error sending {followup_type} POST API request for record {record_id}: {str(e)}")
+            logger.warning(f"Invalid shift date or time for record {record_id}")
+
+    # Persist all follow-ups with one insert; the scheduler fires them
+    current_app.scheduler.schedule_many(followup_jobs)
+
+
+def insert_records(records):
+    """
+    Insert a batch of normalized records and schedule their follow-up calls.
+    Records whose natural key is already stored are left untouched by the
+    unique index and counted as unchanged.
+
+    Args:
+        records (list): Normalized records from DataParser.
+
+    Returns:
+        dict: inserted/updated/unchanged counts and the inserted ObjectIds.
+    """
+    collection = current_app.mongo.db.champ_details
+    current_app.champ_cache.invalidate_numbers({record["Number"] for record in records})
+
+    # Enhance each record with default fields
+    for record in records:
+        record.update(DEFAULT_FIELDS)
+
+    try:
+        collection.insert_many(records, ordered=False)
+        duplicates = set()
+    except BulkWriteError as bwe:
+        # Rows already stored violate the natural-key index and are skipped
+        write_errors = bwe.details.get("writeErrors", [])
+        if any(error.get("code") != 11000 for error in write_errors):
+            raise
+        duplicates = {error["index"] for error in write_errors}
+
+    # insert_many sets _id on every record it was given
+    inserted = [record for index, record in enumerate(records) if index not in duplicates]
+    inserted_ids = [record["_id"] for record in inserted]
+
+    schedule_followups(inserted, inserted_ids)
+    return {"inserted": len(inserted_ids), "updated": 0, "unchanged": len(duplicates), "inserted_ids": inserted_ids}
+
+
+def upsert_records(records):
+    """
+    Upsert a batch of normalized records on their natural key with one bulk_write.
+    Records that didn't exist yet get follow-up calls scheduled. An existing
+    record whose Shift Timings changed has its pending follow-ups cancelled and
+    rescheduled for the new shift time; any other existing record keeps its
+    follow-ups, so re-uploading a corrected sheet never dials the same champ twice.
+
+    Args:
+        records (list): Normalized records from DataParser, with distinct natural
+            keys; upload_file drops collisions with reject_key_collisions first.
+
+    Returns:
+        dict: inserted/updated/unchanged counts and the inserted ObjectIds.
+    """
+    collection = current_app.mongo.db.champ_details
+    current_app.champ_cache.invalidate_numbers({record["Number"] for record in records})
+
+    # Shift timings stored for the records that already exist, to tell which shifts moved
+    stored_timings = {}
+    if records:
+        cursor = collection.find(
+            {field: {"$in": list({record.get(field) for record in records})} for field in NATURAL_KEY_FIELDS},
+            {field: 1 for field in NATURAL_KEY_FIELDS + ("Shift Timings",)}
+        )
+        for stored in cursor:
+            key = tuple(stored.get(field) for field in NATURAL_KEY_FIELDS)
+            stored_timings[key] = (stored["_id"], stored.get("Shift Timings"))
+
+    operations = []
+    for record in records:
+        key = {field: record.get(field) for field in NATURAL_KEY_FIELDS}
+        fields = {field: value for field, value in record.items() if field not in DEFAULT_FIELDS}
+        operations.append(UpdateOne(key, {"$set": fields, "$setOnInsert": DEFAULT_FIELDS}, upsert=True))
+
+    result = collection.bulk_write(operations, ordered=False)
+
+    # upserted_ids maps operation index to the new document's _id
+    new_indexes = sorted(result.upserted_ids)
+    inserted_ids = [result.upserted_ids[index] for index in new_indexes]
+
+    # Moved shifts: the old follow-ups would call at the wrong time, so they are replaced
+    moved_records, moved_ids = [], []
+    for record in records:
+        stored = stored_timings.get(tuple(record.get(field) for field in NATURAL_KEY_FIELDS))
+        if stored and stored[1] != record.get("Shift Timings"):
+            current_app.scheduler.cancel_for_record(str(stored[0]))
+            moved_records.append(record)
+            moved_ids.append(stored[0])
+    if moved_records:
+        logger.info(f"Rescheduling follow-ups of {len(moved_records)} records whose shift time changed")
+
+    schedule_followups([records[index] for index in new_indexes] + moved_records, inserted_ids + moved_ids)
+
+    return {
+        "inserted": result.upserted_count,
+        "updated": result.modified_count,
+        "unchanged": result.matched_count - result.modified_count,
+        "inserted_ids": inserted_ids
+    }
+
+
+def timed_chunks(chunks, parse_mode):
+    """
+    Yield from a chunk iterator, timing how long each chunk takes to parse.
+    """
+    iterator = iter(chunks)
+    while True:
+        with track_dependency("parser", parse_mode):
+            records = next(iterator, None)
+        if records is None:
+            return
+        yield records
+
+
+@upload_bp.app_errorhandler(RequestEntityTooLarge)
+def upload_too_large(e):
+    max_bytes = current_app.config.get("MAX_CONTENT_LENGTH")
+    return error_response(f"File exceeds the maximum upload size of {max_bytes // (1024 * 1024)} MB", 413)
 
 
 @upload_bp.route('/upload', methods=['POST'])
 def upload_file():
     """
     Endpoint to upload Excel files, parse them, store data in MongoDB, and schedule follow-up API calls.
+
+    With UPLOAD_PARSE_MODE 'streaming' (default) the upload is spooled to a
+    temporary file and inserted in chunks of UPLOAD_CHUNK_SIZE records as it is
+    parsed. With 'dataframe' the whole workbook is parsed in memory first, and
+    with 'parallel' the sheets of workbooks with at least PARSE_PARALLEL_MIN_ROWS
+    rows are parsed in the app's pool of PARSE_WORKERS processes.
+
+    Records are keyed on (Number, date, sheet_name), backed by a unique index.
+    With UPLOAD_WRITE_MODE 'upsert' (default) re-uploading a sheet updates
+    existing champs instead of duplicating them, including a changed Shift
+    Timings; with 'insert' only new keys are stored and existing records are
+    counted as unchanged. Since a champ holds one shift per date and sheet, a
+    row repeating an earlier row's key is not stored and is reported under
+    rejected_rows instead.
     """
     if 'file' not in request.files:
         return error_response("No file part in the request", 400)
@@ -108,64 +312,64 @@ def upload_file():
         allowed = ', '.join(allowed_extensions)
         return error_response(f"Allowed file types are {allowed}", 400)
 
+    extension = file.filename.rsplit('.', 1)[1].lower()
+    spool = tempfile.NamedTemporaryFile(suffix=f".{extension}", delete=False)
     try:
-        # Read file content into memory
-        file_stream = io.BytesIO(file.read())
+        # Spool the upload to disk instead of holding it in memory
+        file.save(spool)
+        spool.close()
 
-        # Parse the Excel file
         data_parser = DataParser()
-        records = data_parser.parse_excel(file_stream, required_fields=[
-            'Name', 'Number', 'Shift Name', 'Shift Timings',
-            'Dress Code', 'Work Description', 'date'
-        ])
-
-        # Insert records into MongoDB
-        mongo = current_app.mongo
-        collection = mongo.db.champ_details
-
-        # Enhance each record with default fields
-        for record in records:
-            record.update({
-                "Recording SID": "",
-                "12h follow-up": "",
-                "2h follow-up": "",
-                "Dress-update": "",
-                "future-shift-interest": ""
-            })
-
-        # Insert many documents at once
-        if records:
-            insert_result = collection.insert_many(records)
-            inserted_ids = insert_result.inserted_ids  # List of ObjectIds
-
-            # For each inserted record, schedule follow-up API requests
-            for record, inserted_id in zip(records, inserted_ids):
-                shift_date = record.get("date")  # Assuming 'date' is stored as "YYYY-MM-DD"
-                shift_time = record.get("Shift Timings")  # Shift time, e.g., "12:00-14:00"
-                record_id = str(inserted_id)
-
-                if shift_date and shift_time:
-                    try:
-                        shift_start_time = extract_shift_start_time(shift_time)
-                        shift_datetime_str = f"{shift_date} {shift_start_time}"
-                        shift_datetime_ist = datetime.strptime(shift_datetime_str, '%Y-%m-%d %H:%M')
-                        shift_datetime_ist = IST.localize(shift_datetime_ist)
-
-                        # Schedule the follow-up API requests
-                        schedule_api_requests(record_id, shift_datetime_ist)
-
-                    except Exception as e:
-                        print(f"Error scheduling API calls for record {record_id}: {str(e)}")
-                else:
-                    print(f"Invalid shift date or time for record {record_id}")
-
-            # Convert ObjectIds to strings for the response
-            inserted_ids_str = [str(_id) for _id in inserted_ids]
-
+        parse_mode = current_app.config.get("UPLOAD_PARSE_MODE")
+        if parse_mode in ("dataframe", "parallel"):
+            with track_dependency("parser", parse_mode):
+                records = data_parser.parse_excel(
+                    spool.name,
+                    required_fields=REQUIRED_FIELDS,
+                    pool=current_app.parse_pool if parse_mode == "parallel" else None,
+                    min_parallel_rows=current_app.config.get("PARSE_PARALLEL_MIN_ROWS", 0)
+                )
+            chunk_size = current_app.config.get("UPLOAD_CHUNK_SIZE", 1000)
+            chunks = (records[start:start + chunk_size] for start in range(0, len(records), chunk_size))
+        else:
+            chunks = timed_chunks(data_parser.iter_excel_chunks(
+                spool.name,
+                required_fields=REQUIRED_FIELDS,
+                chunk_size=current_app.config.get("UPLOAD_CHUNK_SIZE", 1000)
+            ), "streaming")
+
+        # Store records in MongoDB chunk by chunk
+        store_records = upsert_records if current_app.config.get("UPLOAD_WRITE_MODE") == "upsert" else insert_records
+        totals = {"inserted": 0, "updated": 0, "unchanged": 0}
+        inserted_ids_str = []
+        seen_keys = set()
+        rejected_rows = []
+        rejected_count = 0
+        for records in chunks:
+            records, rejected = reject_key_collisions(records, seen_keys)
+            rejected_count += len(rejected)
+            rejected_rows.extend(rejected[:MAX_REPORTED_REJECTIONS - len(rejected_rows)])
+            if records:
+                result = store_records(records)
+                for counter in totals:
+                    totals[counter] += result[counter]
+                inserted_ids_str.extend(str(_id) for _id in result["inserted_ids"])
+
+        if rejected_count:
+            logger.warning(f"Rejected {rejected_count} uploaded rows repeating another row's Number, date and sheet")
+
+        if any(totals.values()):
             return success_response(
                 message="File successfully uploaded, data stored, and API calls scheduled.",
-                data={"inserted_ids": inserted_ids_str},
-                status=201
+                data={
+                    "inserted_count": totals["inserted"],
+                    "updated_count": totals["updated"],
+                    "unchanged_count": totals["unchanged"],
+                    "rejected_count": rejected_count,
+                    "rejected_rows": rejected_rows,
+                    "inserted_ids": inserted_ids_str
+                },
+                status=201 if totals["inserted"] else 200
             )
         else:
             return error_response("No valid records found in the file.", 400)
@@ -174,3 +378,6 @@ def upload_file():
         return error_response(str(ve), 400)
     except Exception as e:
         return error_response(f"An error occurred: {str(e)}", 500)
+    finally:
+        spool.close()
+        os.remove(spool.name)
@@ -1,6 +1,7 @@
 # config.py
 
 import os
+import tempfile
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -12,6 +13,109 @@ class Config:
     
     # MongoDB settings
     MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017/automated_calling_system')
+    # Create declared indexes at startup; optionally explain every known query shape
+    INDEX_BOOTSTRAP_ENABLED = os.getenv('INDEX_BOOTSTRAP_ENABLED', 'true').lower() == 'true'
+    INDEX_EXPLAIN_CHECK = os.getenv('INDEX_EXPLAIN_CHECK', 'false').lower() == 'true'
     
     # File upload settings
     ALLOWED_EXTENSIONS = set(os.getenv('ALLOWED_EXTENSIONS', 'xlsx,xls').split(','))
+    MAX_CONTENT_LENGTH = int(os.getenv('MAX_UPLOAD_MB', 50)) * 1024 * 1024
+    # 'streaming' inserts records in chunks while parsing, 'dataframe' parses everything first,
+    # 'parallel' parses sheets in a pool of PARSE_WORKERS processes
+    UPLOAD_PARSE_MODE = os.getenv('UPLOAD_PARSE_MODE', 'streaming')
+    PARSE_WORKERS = int(os.getenv('PARSE_WORKERS', os.cpu_count() or 1))
+    # Smaller workbooks are parsed in the request even in 'parallel' mode; the pool only pays off for large ones
+    PARSE_PARALLEL_MIN_ROWS = int(os.getenv('PARSE_PARALLEL_MIN_ROWS', 50000))
+    # Records are keyed on (Number, date, sheet_name): 'upsert' updates existing ones,
+    # 'insert' stores only new keys and leaves existing records unchanged
+    UPLOAD_WRITE_MODE = os.getenv('UPLOAD_WRITE_MODE', 'upsert')
+    UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', 1000))
+
+    # Follow-up scheduler settings
+    SCHEDULER_ENABLED = os.getenv('SCHEDULER_ENABLED', 'true').lower() == 'true'
+    SCHEDULER_LOOKAHEAD_SECONDS = int(os.getenv('SCHEDULER_LOOKAHEAD_SECONDS', 300))
+    SCHEDULER_MAX_IN_MEMORY = int(os.getenv('SCHEDULER_MAX_IN_MEMORY', 10000))
+    SCHEDULER_WORKERS = int(os.getenv('SCHEDULER_WORKERS', 4))
+    SCHEDULER_MISFIRE_GRACE_SECONDS = int(os.getenv('SCHEDULER_MISFIRE_GRACE_SECONDS', 300))
+    # Jobs left 'running' this long by a stopped process are recovered at startup
+    SCHEDULER_STALE_SECONDS = int(os.getenv('SCHEDULER_STALE_SECONDS', 600))
+
+    # Outbound call throughput: match TWILIO_CALLS_PER_SECOND to the account's CPS quota
+    TWILIO_CALLS_PER_SECOND = float(os.getenv('TWILIO_CALLS_PER_SECOND', 1))
+    TWILIO_CALLS_BURST = int(os.getenv('TWILIO_CALLS_BURST', 1))
+    # The limiter is per process; the quota is split across this many app processes
+    # (gunicorn workers), which defaults to gunicorn's own WEB_CONCURRENCY setting
+    CALL_RATE_LIMIT_PROCESSES = int(os.getenv('CALL_RATE_LIMIT_PROCESSES', os.getenv('WEB_CONCURRENCY', 1)))
+    BULK_CALL_WORKERS = int(os.getenv('BULK_CALL_WORKERS', 8))
+    # Bulk call batches left unfinished by a restart are resumed; items stuck dialing longer
+    # than BULK_CALL_STALE_SECONDS are marked failed, since their call may have been placed
+    BULK_CALL_RESUME_ENABLED = os.getenv('BULK_CALL_RESUME_ENABLED', 'true').lower() == 'true'
+    BULK_CALL_STALE_SECONDS = int(os.getenv('BULK_CALL_STALE_SECONDS', 300))
+
+    # Shared Twilio REST client: connection pool, timeouts and an offline transport
+    TWILIO_POOL_SIZE = int(os.getenv('TWILIO_POOL_SIZE', 10))
+    TWILIO_TIMEOUT_SECONDS = float(os.getenv('TWILIO_TIMEOUT_SECONDS', 10))
+    TWILIO_MAX_RETRIES = int(os.getenv('TWILIO_MAX_RETRIES', 2))
+    TWILIO_FAKE_TRANSPORT = os.getenv('TWILIO_FAKE_TRANSPORT', 'false').lower() == 'true'
+
+    # API endpoints; point them at benchmarks/simulator.py for local load tests
+    TWILIO_API_BASE = os.getenv('TWILIO_API_BASE', 'https://api.twilio.com')
+    OPENAI_API_BASE = os.getenv('OPENAI_API_BASE', 'https://api.openai.com/v1')
+
+    # Recording downloads: streamed in chunks, spilled to disk past the memory limit
+    RECORDING_MAX_MB = int(os.getenv('RECORDING_MAX_MB', 100))
+    RECORDING_MEMORY_LIMIT_KB = int(os.getenv('RECORDING_MEMORY_LIMIT_KB', 1024))
+    RECORDING_DOWNLOAD_TIMEOUT_SECONDS = float(os.getenv('RECORDING_DOWNLOAD_TIMEOUT_SECONDS', 60))
+
+    # Post-call processing (recording download, transcription, intent extraction)
+    POST_CALL_PIPELINE_ENABLED = os.getenv('POST_CALL_PIPELINE_ENABLED', 'true').lower() == 'true'
+    POST_CALL_WORKERS = int(os.getenv('POST_CALL_WORKERS', 2))
+    POST_CALL_POLL_SECONDS = int(os.getenv('POST_CALL_POLL_SECONDS', 5))
+    POST_CALL_MAX_ATTEMPTS = int(os.getenv('POST_CALL_MAX_ATTEMPTS', 3))
+    # Delay before retrying a failed post-call job or intent batch, doubled after each further failure
+    POST_CALL_RETRY_BACKOFF_SECONDS = float(os.getenv('POST_CALL_RETRY_BACKOFF_SECONDS', 30))
+    POST_CALL_STALE_SECONDS = int(os.getenv('POST_CALL_STALE_SECONDS', 600))
+
+    # Prometheus metrics at /metrics
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+
+    # Request profiling: requests carrying X-Profile: PROFILER_TOKEN, or a random PROFILER_SAMPLE_RATE
+    # share of PROFILER_ENDPOINTS (comma-separated, e.g. 'upload.upload_file'; empty means all), are
+    # profiled into a ring of PROFILER_MAX_PROFILES files listed at /profiles. Nothing is hooked when disabled.
+    PROFILER_ENABLED = os.getenv('PROFILER_ENABLED', 'false').lower() == 'true'
+    PROFILER_TOKEN = os.getenv('PROFILER_TOKEN', '')
+    PROFILER_SAMPLE_RATE = float(os.getenv('PROFILER_SAMPLE_RATE', 0))
+    PROFILER_ENDPOINTS = os.getenv('PROFILER_ENDPOINTS', '')
+    PROFILER_MODE = os.getenv('PROFILER_MODE', 'sampler')
+    PROFILER_SAMPLE_INTERVAL_MS = float(os.getenv('PROFILER_SAMPLE_INTERVAL_MS', 5))
+    PROFILER_DIR = os.getenv('PROFILER_DIR', os.path.join(tempfile.gettempdir(), 'hour4u_profiles'))
+    PROFILER_MAX_PROFILES = int(os.getenv('PROFILER_MAX_PROFILES', 50))
+
+    # Write-behind buffer for call_logs status updates
+    CALL_LOG_WRITE_BEHIND_ENABLED = os.getenv('CALL_LOG_WRITE_BEHIND_ENABLED', 'true').lower() == 'true'
+    CALL_LOG_FLUSH_INTERVAL_MS = int(os.getenv('CALL_LOG_FLUSH_INTERVAL_MS', 200))
+    CALL_LOG_FLUSH_MAX_PENDING = int(os.getenv('CALL_LOG_FLUSH_MAX_PENDING', 500))
+
+    # Transcription: 'dual' runs Hindi and English Whisper passes concurrently,
+    # 'single' runs one Hindi pass and translates it with TRANSLATION_MODEL
+    TRANSCRIPTION_MODE = os.getenv('TRANSCRIPTION_MODE', 'dual')
+    TRANSLATION_MODEL = os.getenv('TRANSLATION_MODEL', 'gpt-3.5-turbo')
+
+    # Intent extraction: transcripts are classified in batches with one request per batch
+    INTENT_MODEL = os.getenv('INTENT_MODEL', 'gpt-4')
+    INTENT_BATCH_SIZE = int(os.getenv('INTENT_BATCH_SIZE', 20))
+    INTENT_BATCH_WAIT_SECONDS = float(os.getenv('INTENT_BATCH_WAIT_SECONDS', 5))
+
+    # Cache of transcription and intent results, keyed by Recording SID and audio hash
+    ANALYSIS_CACHE_ENABLED = os.getenv('ANALYSIS_CACHE_ENABLED', 'true').lower() == 'true'
+    ANALYSIS_CACHE_TTL_DAYS = int(os.getenv('ANALYSIS_CACHE_TTL_DAYS', 30))
+
+    # Documents fetched per cursor batch when streaming NDJSON/CSV record listings
+    STREAM_BATCH_SIZE = int(os.getenv('STREAM_BATCH_SIZE', 500))
+
+    # Largest list of updates accepted by PATCH /records/bulk
+    BULK_UPDATE_MAX_ITEMS = int(os.getenv('BULK_UPDATE_MAX_ITEMS', 1000))
+
+    # In-process cache of champ details for the /voice webhook
+    CHAMP_CACHE_MAX_SIZE = int(os.getenv('CHAMP_CACHE_MAX_SIZE', 10000))
+    CHAMP_CACHE_TTL_SECONDS = int(os.getenv('CHAMP_CACHE_TTL_SECONDS', 900))
@@ -0,0 +1,145 @@
+# services/analysis_cache.py
+
+import logging
+from datetime import datetime, timedelta
+
+from pymongo import ReturnDocument, UpdateMany
+
+logger = logging.getLogger(__name__)
+
+
+class CallAnalysisCache:
+    """
+    Content-addressed cache of transcription and intent results.
+
+    Entries live in the ``analysis_cache`` collection, one per audio content
+    hash and transcription version, and list every Recording SID seen with
+    that audio. A recording processed before is found by its Recording SID
+    without downloading it, or by its SHA-256 right after download, so neither
+    Whisper nor the chat models are called again. Changing the transcription
+    mode or models changes the version and bypasses old entries. Entries
+    expire through a TTL index ``ttl_days`` after they were last used.
+    """
+
+    def __init__(self, app, ttl_days=30, enabled=True):
+        """
+        Args:
+            app (Flask): Application whose database holds the cache.
+            ttl_days (int): Days an unused entry is kept.
+            enabled (bool): When False, lookups always miss and nothing is stored.
+        """
+        self.app = app
+        self.ttl = timedelta(days=ttl_days)
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def collection(self):
+        return self.app.mongo.db.analysis_cache
+
+    def lookup(self, transcription_version, recording_sid=None, audio_sha256=None):
+        """
+        Find a cached result by Recording SID or audio hash and refresh its expiry.
+
+        When found by hash, ``recording_sid`` is remembered on the entry so the
+        next lookup can skip the download. A recording may be looked up first by
+        SID and then by hash, so lookups aren't counted here; the caller reports
+        the outcome of the whole lookup with record_lookup.
+
+        Returns:
+            dict: Cache entry, or None on a miss.
+        """
+        if not self.enabled or not (recording_sid or audio_sha256):
+            return None
+
+        if audio_sha256:
+            query = {"audio_sha256": audio_sha256}
+        else:
+            query = {"recording_sids": recording_sid}
+        query["transcription_version"] = transcription_version
+
+        update = {"$set": {"expires_at": datetime.utcnow() + self.ttl}}
+        if audio_sha256 and recording_sid:
+            update["$addToSet"] = {"recording_sids": recording_sid}
+
+        try:
+            entry = self.collection.find_one_and_update(query, update, return_document=ReturnDocument.AFTER)
+        except Exception as e:
+            logger.error(f"Error reading analysis cache: {str(e)}")
+            entry = None
+        return entry
+
+    def record_lookup(self, hit):
+        """
+        Count the outcome of one logical lookup of a recording, for the hit rate in stats.
+        """
+        if not self.enabled:
+            return
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def store_transcription(self, transcription_version, recording_sid, audio_sha256, transcription_hindi, transcription_english):
+        """
+        Cache the transcriptions of a recording.
+        """
+        if not self.enabled:
+            return
+        now = datetime.utcnow()
+        try:
+            self.collection.update_one(
+                {"audio_sha256": audio_sha256, "transcription_version": transcription_version},
+                {
+                    "$set": {
+                        "Transcription_Hindi": transcription_hindi,
+                        "Transcription_English": transcription_english,
+                        "expires_at": now + self.ttl
+                    },
+                    "$addToSet": {"recording_sids": recording_sid},
+                    "$setOnInsert": {"created_at": now}
+                },
+                upsert=True
+            )
+        except Exception as e:
+            logger.error(f"Error writing analysis cache: {str(e)}")
+
+    def store_intents(self, transcription_version, intent_model, intents):
+        """
+        Attach intent results to the cached transcriptions they were derived from.
+
+        Args:
+            transcription_version (str): Version the transcriptions were produced with.
+            intent_model (str): Model that classified the intents.
+            intents (dict): {recording_sid: {"intent": ..., "future_notify_interest": ...}}
+        """
+        if not self.enabled or not intents:
+            return
+        operations = [
+            UpdateMany(
+                {"recording_sids": recording_sid, "transcription_version": transcription_version},
+                {"$set": {
+                    "Intent": result["intent"],
+                    "future_notify_interest": result["future_notify_interest"],
+                    "intent_model": intent_model
+                }}
+            )
+            for recording_sid, result in intents.items()
+        ]
+        try:
+            self.collection.bulk_write(operations, ordered=False)
+        except Exception as e:
+            logger.error(f"Error writing intents to analysis cache: {str(e)}")
+
+    @staticmethod
+    def cached_intent(entry, intent_model):
+        """
+        Intent fields of an entry if they were produced by ``intent_model``, else None.
+        """
+        if entry and entry.get("intent_model") == intent_model and "Intent" in entry:
+            return {"Intent": entry["Intent"], "future_notify_interest": entry.get("future_notify_interest", "")}
+        return None
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
@@ -0,0 +1,346 @@
+# services/bulk_call_service.py
+
+import atexit
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+from bson.objectid import ObjectId
+from bson.errors import InvalidId
+from pymongo import ASCENDING, ReturnDocument
+
+from services.call_service import CallService
+from utils.shift_time import shift_start_datetime
+
+logger = logging.getLogger(__name__)
+
+# champ_details fields read when a batch is created; the full record is fetched only when it is dialed
+BATCH_RECORD_FIELDS = {"_id": 1, "date": 1, "Shift Timings": 1}
+
+# Items are inserted in chunks so a batch over a large sheet never sits in memory at once
+BATCH_INSERT_CHUNK = 1000
+
+
+class BulkCallService:
+    """
+    Dials many champ_details records as one batch.
+
+    Every record of a batch is stored as an item in the call_batch_items
+    collection, carrying its shift start as priority, so the champs whose shift
+    starts soonest are dialed first. A fixed pool of worker threads claims
+    pending items atomically, and every call takes a token from the app's
+    rate limiter, which holds this process's share of the Twilio
+    calls-per-second quota.
+    Shifts that have already started are skipped. Batch progress is kept in the
+    call_batches collection, and unfinished batches are resumed at startup.
+    """
+
+    def __init__(self, app, rate_limiter, workers=8, poll_seconds=5, stale_seconds=300):
+        """
+        Args:
+            app (Flask): Application whose context the workers run in.
+            rate_limiter (TokenBucket): Limiter holding this process's share of the Twilio CPS quota.
+            workers (int): Number of dialing threads.
+            poll_seconds (int): How often idle workers look for items queued by other processes.
+            stale_seconds (int): Age after which an item left in 'dialing' is considered abandoned.
+        """
+        self.app = app
+        self.rate_limiter = rate_limiter
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self.stale_after = timedelta(seconds=stale_seconds)
+
+        self._condition = threading.Condition()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._stopped = False
+
+    @property
+    def collection(self):
+        return self.app.mongo.db.call_batches
+
+    @property
+    def items(self):
+        return self.app.mongo.db.call_batch_items
+
+    def start(self):
+        """
+        Settle batches a previous process left unfinished, and resume dialing their pending items.
+
+        Items abandoned in 'dialing' are marked as failed rather than dialed again,
+        because their call may already have been placed.
+        """
+        abandoned = list(self.items.find(
+            {"status": "dialing", "claimed_at": {"$lt": datetime.utcnow() - self.stale_after}},
+            {"batch_id": 1, "record_id": 1}
+        ))
+        for item in abandoned:
+            error = "Interrupted while dialing; the call may have been placed"
+            if self._finish_item(item, "failed", error):
+                self._record_result(item["batch_id"], {"failed": 1}, {"record_id": str(item["record_id"]), "error": error})
+        if abandoned:
+            logger.warning(f"Marked {len(abandoned)} abandoned bulk call items as failed")
+
+        # Leave batches another process is still filling; one that stopped filling long ago was interrupted
+        filled = {"$or": [{"filling": {"$ne": True}}, {"filled_at": {"$lt": datetime.utcnow() - self.stale_after}}]}
+        for batch in self.collection.find({"status": "running", **filled}, {"_id": 1}):
+            if self.items.count_documents({"batch_id": batch["_id"], "status": {"$in": ["pending", "dialing"]}}, limit=1):
+                continue
+            self._settle_batch(batch["_id"])
+
+        if self.items.count_documents({"status": "pending"}, limit=1):
+            logger.info("Resuming unfinished bulk call batches")
+            self._ensure_workers()
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+
+    def start_batch(self, query, description=None):
+        """
+        Queue a call for every champ_details record matching the query.
+
+        Only the id and shift of each record are read here; records whose shift
+        has already started are counted as skipped.
+
+        Args:
+            query (dict): MongoDB filter on champ_details.
+            description (dict, optional): Filter as given by the client, stored on the batch.
+
+        Returns:
+            dict: The batch document, or None if no record matched.
+        """
+        batch = None
+        # Epoch seconds, like the priorities; utcnow().timestamp() would read UTC as local time
+        now = time.time()
+        chunk = []
+        cursor = self.app.mongo.db.champ_details.find(query, BATCH_RECORD_FIELDS)
+        for record in cursor:
+            if batch is None:
+                batch = self._create_batch(query, description)
+            priority = self._priority(record)
+            chunk.append({
+                "batch_id": batch["_id"],
+                "record_id": record["_id"],
+                "priority": priority,
+                "status": "skipped" if priority <= now else "pending",
+                "created_at": datetime.utcnow()
+            })
+            if len(chunk) >= BATCH_INSERT_CHUNK:
+                self._add_items(batch, chunk)
+                chunk = []
+
+        if batch is None:
+            return None
+        if chunk:
+            self._add_items(batch, chunk)
+
+        # Workers may have finished every item already, and left completing the batch to us
+        self.collection.update_one({"_id": batch["_id"]}, {"$set": {"filling": False}})
+        batch = self._complete_if_done(batch["_id"]) or batch
+        if batch["status"] == "running":
+            self._ensure_workers()
+            with self._condition:
+                self._condition.notify_all()
+
+        logger.info(f"Bulk call batch {batch['_id']} queued {batch['total'] - batch['skipped']} calls, "
+                    f"skipped {batch['skipped']} started shifts")
+        return batch
+
+    def _create_batch(self, query, description):
+        batch = {
+            "query": description or query,
+            "status": "running",
+            # Set until every item is inserted; a batch can't complete while it is still being filled
+            "filling": True,
+            "filled_at": datetime.utcnow(),
+            "total": 0,
+            "dialed": 0,
+            "failed": 0,
+            "skipped": 0,
+            "errors": [],
+            "created_at": datetime.utcnow(),
+            "finished_at": None
+        }
+        batch["_id"] = self.collection.insert_one(batch).inserted_id
+        return batch
+
+    def _add_items(self, batch, chunk):
+        # Totals grow before the items exist, so progress never counts more finished items than the total
+        skipped = sum(1 for item in chunk if item["status"] == "skipped")
+        self.collection.update_one(
+            {"_id": batch["_id"]},
+            {"$inc": {"total": len(chunk), "skipped": skipped}, "$set": {"filled_at": datetime.utcnow()}}
+        )
+        self.items.insert_many(chunk, ordered=False)
+        batch["total"] += len(chunk)
+        batch["skipped"] += skipped
+
+    def get_batch(self, batch_id):
+        """
+        Fetch a batch document by id.
+
+        Returns:
+            dict: The batch, or None if it doesn't exist or the id is invalid.
+        """
+        try:
+            return self.collection.find_one({"_id": ObjectId(batch_id)})
+        except (InvalidId, TypeError):
+            return None
+
+    @staticmethod
+    def progress(batch):
+        """
+        Build the progress counters of a batch for API responses.
+        """
+        skipped = batch.get("skipped", 0)
+        return {
+            "batch_id": str(batch["_id"]),
+            "status": batch["status"],
+            "total": batch["total"],
+            "dialed": batch["dialed"],
+            "failed": batch["failed"],
+            "skipped": skipped,
+            "pending": batch["total"] - batch["dialed"] - batch["failed"] - skipped,
+            "errors": batch.get("errors", [])
+        }
+
+    @staticmethod
+    def _priority(record):
+        """
+        Shift start as a UTC timestamp, so the earliest shift is dialed first; records without a valid shift go last.
+        """
+        try:
+            return shift_start_datetime(record.get("date"), record.get("Shift Timings")).timestamp()
+        except (ValueError, TypeError, AttributeError):
+            return float("inf")
+
+    def _ensure_workers(self):
+        with self._lock:
+            if self._threads:
+                return
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"bulk-caller-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            atexit.register(self.stop)
+
+    def _claim(self):
+        return self.items.find_one_and_update(
+            {"status": "pending"},
+            {"$set": {"status": "dialing", "claimed_at": datetime.utcnow()}},
+            sort=[("priority", ASCENDING)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    def _work(self):
+        while not self._stopped:
+            try:
+                item = self._claim()
+            except Exception as e:
+                logger.error(f"Error claiming bulk call item: {str(e)}")
+                item = None
+
+            if item is None:
+                with self._condition:
+                    if not self._stopped:
+                        self._condition.wait(self.poll_seconds)
+                continue
+
+            self._dial(item)
+
+    def _dial(self, item):
+        batch_id = item["batch_id"]
+        record_id = item["record_id"]
+        try:
+            # The shift may have started while the item waited its turn
+            if item["priority"] <= time.time():
+                self._finish_item(item, "skipped")
+                self._record_result(batch_id, {"skipped": 1})
+                return
+
+            record = self.app.mongo.db.champ_details.find_one({"_id": record_id})
+            if record is None:
+                raise ValueError("Record not found")
+            self.rate_limiter.acquire()
+            with self.app.app_context():
+                CallService().initiate_call(record, followup_type="bulk")
+            self._finish_item(item, "dialed")
+            self._record_result(batch_id, {"dialed": 1})
+        except Exception as e:
+            logger.error(f"Bulk call batch {batch_id}: error calling record {record_id}: {str(e)}")
+            self._finish_item(item, "failed", str(e))
+            self._record_result(batch_id, {"failed": 1}, {"record_id": str(record_id), "error": str(e)})
+
+    def _finish_item(self, item, status, error=None):
+        """
+        Move a claimed item to its final status.
+
+        Returns:
+            bool: False if the item was no longer in 'dialing', e.g. settled by another process.
+        """
+        update = {"status": status, "finished_at": datetime.utcnow()}
+        if error:
+            update["error"] = error
+        try:
+            result = self.items.update_one({"_id": item["_id"], "status": "dialing"}, {"$set": update})
+            return result.modified_count == 1
+        except Exception as e:
+            logger.error(f"Error updating bulk call item {item['_id']}: {str(e)}")
+            return False
+
+    def _record_result(self, batch_id, increments, error=None):
+        update = {"$inc": increments}
+        if error:
+            # Keep only the most recent errors on the batch document
+            update["$push"] = {"errors": {"$each": [error], "$slice": -50}}
+        try:
+            self.collection.update_one({"_id": batch_id}, update)
+            self._complete_if_done(batch_id)
+        except Exception as e:
+            logger.error(f"Error updating bulk call batch {batch_id}: {str(e)}")
+
+    def _complete_if_done(self, batch_id):
+        """
+        Mark a batch as completed once it is filled and every item is finished.
+
+        Returns:
+            dict: The batch as read before completing it, or None if it doesn't exist.
+        """
+        batch = self.collection.find_one({"_id": batch_id})
+        if batch is None or batch.get("filling") or batch["status"] != "running":
+            return batch
+        if batch["dialed"] + batch["failed"] + batch.get("skipped", 0) >= batch["total"]:
+            finished_at = datetime.utcnow()
+            self.collection.update_one(
+                {"_id": batch_id, "status": "running"},
+                {"$set": {"status": "completed", "finished_at": finished_at}}
+            )
+            batch.update(status="completed", finished_at=finished_at)
+        return batch
+
+    def _settle_batch(self, batch_id):
+        """
+        Close a running batch that has no open items, recounting its progress from the items.
+        A batch whose items fall short of its total lost records in a crash and is marked as failed.
+        """
+        counts = {status: 0 for status in ("dialed", "failed", "skipped")}
+        for row in self.items.aggregate([
+            {"$match": {"batch_id": batch_id}},
+            {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+        ]):
+            if row["_id"] in counts:
+                counts[row["_id"]] = row["count"]
+
+        batch = self.collection.find_one({"_id": batch_id}, {"total": 1})
+        if batch is None:
+            return
+        status = "completed" if sum(counts.values()) >= batch["total"] else "failed"
+        self.collection.update_one(
+            {"_id": batch_id, "status": "running"},
+            {"$set": {**counts, "status": status, "filling": False, "finished_at": datetime.utcnow()}}
+        )
+        if status == "failed":
+            logger.warning(f"Bulk call batch {batch_id} was interrupted before all of its records were queued")
@@ -0,0 +1,224 @@
+# services/call_log_writer.py
+
+import atexit
+import logging
+import threading
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+
+class CallLogWriteBuffer:
+    """
+    Write-behind buffer for call_logs field updates.
+
+    Status callbacks and post-call stages each set a few fields on a call log.
+    Instead of one update_one per event, updates are merged per call_sid in
+    memory and a background thread writes them with a single bulk_write every
+    ``flush_interval_ms`` milliseconds, or as soon as ``max_pending`` call logs
+    are waiting. Later updates of a field override earlier ones, so the stored
+    document ends up the same as with direct writes. Call status updates are
+    guarded by a status rank instead, so a late event never moves a call log
+    back to an earlier status. Pending updates are flushed on shutdown. Until
+    the buffer is started, updates are written through immediately.
+    """
+
+    def __init__(self, app, flush_interval_ms=200, max_pending=500):
+        """
+        Args:
+            app (Flask): Application whose database the buffer writes to.
+            flush_interval_ms (int): Longest time an update stays in memory.
+            max_pending (int): Number of buffered call logs that triggers an early flush.
+        """
+        self.app = app
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.max_pending = max_pending
+
+        self._pending = {}
+        self._pending_status = {}
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._stopped = False
+        self._flush_listeners = []
+
+        self.updates_buffered = 0
+        self.operations_written = 0
+        self.flushes = 0
+
+    @property
+    def call_logs(self):
+        return self.app.mongo.db.call_logs
+
+    @property
+    def running(self):
+        """
+        Whether updates are currently buffered rather than written through.
+        """
+        return self._thread is not None and not self._stopped
+
+    def add_flush_listener(self, listener):
+        """
+        Register a callable run after every flush, so other buffered writes can share its schedule.
+        """
+        self._flush_listeners.append(listener)
+
+    def start(self):
+        if self._thread is not None:
+            return
+
+        self._thread = threading.Thread(target=self._run, name="call-log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+        logger.info("Call log write buffer started")
+
+    def stop(self):
+        """
+        Stop the flush thread and write everything still buffered.
+        """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+    def update(self, call_sid, fields):
+        """
+        Buffer a $set of ``fields`` on the call log of ``call_sid``.
+
+        Args:
+            call_sid (str): Twilio CallSid of the call log.
+            fields (dict): Fields to set.
+        """
+        if not call_sid or not fields:
+            return
+
+        if not self.running:
+            self.call_logs.update_one({"call_sid": call_sid}, {"$set": fields})
+            self.operations_written += 1
+            return
+
+        with self._condition:
+            self._pending.setdefault(call_sid, {}).update(fields)
+            self.updates_buffered += 1
+            self._notify_if_full()
+
+    def update_status(self, call_sid, rank, fields):
+        """
+        Buffer a status change that only applies if the call log is at a lower status rank.
+
+        Of several buffered status changes of a call, the highest-ranked one wins.
+
+        Args:
+            call_sid (str): Twilio CallSid of the call log.
+            rank (int): Rank of the new status.
+            fields (dict): Fields to set together with the status.
+        """
+        if not call_sid:
+            return
+
+        if not self.running:
+            self.call_logs.update_one(*self._status_update(call_sid, rank, fields))
+            self.operations_written += 1
+            return
+
+        with self._condition:
+            buffered = self._pending_status.get(call_sid)
+            if buffered is None or rank > buffered[0]:
+                self._pending_status[call_sid] = (rank, fields)
+            self.updates_buffered += 1
+            self._notify_if_full()
+
+    @staticmethod
+    def _status_update(call_sid, rank, fields):
+        query = {"call_sid": call_sid, "$or": [{"status_rank": {"$lt": rank}}, {"status_rank": {"$exists": False}}]}
+        return query, {"$set": dict(fields, status_rank=rank)}
+
+    def _notify_if_full(self):
+        if len(self._pending) + len(self._pending_status) >= self.max_pending:
+            self._condition.notify()
+
+    def flush(self):
+        """
+        Write every buffered update with one bulk_write, then run the flush listeners.
+
+        Returns:
+            int: Number of call logs written.
+        """
+        written = self._flush_call_logs()
+        for listener in self._flush_listeners:
+            try:
+                listener()
+            except Exception as e:
+                logger.error(f"Error in call log flush listener: {str(e)}")
+        return written
+
+    def _flush_call_logs(self):
+        with self._flush_lock:
+            with self._condition:
+                pending, self._pending = self._pending, {}
+                pending_status, self._pending_status = self._pending_status, {}
+            if not pending and not pending_status:
+                return 0
+
+            operations = [
+                UpdateOne({"call_sid": call_sid}, {"$set": fields})
+                for call_sid, fields in pending.items()
+            ]
+            operations.extend(
+                UpdateOne(*self._status_update(call_sid, rank, fields))
+                for call_sid, (rank, fields) in pending_status.items()
+            )
+            try:
+                result = self.call_logs.bulk_write(operations, ordered=False)
+                if result.matched_count < len(operations):
+                    logger.info(f"{len(operations) - result.matched_count} buffered updates matched no call log "
+                                f"or were older than its current status")
+            except BulkWriteError as e:
+                # Rejected documents are not retried; everything else was written
+                logger.error(f"Error writing {len(e.details.get('writeErrors', []))} buffered call log updates: {e.details}")
+            except Exception as e:
+                logger.error(f"Error flushing call log updates, will retry: {str(e)}")
+                self._requeue(pending, pending_status)
+                return 0
+
+            self.operations_written += len(operations)
+            self.flushes += 1
+            return len(operations)
+
+    def stats(self):
+        """
+        Returns:
+            dict: Buffered updates, write operations issued and the current backlog.
+        """
+        with self._condition:
+            pending = len(self._pending) + len(self._pending_status)
+        return {
+            "updates_buffered": self.updates_buffered,
+            "operations_written": self.operations_written,
+            "flushes": self.flushes,
+            "pending": pending
+        }
+
+    def _requeue(self, pending, pending_status):
+        # Updates buffered since the failed flush are newer and must win
+        with self._condition:
+            for call_sid, fields in pending.items():
+                fields.update(self._pending.get(call_sid, {}))
+                self._pending[call_sid] = fields
+            for call_sid, (rank, fields) in pending_status.items():
+                buffered = self._pending_status.get(call_sid)
+                if buffered is None or rank > buffered[0]:
+                    self._pending_status[call_sid] = (rank, fields)
+
+    def _run(self):
+        while not self._stopped:
+            with self._condition:
+                if len(self._pending) + len(self._pending_status) < self.max_pending:
+                    self._condition.wait(self.flush_interval)
+            if self._stopped:
+                return
+            self.flush()
@@ -0,0 +1,158 @@
+# services/call_rollups.py
+
+import logging
+import threading
+from collections import Counter
+from datetime import datetime
+
+from pymongo import UpdateOne
+
+from utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Counters kept per group, besides the number of calls placed
+ROLLUP_STATUSES = ("initiated", "ringing", "picked", "not picked", "denied", "failed", "completed")
+ROLLUP_INTENTS = ("yes", "no", "unknown")
+
+
+class CallRollups:
+    """
+    Incrementally maintained call outcome counters.
+
+    The ``call_rollups`` collection holds one document per (sheet_name,
+    call_date, work_description) group with the number of calls placed and,
+    under ``status`` and ``intent``, how many of them reached each status and
+    intent. Counters only ever change through ``$inc`` when a call is placed,
+    a status callback arrives or an intent is classified, so dashboards read
+    a handful of documents instead of scanning call_logs. Each call log keeps
+    the intent it was counted under, so a call classified again is not counted twice.
+
+    While the call log write buffer runs, increments are accumulated in memory
+    and written with one bulk_write on each of its flushes.
+    """
+
+    def __init__(self, app, key_cache_size=10000, key_cache_ttl=86400):
+        """
+        Args:
+            app (Flask): Application whose database holds the rollups.
+            key_cache_size (int): CallSids whose group is remembered in memory.
+            key_cache_ttl (int): Seconds a CallSid's group is remembered.
+        """
+        self.app = app
+        self._keys = TTLCache(maxsize=key_cache_size, ttl=key_cache_ttl)
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    @property
+    def collection(self):
+        return self.app.mongo.db.call_rollups
+
+    def record_call(self, call_sid, sheet_name, work_description, call_date):
+        """
+        Count a newly placed call and remember its group for later events.
+        """
+        key = (sheet_name or "", call_date, work_description or "")
+        self._keys.set(call_sid, key)
+        self._increment(key, {"calls": 1})
+
+    def record_status(self, call_sid, mapped_status):
+        """
+        Count a call reaching a status from the status_mapping of the status callback.
+        """
+        if mapped_status not in ROLLUP_STATUSES:
+            return
+        key = self._key_for_call(call_sid)
+        if key is not None:
+            self._increment(key, {f"status.{mapped_status}": 1})
+
+    def record_intents(self, intents):
+        """
+        Count classified intents, once per call.
+
+        The intent a call is counted under is swapped into its call log's
+        ``rollup_intent`` atomically. Classifying the call again, after a
+        pipeline retry or a manual re-run, changes nothing when the intent is
+        the same, and moves the call to the new counter when it differs.
+
+        Args:
+            intents (dict): {call_sid: intent}, intents being "yes", "no" or "unknown".
+        """
+        for call_sid, intent in intents.items():
+            if intent not in ROLLUP_INTENTS:
+                intent = "unknown"
+            call_log = self.app.mongo.db.call_logs.find_one_and_update(
+                {"call_sid": call_sid},
+                {"$set": {"rollup_intent": intent}},
+                projection={"rollup_intent": 1, "sheet_name": 1, "Work Description": 1, "call_initiated_timestamp": 1}
+            )
+            if call_log is None:
+                logger.warning(f"No call log found for CallSid {call_sid}, not counted in rollups")
+                continue
+
+            counted = call_log.get("rollup_intent")
+            if counted == intent:
+                continue
+            counts = {f"intent.{intent}": 1}
+            if counted in ROLLUP_INTENTS:
+                counts[f"intent.{counted}"] = -1
+            self._increment(self._keys.get(call_sid) or self._key_from_call_log(call_sid, call_log), counts)
+
+    def flush(self):
+        """
+        Write the accumulated increments, one upsert per group.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+
+        now = datetime.utcnow()
+        operations = [
+            UpdateOne(
+                {"sheet_name": key[0], "call_date": key[1], "work_description": key[2]},
+                {"$inc": dict(counts), "$set": {"updated_at": now}},
+                upsert=True
+            )
+            for key, counts in pending.items()
+        ]
+        try:
+            self.collection.bulk_write(operations, ordered=False)
+        except Exception as e:
+            logger.error(f"Error writing call rollups, will retry: {str(e)}")
+            with self._lock:
+                for key, counts in pending.items():
+                    self._pending.setdefault(key, Counter()).update(counts)
+
+    def _increment(self, key, counts):
+        with self._lock:
+            self._pending.setdefault(key, Counter()).update(counts)
+        if not self.app.call_log_writer.running:
+            self.flush()
+
+    def _key_for_call(self, call_sid):
+        """
+        Group of a call: remembered from when it was placed, or read from its call log.
+        """
+        key = self._keys.get(call_sid)
+        if key is not None:
+            return key
+
+        call_log = self.app.mongo.db.call_logs.find_one(
+            {"call_sid": call_sid},
+            {"sheet_name": 1, "Work Description": 1, "call_initiated_timestamp": 1}
+        )
+        if call_log is None:
+            logger.warning(f"No call log found for CallSid {call_sid}, not counted in rollups")
+            return None
+        return self._key_from_call_log(call_sid, call_log)
+
+    def _key_from_call_log(self, call_sid, call_log):
+        initiated = call_log.get("call_initiated_timestamp")
+        key = (
+            call_log.get("sheet_name", ""),
+            initiated.strftime('%Y-%m-%d') if initiated else "",
+            call_log.get("Work Description", "")
+        )
+        self._keys.set(call_sid, key)
+        return key
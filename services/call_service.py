@@ -0,0 +1,135 @@
+# services/call_service.py
+
+from flask import current_app
+from bson.objectid import ObjectId
+from bson.errors import InvalidId
+from datetime import datetime
+import logging
+
+from services.twilio_service import TwilioService
+
+logger = logging.getLogger(__name__)
+
+
+class CallInitiationError(Exception):
+    """
+    Raised when a call cannot be placed for a record.
+    """
+    def __init__(self, message, status=500):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+class CallService:
+    """
+    Places outbound calls for champ_details records and logs them in call_logs.
+    Shared by the /make_call endpoint and the follow-up scheduler, so it only
+    needs an application context, not a request context.
+    """
+    def __init__(self):
+        self.mongo = current_app.mongo
+
+    def initiate_call_for_record(self, record_id, followup_type=None):
+        """
+        Look up a champ_details record by id and call it.
+
+        Args:
+            record_id (str): MongoDB _id of the record.
+            followup_type (str, optional): Follow-up that triggered the call.
+
+        Returns:
+            str: Twilio CallSid of the new call.
+
+        Raises:
+            CallInitiationError: If the record is missing or the call cannot be placed.
+        """
+        try:
+            obj_id = ObjectId(record_id)
+        except (InvalidId, TypeError):
+            raise CallInitiationError("Invalid record ID format", 400)
+
+        record = self.mongo.db.champ_details.find_one({"_id": obj_id})
+        if not record:
+            raise CallInitiationError("Record not found", 404)
+
+        return self.initiate_call(record, followup_type=followup_type)
+
+    def initiate_call(self, record, followup_type=None):
+        """
+        Call the champ in an already fetched record and store the call log.
+
+        Args:
+            record (dict): champ_details document.
+            followup_type (str, optional): Follow-up that triggered the call.
+
+        Returns:
+            str: Twilio CallSid of the new call.
+
+        Raises:
+            CallInitiationError: If the call cannot be placed.
+        """
+        phone_number = record.get("Number")
+        if not phone_number:
+            raise CallInitiationError("Phone number not found in the record", 400)
+
+        # TwiML and Status Callback URLs using Ngrok
+        ngrok_url = current_app.config.get("NGROK_URL")
+        if not ngrok_url:
+            raise CallInitiationError("NGROK_URL is not configured in environment variables", 500)
+
+        twiml_url = f"{ngrok_url}{self._route_path('calls.voice')}"
+        status_callback_url = f"{ngrok_url}{self._route_path('calls.call_status_callback')}"
+
+        # Initiate the call
+        twilio_service = TwilioService()
+        call_sid = twilio_service.initiate_call(
+            to_number=phone_number,
+            twiml_url=twiml_url,
+            status_callback_url=status_callback_url
+        )
+
+        # Store call initiation data in MongoDB
+        now = datetime.utcnow()
+        call_log = {
+            "record_id": str(record.get("_id", "")),
+            "followup_type": followup_type or "",
+            "Name": record.get("Name", ""),
+            "Number": phone_number,
+            "call_initiated_timestamp": now,
+            "call_status": "initiated",
+            "Work Description": record.get("Work Description", ""),
+            "sheet_name": record.get("sheet_name", ""),
+            "call_sid": call_sid,
+            "Recording SID": "",
+            "Transcription_Hindi": "",
+            "Transcription_English": "",
+            "Intent": "",
+            "future_notify_interest": "",
+            "Call Start Time": "",
+            "Call End Time": "",
+            "Called Number": phone_number,
+            "Call Date": now.strftime('%Y-%m-%d'),
+            "Call Duration (seconds)": 0,
+            "Timestamp": now,
+            # Post-call pipeline stages, filled in once the call has finished
+            "processing_status": "",
+            "recording_status": "",
+            "transcription_status": "",
+            "intent_status": ""
+        }
+        self.mongo.db.call_logs.insert_one(call_log)
+        current_app.call_rollups.record_call(call_sid, call_log["sheet_name"], call_log["Work Description"], call_log["Call Date"])
+
+        # Let /voice answer this call without looking the champ up again
+        current_app.champ_cache.put(record, call_sid=call_sid)
+
+        logger.info(f"Call initiated for record {call_log['record_id']}, call_sid {call_sid}")
+        return call_sid
+
+    @staticmethod
+    def _route_path(endpoint):
+        """
+        Build the path of an endpoint without needing a request context.
+        """
+        return current_app.url_map.bind("localhost").build(endpoint)
@@ -0,0 +1,75 @@
+# services/champ_cache.py
+
+from utils.ttl_cache import TTLCache
+
+# champ_details fields the /voice script needs
+CACHED_FIELDS = ("Name", "Number", "Shift Timings", "Work Description", "Dress Code", "sheet_name")
+
+
+class ChampLookupCache:
+    """
+    In-process cache of the champ details the /voice webhook reads while Twilio waits.
+
+    Entries are keyed both by phone number and by CallSid. /make_call fills the
+    cache when it dials, so the answered call is usually served without a
+    database round trip. Updates and deletes of a record invalidate every key
+    that points at it.
+    """
+    def __init__(self, maxsize=10000, ttl=900):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl, on_evict=self._forget)
+        self._keys_by_record = {}
+        self._keys_by_number = {}
+
+    def get_by_call(self, call_sid):
+        if not call_sid:
+            return None
+        return self._cache.get(("call", call_sid))
+
+    def get_by_number(self, number):
+        if not number:
+            return None
+        return self._cache.get(("number", number))
+
+    def put(self, record, call_sid=None):
+        """
+        Cache the script fields of a champ_details record under its number and, if given, a CallSid.
+        """
+        entry = {field: record.get(field, "") for field in CACHED_FIELDS}
+        entry["record_id"] = str(record.get("_id", ""))
+
+        keys = [("number", entry["Number"])]
+        if call_sid:
+            keys.append(("call", call_sid))
+
+        with self._cache.lock:
+            for key in keys:
+                self._cache.set(key, entry)
+                self._keys_by_record.setdefault(entry["record_id"], set()).add(key)
+                self._keys_by_number.setdefault(entry["Number"], set()).add(key)
+        return entry
+
+    def invalidate_record(self, record_id):
+        with self._cache.lock:
+            for key in list(self._keys_by_record.get(str(record_id), ())):
+                self._cache.pop(key)
+
+    def invalidate_numbers(self, numbers):
+        with self._cache.lock:
+            for number in numbers:
+                for key in list(self._keys_by_number.get(number, ())):
+                    self._cache.pop(key)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self):
+        return self._cache.stats()
+
+    def _forget(self, key, entry):
+        # Keep the reverse indexes in step with entries leaving the cache
+        for index, index_key in ((self._keys_by_record, entry["record_id"]), (self._keys_by_number, entry["Number"])):
+            keys = index.get(index_key)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del index[index_key]
@@ -1,57 +1,338 @@
 # services/data_parser.py
 
+import multiprocessing
+import re
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 from datetime import datetime
+from openpyxl import load_workbook
+
+
+def create_parse_pool(workers):
+    """
+    Create the process pool parse_excel hands sheets to, and start loading its workers.
+
+    The pool is meant to live as long as the app: each worker imports pandas
+    and the parser once, instead of once per upload.
+
+    Args:
+        workers (int): Number of worker processes.
+
+    Returns:
+        ProcessPoolExecutor: The pool; its workers finish loading in the background.
+    """
+    # forkserver avoids forking a process that already runs scheduler and worker threads
+    start_methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("forkserver" if "forkserver" in start_methods else "spawn")
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+    for _ in range(workers):
+        pool.submit(_warm_up_task)
+    return pool
+
+
+def _warm_up_task():
+    """
+    Process pool task that does nothing; unpickling it imports this module, and pandas with it.
+    """
+
+
+def _parse_sheet_task(file_path, sheet_name, required_fields, vectorized):
+    """
+    Process pool task: parse and normalize a single sheet of the workbook.
+    """
+    df = pd.read_excel(file_path, sheet_name=sheet_name)
+    parser = DataParser()
+    parser._check_required_fields(df.columns, required_fields, sheet_name)
+    return parser._parse_sheet(df, sheet_name, required_fields, vectorized)
+
 
 class DataParser:
     """
     Utility class for parsing and normalizing Excel files.
     """
-    def parse_excel(self, file_stream, required_fields):
+    def parse_excel(self, file_stream, required_fields, vectorized=True, pool=None, min_parallel_rows=0):
         """
         Parse the Excel file and extract records ensuring required fields are present.
         Additionally, normalize the data to match the desired format.
         
         Args:
-            file_stream (BytesIO): File-like object containing Excel data.
+            file_stream (BytesIO or str): File-like object or path containing Excel data.
             required_fields (list): List of required field names.
+            vectorized (bool): Normalize whole columns with normalize_frame
+                instead of calling normalize_record for every row.
+            pool (ProcessPoolExecutor, optional): Pool from create_parse_pool.
+                When given and ``file_stream`` is a path to a workbook with
+                several sheets, sheets are parsed in the pool, one per task.
+            min_parallel_rows (int): Workbooks with fewer rows are parsed in
+                this process even when a pool is given, since handing them to
+                the pool costs more than it saves.
         
         Returns:
-            list: List of normalized records as dictionaries.
+            list: List of normalized records as dictionaries, in sheet order.
         
         Raises:
             ValueError: If required fields are missing in any sheet.
         """
         try:
-            xls = pd.ExcelFile(file_stream)
-            data = []
-            for sheet_name in xls.sheet_names:
-                df = pd.read_excel(xls, sheet_name=sheet_name)
-                
-                # Check for required fields
-                missing_fields = [field for field in required_fields if field not in df.columns]
-                if missing_fields:
-                    raise ValueError(f"Missing required fields in sheet '{sheet_name}': {', '.join(missing_fields)}")
-                
-                # Drop rows where all elements are NaN
-                df.dropna(how='all', inplace=True)
-                
-                # Convert dataframe to list of dictionaries
-                records = df.to_dict(orient='records')
-                
-                for record in records:
-                    # Ensure all required fields are present in each record
-                    if not all(field in record and pd.notnull(record[field]) for field in required_fields):
-                        continue  # Skip incomplete records
-                    
-                    # Normalize fields
-                    normalized_record = self.normalize_record(record, sheet_name)
-                    
-                    data.append(normalized_record)
-            return data
+            with pd.ExcelFile(file_stream) as xls:
+                parallel = (
+                    pool is not None and isinstance(file_stream, str) and len(xls.sheet_names) > 1
+                    and self._count_rows(xls) >= min_parallel_rows
+                )
+                if not parallel:
+                    data = []
+                    for sheet_name in xls.sheet_names:
+                        df = pd.read_excel(xls, sheet_name=sheet_name)
+
+                        # Check for required fields
+                        self._check_required_fields(df.columns, required_fields, sheet_name)
+
+                        data.extend(self._parse_sheet(df, sheet_name, required_fields, vectorized))
+                    return data
+                sheet_names = xls.sheet_names
+
+            return self._parse_sheets_in_pool(pool, file_stream, sheet_names, required_fields, vectorized)
         except Exception as e:
             raise e
 
+    @staticmethod
+    def _count_rows(xls):
+        """
+        Rows of every sheet as recorded in the workbook, without reading the cells.
+        """
+        book = xls.book
+        if hasattr(book, "worksheets"):
+            # openpyxl; read-only sheets take max_row from the workbook's dimension record
+            return sum(sheet.max_row or 0 for sheet in book.worksheets)
+        return sum(sheet.nrows for sheet in book.sheets())
+
+    @staticmethod
+    def _parse_sheets_in_pool(pool, file_path, sheet_names, required_fields, vectorized):
+        """
+        Parse every sheet in its own pool task and merge the results in sheet order.
+        A missing required field in any sheet raises the same ValueError as the serial path.
+        """
+        tasks = [
+            pool.submit(_parse_sheet_task, file_path, sheet_name, required_fields, vectorized)
+            for sheet_name in sheet_names
+        ]
+        data = []
+        try:
+            for task in tasks:
+                data.extend(task.result())
+        finally:
+            # Don't leave the remaining sheets of a failed upload queued in the shared pool
+            for task in tasks:
+                task.cancel()
+        return data
+
+    def iter_excel_chunks(self, file_path, required_fields, chunk_size=1000):
+        """
+        Stream an Excel file and yield normalized records in fixed-size chunks.
+
+        .xlsx files are read with a read-only openpyxl row iterator, so memory
+        stays bounded by ``chunk_size`` whatever the number of rows. Chunks
+        never span two sheets, so the last chunk of a sheet may be smaller. Legacy .xls
+        files are not supported by openpyxl and are read one sheet at a time.
+        The header of every sheet is checked before the first chunk is yielded,
+        so a missing required field fails the upload before anything is stored.
+
+        Args:
+            file_path (str): Path of the spooled upload.
+            required_fields (list): List of required field names.
+            chunk_size (int): Number of records per yielded chunk.
+
+        Yields:
+            list: Normalized records as dictionaries.
+
+        Raises:
+            ValueError: If required fields are missing in any sheet.
+        """
+        if not file_path.lower().endswith('.xlsx'):
+            yield from self._iter_dataframe_chunks(file_path, required_fields, chunk_size)
+            return
+
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            headers = {}
+            for worksheet in workbook.worksheets:
+                header_row = next(worksheet.iter_rows(max_row=1, values_only=True), ())
+                header = list(header_row)
+                self._check_required_fields(header, required_fields, worksheet.title)
+                headers[worksheet.title] = header
+
+            for worksheet in workbook.worksheets:
+                header = headers[worksheet.title]
+                rows = []
+                for row in worksheet.iter_rows(min_row=2, values_only=True):
+                    record = {
+                        field: value for field, value in zip(header, row)
+                        if field is not None and value is not None and value != ''
+                    }
+                    # Skip empty rows and records without every required field
+                    if not all(field in record for field in required_fields):
+                        continue
+
+                    rows.append(record)
+                    if len(rows) >= chunk_size:
+                        yield self.normalize_frame(pd.DataFrame(rows, dtype=object), worksheet.title)
+                        rows = []
+                if rows:
+                    yield self.normalize_frame(pd.DataFrame(rows, dtype=object), worksheet.title)
+        finally:
+            workbook.close()
+
+    def _iter_dataframe_chunks(self, file_path, required_fields, chunk_size):
+        """
+        Fallback for formats openpyxl can't stream: parse one sheet at a time with pandas.
+        """
+        with pd.ExcelFile(file_path) as xls:
+            for sheet_name in xls.sheet_names:
+                columns = pd.read_excel(xls, sheet_name=sheet_name, nrows=0).columns
+                self._check_required_fields(list(columns), required_fields, sheet_name)
+
+            for sheet_name in xls.sheet_names:
+                records = self._parse_sheet(pd.read_excel(xls, sheet_name=sheet_name), sheet_name, required_fields)
+                for start in range(0, len(records), chunk_size):
+                    yield records[start:start + chunk_size]
+
+    @staticmethod
+    def _check_required_fields(columns, required_fields, sheet_name):
+        missing_fields = [field for field in required_fields if field not in columns]
+        if missing_fields:
+            raise ValueError(f"Missing required fields in sheet '{sheet_name}': {', '.join(missing_fields)}")
+
+    def _parse_sheet(self, df, sheet_name, required_fields, vectorized=True):
+        """
+        Normalize the rows of one sheet's DataFrame, skipping incomplete records.
+        """
+        # Drop rows where all elements are NaN
+        df.dropna(how='all', inplace=True)
+
+        if vectorized:
+            # Keep only records where all required fields are present
+            complete = df[required_fields].notna().all(axis=1)
+            return self.normalize_frame(df[complete], sheet_name)
+
+        # Convert dataframe to list of dictionaries
+        records = df.to_dict(orient='records')
+
+        data = []
+        for record in records:
+            # Ensure all required fields are present in each record
+            if not all(field in record and pd.notnull(record[field]) for field in required_fields):
+                continue  # Skip incomplete records
+
+            # Normalize fields
+            data.append(self.normalize_record(record, sheet_name))
+        return data
+
+    def normalize_frame(self, df, sheet_name):
+        """
+        Column-wise equivalent of normalize_record for a whole sheet.
+
+        Applies the same rules as normalize_record to entire columns at once and
+        produces identical records. Dates are parsed once per distinct value
+        rather than once per row, since a roster sheet holds only a few dates.
+
+        Args:
+            df (DataFrame): Complete rows of one sheet.
+            sheet_name (str): Name of the Excel sheet.
+
+        Returns:
+            list: Normalized records as dictionaries.
+
+        Raises:
+            ValueError: If a date format is invalid.
+        """
+        if df.empty:
+            return []
+
+        columns = {}
+
+        # Name
+        columns['Name'] = self._as_str(df['Name']).str.strip()
+
+        # Number: same rules as normalize_number, applied to the whole column
+        number = self._number_as_str(df['Number']).str.strip()
+        is_digit = number.str.isdigit()
+        length = number.str.len()
+        starts_91 = number.str.startswith('91')
+        prefix_91 = (length == 10) & is_digit
+        prefix_plus = starts_91 & (((length == 12) & number.str[2:].str.isdigit()) | prefix_91)
+        columns['Number'] = number.where(~prefix_91, '+91' + number).where(~prefix_plus, '+' + number)
+
+        # Shift Name: Remove ' Shift' suffix if present
+        shift_name = self._as_str(df['Shift Name']).str.strip()
+        has_suffix = shift_name.str.endswith(' Shift')
+        shift_name.loc[has_suffix] = shift_name[has_suffix].str.replace(' Shift', '', regex=False).str.strip()
+        columns['Shift Name'] = shift_name
+
+        # Shift Timings: Remove all spaces
+        columns['Shift Timings'] = self._as_str(df['Shift Timings']).str.strip().str.replace(' ', '', regex=False)
+
+        # Dress Code and Work Description
+        columns['Dress Code'] = self._as_str(df['Dress Code']).str.strip()
+        columns['Work Description'] = self._as_str(df['Work Description']).str.strip()
+
+        # Date: parse each distinct value once
+        date = self._as_str(df['date']).str.strip()
+        normalized_dates = {value: self.validate_and_normalize_date(value) for value in date.unique()}
+        columns['date'] = date.map(normalized_dates)
+
+        fields = list(columns)
+        rows = zip(*(columns[field].tolist() for field in fields))
+        return [
+            {
+                **dict(zip(fields, row)),
+                'sheet_name': sheet_name,
+                'Recording SID': "",
+                '12h follow-up': "",
+                '2h follow-up': "",
+                'Dress-update': "",
+                'future-shift-interest': ""
+            }
+            for row in rows
+        ]
+
+    @staticmethod
+    def _as_str(series):
+        """
+        Convert a column to strings exactly as str() converts each value.
+        """
+        if pd.api.types.is_datetime64_any_dtype(series):
+            # str(Timestamp) keeps the time part, astype(str) on datetime64 would drop it
+            series = series.astype(object)
+        return series.astype(str)
+
+    @staticmethod
+    def _number_as_str(series):
+        """
+        Convert the Number column to strings as number_cell_str converts each value.
+        """
+        if pd.api.types.is_float_dtype(series):
+            integral = series.notna() & (series % 1 == 0)
+            text = series.astype(str)
+            text[integral] = series[integral].astype('int64').astype(str)
+            return text
+        if series.dtype == object:
+            return series.map(DataParser.number_cell_str)
+        return series.astype(str)
+
+    @staticmethod
+    def number_cell_str(value):
+        """
+        String form of a Number cell, writing integral floats without a trailing '.0'.
+
+        A blank cell in the Number column makes pandas read the whole column as
+        float, so 9876543210 arrives as 9876543210.0 while openpyxl streaming
+        delivers the int; both must store the same Number.
+        """
+        if isinstance(value, float) and value.is_integer():
+            return str(int(value))
+        return str(value)
+
     def normalize_record(self, record, sheet_name):
         """
         Normalize individual record fields to match the desired format.
@@ -69,7 +350,7 @@ class DataParser:
         normalized['Name'] = str(record.get('Name')).strip()
         
         # Number: Ensure it's a string with '+91' prefix if applicable
-        number = str(record.get('Number')).strip()
+        number = self.number_cell_str(record.get('Number')).strip()
         normalized['Number'] = self.normalize_number(number)
         
         # Shift Name: Remove ' Shift' suffix if present
@@ -152,8 +433,9 @@ class DataParser:
             ValueError: If the date format is invalid.
         """
         try:
-            # Attempt to parse the date with dayfirst=True
-            date_parsed = pd.to_datetime(date_str, dayfirst=True)
+            # Day-first for DD/MM/YYYY; ISO dates are year-first and dayfirst would swap their month and day
+            dayfirst = not re.match(r'^\d{4}-', date_str)
+            date_parsed = pd.to_datetime(date_str, dayfirst=dayfirst)
             return date_parsed.strftime('%Y-%m-%d')
         except:
             # If parsing fails, raise an error
@@ -0,0 +1,262 @@
+# services/index_manager.py
+
+import json
+import logging
+
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+# Indexes every collection needs, keyed by collection name.
+# Each entry is created idempotently by IndexManager.ensure_indexes.
+INDEX_SPECS = {
+    "champ_details": [
+        # Natural key of upsert uploads; a champ has one shift per date and sheet
+        {"keys": [("Number", 1), ("date", 1), ("sheet_name", 1)],
+         "name": "champ_number_date_sheet", "unique": True},
+        # /voice lookup by the dialed number
+        {"keys": [("Number", 1)], "name": "number"},
+        # /records filters and per-sheet listing, deletion and bulk calls
+        {"keys": [("sheet_name", 1), ("_id", 1)], "name": "sheet_name_id"},
+        {"keys": [("Work Description", 1), ("_id", 1)], "name": "work_description_id"},
+        {"keys": [("Name", 1)], "name": "name"},
+        # Bulk calls and bulk updates selected by date, optionally narrowed to a shift
+        {"keys": [("date", 1), ("Shift Timings", 1)], "name": "date_shift_timings"},
+    ],
+    "call_logs": [
+        # Every status callback and post-call stage update
+        {"keys": [("call_sid", 1)], "name": "call_sid", "unique": True},
+        # Batch intent classifier
+        {"keys": [("intent_status", 1)], "name": "intent_status"},
+        {"keys": [("intent_batch", 1)], "name": "intent_batch", "sparse": True},
+        # Follow-up scheduler recovery: was an abandoned job's call placed?
+        {"keys": [("record_id", 1), ("followup_type", 1)], "name": "record_id_followup_type"},
+    ],
+    "followup_jobs": [
+        {"keys": [("status", 1), ("run_at", 1)], "name": "status_run_at"},
+        {"keys": [("record_id", 1), ("status", 1)], "name": "record_id_status"},
+    ],
+    "call_batches": [
+        # Batches resumed at startup
+        {"keys": [("status", 1)], "name": "status"},
+    ],
+    "call_batch_items": [
+        # Bulk call workers claim the pending item whose shift starts first
+        {"keys": [("status", 1), ("priority", 1)], "name": "status_priority"},
+        {"keys": [("batch_id", 1), ("status", 1)], "name": "batch_id_status"},
+    ],
+    "post_call_jobs": [
+        {"keys": [("call_sid", 1)], "name": "call_sid", "unique": True},
+        {"keys": [("status", 1), ("created_at", 1)], "name": "status_created_at"},
+    ],
+    "call_status_events": [
+        # Rejects redelivered status callbacks
+        {"keys": [("call_sid", 1), ("call_status", 1), ("sequence_number", 1)],
+         "name": "call_sid_status_sequence", "unique": True},
+        # Twilio stops retrying long before events are dropped
+        {"keys": [("received_at", 1)], "name": "received_at", "expireAfterSeconds": 30 * 24 * 3600},
+    ],
+    "call_rollups": [
+        {"keys": [("sheet_name", 1), ("call_date", 1), ("work_description", 1)], "name": "rollup_key", "unique": True},
+        # /stats by day or date range, sorted by day, sheet and Work Description
+        {"keys": [("call_date", 1), ("sheet_name", 1), ("work_description", 1)], "name": "call_date_sheet_work"},
+    ],
+    "analysis_cache": [
+        {"keys": [("audio_sha256", 1), ("transcription_version", 1)], "name": "audio_sha256_version", "unique": True},
+        {"keys": [("recording_sids", 1), ("transcription_version", 1)], "name": "recording_sids_version"},
+        # Evicts entries once expires_at has passed
+        {"keys": [("expires_at", 1)], "name": "expires_at", "expireAfterSeconds": 0},
+    ],
+}
+
+# champ_details fields that lead an index of their own. Bulk filters (bulk calls,
+# PATCH /records/bulk) must include one of them, so they never scan the collection.
+SELECTIVE_FILTER_FIELDS = ("sheet_name", "Work Description", "date", "Number", "Name")
+
+# Representative shape of every query the blueprints and services run, as
+# (collection, filter, sort). Used by IndexManager.uncovered_queries.
+QUERY_SHAPES = [
+    ("champ_details", {"Number": "+910000000000"}, None),
+    # /records keyset pagination: first page, then resuming after the last _id, alone or with a filter
+    ("champ_details", {}, [("_id", 1)]),
+    ("champ_details", {"_id": {"$gt": "000000000000000000000000"}}, [("_id", 1)]),
+    ("champ_details", {"sheet_name": "sheet"}, [("_id", 1)]),
+    ("champ_details", {"sheet_name": "sheet", "_id": {"$gt": "000000000000000000000000"}}, [("_id", 1)]),
+    ("champ_details", {"Work Description": "work", "_id": {"$gt": "000000000000000000000000"}}, [("_id", 1)]),
+    ("champ_details", {"sheet_name": "sheet", "Work Description": "work",
+                       "_id": {"$gt": "000000000000000000000000"}}, [("_id", 1)]),
+    ("champ_details", {"_id": {"$in": ["000000000000000000000000"]}}, None),
+    ("champ_details", {"sheet_name": "sheet"}, None),
+    ("champ_details", {"Work Description": "work"}, None),
+    ("champ_details", {"sheet_name": "sheet", "Work Description": "work"}, None),
+    ("champ_details", {"Name": "name"}, None),
+    ("champ_details", {"Number": "+910000000000", "date": "2024-01-01", "sheet_name": "sheet"}, None),
+    ("champ_details", {"Number": {"$in": ["+910000000000"]}, "date": {"$in": ["2024-01-01"]},
+                       "sheet_name": {"$in": ["sheet"]}}, None),
+    # Bulk calls by filter: any of sheet_name, Work Description and date, narrowed by shift
+    ("champ_details", {"date": "2024-01-01"}, None),
+    ("champ_details", {"date": "2024-01-01", "Shift Name": "Day", "Shift Timings": "09:00-17:00"}, None),
+    ("champ_details", {"sheet_name": "sheet", "date": "2024-01-01", "Shift Name": "Day"}, None),
+    ("champ_details", {"Work Description": "work", "Shift Timings": "09:00-17:00"}, None),
+    # PATCH /records/bulk by filter
+    ("champ_details", {"Number": "+910000000000", "date": "2024-01-01"}, None),
+    ("champ_details", {"Name": "name", "Dress Code": "Formal"}, None),
+    ("champ_details", {"sheet_name": "sheet", "Recording SID": ""}, None),
+    ("call_logs", {"call_sid": "CA0"}, None),
+    ("call_logs", {"intent_status": "pending", "intent_next_attempt_at": {"$not": {"$gt": 0}}}, None),
+    ("call_logs", {"intent_batch": "batch"}, None),
+    ("call_logs", {"intent_status": "classifying"}, None),
+    ("followup_jobs", {"status": "pending", "run_at": {"$lte": 0}}, [("run_at", 1)]),
+    ("followup_jobs", {"record_id": "record", "status": "pending"}, None),
+    ("followup_jobs", {"status": "running", "started_at": {"$lt": 0}}, None),
+    ("call_logs", {"record_id": "record", "followup_type": "1st follow-up", "call_initiated_timestamp": {"$gte": 0}}, None),
+    ("call_batches", {"status": "running", "$or": [{"filling": {"$ne": True}}, {"filled_at": {"$lt": 0}}]}, None),
+    ("call_batch_items", {"status": "pending"}, [("priority", 1)]),
+    ("call_batch_items", {"status": "dialing", "claimed_at": {"$lt": 0}}, None),
+    ("call_batch_items", {"batch_id": "batch", "status": {"$in": ["pending", "dialing"]}}, None),
+    ("call_batch_items", {"batch_id": "batch"}, None),
+    ("post_call_jobs", {"call_sid": "CA0"}, None),
+    ("post_call_jobs", {"status": "queued", "next_attempt_at": {"$not": {"$gt": 0}}}, [("created_at", 1)]),
+    ("call_rollups", {"sheet_name": "sheet", "call_date": "2024-01-01", "work_description": "work"}, None),
+    # /stats, always sorted by day, sheet and Work Description
+    ("call_rollups", {}, [("call_date", 1), ("sheet_name", 1), ("work_description", 1)]),
+    ("call_rollups", {"sheet_name": "sheet"}, [("call_date", 1), ("sheet_name", 1), ("work_description", 1)]),
+    ("call_rollups", {"work_description": "work"}, [("call_date", 1), ("sheet_name", 1), ("work_description", 1)]),
+    ("call_rollups", {"call_date": "2024-01-01"}, [("call_date", 1), ("sheet_name", 1), ("work_description", 1)]),
+    ("call_rollups", {"call_date": {"$gte": "2024-01-01", "$lte": "2024-01-31"}},
+     [("call_date", 1), ("sheet_name", 1), ("work_description", 1)]),
+    ("analysis_cache", {"audio_sha256": "0", "transcription_version": "dual:whisper-1"}, None),
+    ("analysis_cache", {"recording_sids": "RE0", "transcription_version": "dual:whisper-1"}, None),
+]
+
+
+class IndexManager:
+    """
+    Creates the indexes declared in INDEX_SPECS and reports on index health.
+    """
+    def __init__(self, db, specs=None, query_shapes=None):
+        self.db = db
+        self.specs = specs or INDEX_SPECS
+        # Indexes created by this process have no usage history yet
+        self.created = set()
+        self.query_shapes = query_shapes or QUERY_SHAPES
+
+    def ensure_indexes(self):
+        """
+        Create every declared index that doesn't exist yet. Safe to run on every startup.
+
+        Returns:
+            list: Names of the indexes that could not be created, as "collection.name".
+
+        Raises:
+            RuntimeError: If a unique index can't be built because stored documents
+                already share its key. Writes that rely on the index for uniqueness
+                must not run without it, so startup fails until the duplicates are removed.
+        """
+        failed = []
+        for collection_name, specs in self.specs.items():
+            collection = self.db[collection_name]
+            existing = collection.index_information()
+            for spec in specs:
+                if spec["name"] in existing:
+                    continue
+                options = {key: value for key, value in spec.items() if key not in ("keys", "name")}
+                try:
+                    collection.create_index(spec["keys"], name=spec["name"], **options)
+                    self.created.add(f"{collection_name}.{spec['name']}")
+                    logger.info(f"Created index {collection_name}.{spec['name']}")
+                except OperationFailure as e:
+                    if e.code != 11000:
+                        logger.warning(f"Could not create index {collection_name}.{spec['name']}: {str(e)}")
+                        failed.append(f"{collection_name}.{spec['name']}")
+                        continue
+                    duplicates = self.duplicate_keys(collection_name, spec["keys"])
+                    raise RuntimeError(
+                        f"Unique index {collection_name}.{spec['name']} can't be built: documents share its key, "
+                        f"e.g. {duplicates}. Remove the duplicates, keeping one document per key, and restart."
+                    ) from e
+                except Exception as e:
+                    logger.warning(f"Could not create index {collection_name}.{spec['name']}: {str(e)}")
+                    failed.append(f"{collection_name}.{spec['name']}")
+        return failed
+
+    def duplicate_keys(self, collection_name, keys, limit=5):
+        """
+        Find key values shared by more than one document of a collection.
+
+        Args:
+            collection_name (str): Collection to search.
+            keys (list): (field, direction) pairs of the index.
+            limit (int): Maximum number of duplicate keys to return.
+
+        Returns:
+            list: Dicts with the shared key values, the document count and their _ids.
+        """
+        group_key = {field.replace(".", "_"): f"${field}" for field, _ in keys}
+        pipeline = [
+            {"$group": {"_id": group_key, "count": {"$sum": 1}, "ids": {"$push": "$_id"}}},
+            {"$match": {"count": {"$gt": 1}}},
+            {"$limit": limit}
+        ]
+        return [
+            {"key": row["_id"], "count": row["count"], "ids": [str(_id) for _id in row["ids"]]}
+            for row in self.db[collection_name].aggregate(pipeline, allowDiskUse=True)
+        ]
+
+    def report(self):
+        """
+        Compare declared indexes with the ones present in the database.
+
+        Returns:
+            dict: "missing" declared indexes that don't exist, "undeclared"
+            indexes that exist but aren't declared, and "unused" indexes with
+            no recorded accesses since the server started. Indexes created by
+            ensure_indexes in this process are never reported as unused.
+        """
+        report = {"missing": [], "undeclared": [], "unused": []}
+        for collection_name, specs in self.specs.items():
+            collection = self.db[collection_name]
+            declared = {spec["name"] for spec in specs}
+            existing = set(collection.index_information()) - {"_id_"}
+
+            report["missing"].extend(f"{collection_name}.{name}" for name in sorted(declared - existing))
+            report["undeclared"].extend(f"{collection_name}.{name}" for name in sorted(existing - declared))
+
+            try:
+                for stats in collection.aggregate([{"$indexStats": {}}]):
+                    name = f"{collection_name}.{stats['name']}"
+                    if stats["name"] != "_id_" and stats["accesses"]["ops"] == 0 and name not in self.created:
+                        report["unused"].append(name)
+            except Exception as e:
+                logger.warning(f"Could not read index stats for {collection_name}: {str(e)}")
+        return report
+
+    def uncovered_queries(self):
+        """
+        Explain every query in QUERY_SHAPES and return the ones that need a collection scan.
+
+        Returns:
+            list: (collection, filter, sort) tuples whose winning plan is a COLLSCAN.
+        """
+        uncovered = []
+        for collection_name, query, sort in self.query_shapes:
+            cursor = self.db[collection_name].find(query)
+            if sort:
+                cursor = cursor.sort(sort)
+            winning_plan = cursor.explain()["queryPlanner"]["winningPlan"]
+            if "COLLSCAN" in json.dumps(winning_plan, default=str):
+                uncovered.append((collection_name, query, sort))
+        return uncovered
+
+    def log_report(self, explain_queries=False):
+        """
+        Log missing, undeclared and unused indexes, and optionally uncovered queries.
+        """
+        report = self.report()
+        for kind, names in report.items():
+            if names:
+                logger.warning(f"{kind.capitalize()} indexes: {', '.join(names)}")
+        if explain_queries:
+            for collection_name, query, sort in self.uncovered_queries():
+                logger.warning(f"Query on {collection_name} is not covered by an index: {query} sort={sort}")
+        return report
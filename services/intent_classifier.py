@@ -0,0 +1,193 @@
+# services/intent_classifier.py
+
+import atexit
+import logging
+import threading
+import uuid
+from datetime import datetime
+
+from pymongo import UpdateOne
+
+from services.openai_service import OpenAIService
+from utils.retry import backoff_delay
+
+logger = logging.getLogger(__name__)
+
+
+class BatchIntentClassifier:
+    """
+    Classifies call intents in micro-batches.
+
+    The post-call pipeline marks a call log with intent_status 'pending' once
+    it has been transcribed. A single background thread collects pending call
+    logs into batches of up to ``batch_size``, classifies each batch with one
+    chat request returning JSON and writes the results back with one bulk write.
+    A batch is sent as soon as it is full, or after ``max_wait_seconds``.
+    Calls of a failed batch are retried after an exponential backoff.
+    """
+
+    def __init__(self, app, batch_size=20, max_wait_seconds=5, max_attempts=3, retry_backoff_seconds=30):
+        """
+        Args:
+            app (Flask): Application whose context the classifier runs in.
+            batch_size (int): Maximum number of transcripts per request.
+            max_wait_seconds (float): Longest time a pending transcript waits for a batch to fill.
+            max_attempts (int): Attempts before a call's intent is marked as failed.
+            retry_backoff_seconds (float): Delay before retrying a call whose batch failed,
+                doubled on every further failure.
+        """
+        self.app = app
+        self.batch_size = batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self.max_attempts = max_attempts
+        self.retry_backoff_seconds = retry_backoff_seconds
+
+        self._condition = threading.Condition()
+        self._pending_notifications = 0
+        self._thread = None
+        self._stopped = False
+
+    @property
+    def call_logs(self):
+        return self.app.mongo.db.call_logs
+
+    def start(self):
+        """
+        Release batches abandoned by a previous run and start the classifier thread.
+        """
+        if self._thread is not None:
+            return
+
+        self.call_logs.update_many(
+            {"intent_status": "classifying"},
+            {"$set": {"intent_status": "pending"}, "$unset": {"intent_batch": ""}}
+        )
+
+        self._thread = threading.Thread(target=self._run, name="intent-classifier", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+
+    def notify(self):
+        """
+        Signal that a call log has been marked as pending. Wakes the classifier once a batch is full.
+        """
+        with self._condition:
+            self._pending_notifications += 1
+            if self._pending_notifications >= self.batch_size:
+                self._condition.notify()
+
+    def _run(self):
+        while not self._stopped:
+            with self._condition:
+                if self._pending_notifications < self.batch_size:
+                    self._condition.wait(self.max_wait_seconds)
+                self._pending_notifications = 0
+            if self._stopped:
+                return
+
+            try:
+                with self.app.app_context():
+                    # Make sure buffered 'pending' markers have reached the database
+                    self.app.call_log_writer.flush()
+                    # Drain everything pending, one full batch at a time
+                    while self.classify_next_batch() == self.batch_size:
+                        pass
+            except Exception as e:
+                logger.error(f"Error classifying intents: {str(e)}")
+
+    def _claim_batch(self):
+        """
+        Atomically mark up to batch_size pending call logs as being classified by this batch.
+        """
+        batch_token = uuid.uuid4().hex
+        ids = [
+            log["_id"] for log in
+            self.call_logs.find(
+                # Calls waiting out a retry backoff are not due yet
+                {"intent_status": "pending", "intent_next_attempt_at": {"$not": {"$gt": datetime.utcnow()}}},
+                {"_id": 1}
+            ).limit(self.batch_size)
+        ]
+        if not ids:
+            return []
+
+        self.call_logs.update_many(
+            {"_id": {"$in": ids}, "intent_status": "pending"},
+            {"$set": {"intent_status": "classifying", "intent_batch": batch_token}, "$inc": {"intent_attempts": 1}}
+        )
+        return list(self.call_logs.find(
+            {"intent_batch": batch_token},
+            {"call_sid": 1, "Transcription_English": 1, "intent_attempts": 1, "Recording SID": 1}
+        ))
+
+    def classify_next_batch(self):
+        """
+        Classify one batch of pending call logs. Must be called inside an application context.
+
+        Returns:
+            int: Number of call logs in the batch.
+        """
+        batch = self._claim_batch()
+        if not batch:
+            return 0
+
+        now = datetime.utcnow()
+        transcriptions = {
+            log["call_sid"]: log.get("Transcription_English", "")
+            for log in batch if log.get("Transcription_English")
+        }
+
+        results, error = {}, None
+        if transcriptions:
+            openai_service = OpenAIService()
+            try:
+                results = openai_service.classify_intents(transcriptions)
+            except Exception as e:
+                logger.error(f"OpenAI batch intent extraction error: {str(e)}")
+                error = str(e)
+
+            self.app.call_rollups.record_intents({call_sid: result["intent"] for call_sid, result in results.items()})
+
+            # Remember the intents next to the cached transcriptions of the same recordings
+            self.app.analysis_cache.store_intents(
+                openai_service.transcription_version,
+                openai_service.intent_model,
+                {log["Recording SID"]: results[log["call_sid"]]
+                 for log in batch if log["call_sid"] in results and log.get("Recording SID")}
+            )
+
+        operations = []
+        for log in batch:
+            call_sid = log["call_sid"]
+            if call_sid in results:
+                fields = {
+                    "Intent": results[call_sid]["intent"],
+                    "future_notify_interest": results[call_sid]["future_notify_interest"],
+                    "intent_status": "done"
+                }
+            elif call_sid not in transcriptions:
+                # Nothing to classify
+                fields = {"intent_status": "skipped"}
+            elif log.get("intent_attempts", 1) < self.max_attempts:
+                # Retry in a later batch, once the backoff has passed
+                next_attempt_at = now + backoff_delay(log.get("intent_attempts", 1), self.retry_backoff_seconds)
+                operations.append(UpdateOne(
+                    {"_id": log["_id"]},
+                    {"$set": {"intent_status": "pending", "intent_next_attempt_at": next_attempt_at},
+                     "$unset": {"intent_batch": ""}}
+                ))
+                continue
+            else:
+                fields = {"intent_status": "failed", "processing_error": error or "No intent returned for call"}
+
+            fields.update({"processing_status": "done", "processing_finished_at": now})
+            operations.append(UpdateOne({"_id": log["_id"]}, {"$set": fields, "$unset": {"intent_batch": ""}}))
+
+        self.call_logs.bulk_write(operations, ordered=False)
+        logger.info(f"Classified intents for {len(results)} of {len(batch)} calls in one batch")
+        return len(batch)
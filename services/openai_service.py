@@ -0,0 +1,161 @@
+# services/openai_service.py
+
+from flask import current_app
+from concurrent.futures import ThreadPoolExecutor
+import json
+import logging
+import openai
+
+from utils.metrics import track_dependency
+
+logger = logging.getLogger(__name__)
+
+# Runs the second transcription of 'dual' mode next to the first one
+_transcription_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="transcribe")
+
+TRANSCRIPTION_MODES = ('dual', 'single')
+
+
+class OpenAIService:
+    """
+    Wrapper around the OpenAI transcription and chat endpoints used after a call.
+    """
+    def __init__(self):
+        openai.api_key = current_app.config.get("OPENAI_API_KEY")
+        openai.api_base = current_app.config.get("OPENAI_API_BASE", "https://api.openai.com/v1")
+        self.transcription_mode = current_app.config.get("TRANSCRIPTION_MODE", "dual")
+        if self.transcription_mode not in TRANSCRIPTION_MODES:
+            logger.warning(f"Unknown TRANSCRIPTION_MODE '{self.transcription_mode}', using 'dual'")
+            self.transcription_mode = "dual"
+        self.translation_model = current_app.config.get("TRANSLATION_MODEL", "gpt-3.5-turbo")
+        self.intent_model = current_app.config.get("INTENT_MODEL", "gpt-4")
+
+    @property
+    def transcription_version(self):
+        """
+        Identifies how transcriptions are produced, so cached results of other settings are not reused.
+        """
+        if self.transcription_mode == 'single':
+            return f"single:whisper-1:{self.translation_model}"
+        return "dual:whisper-1"
+
+    def transcribe(self, audio_file, language='hi'):
+        """
+        Transcribe an audio file with Whisper.
+
+        Args:
+            audio_file (file-like): Audio stream with a ``name`` attribute.
+            language (str): ISO-639-1 language of the audio.
+
+        Returns:
+            str: Transcribed text, or an empty string on error.
+        """
+        try:
+            with track_dependency("openai", "transcribe"):
+                transcript = openai.Audio.transcribe("whisper-1", audio_file, language=language)
+            return transcript['text']
+        except Exception as e:
+            logger.error(f"OpenAI transcription error: {str(e)}")
+            return ""
+
+    def translate_to_english(self, text):
+        """
+        Translate a Hindi transcription to English with a text model.
+
+        Args:
+            text (str): Hindi transcription.
+
+        Returns:
+            str: English translation, or an empty string on error.
+        """
+        if not text:
+            return ""
+        try:
+            with track_dependency("openai", "translate"):
+                response = openai.ChatCompletion.create(
+                    model=self.translation_model,
+                    messages=[
+                        {"role": "system", "content": "Translate the user's Hindi phone call transcript to English. Reply with the translation only."},
+                        {"role": "user", "content": text}
+                    ],
+                    temperature=0,
+                )
+            return response.choices[0].message['content'].strip()
+        except Exception as e:
+            logger.error(f"OpenAI translation error: {str(e)}")
+            return ""
+
+    def transcribe_call(self, recording):
+        """
+        Produce the Hindi and English transcriptions of a call recording.
+
+        In 'dual' mode the audio is transcribed twice, once per language, with
+        both requests running concurrently. In 'single' mode it is transcribed
+        once in Hindi and the English text is derived with a text-model translation.
+
+        Args:
+            recording (RecordingBuffer): Downloaded recording; each pass opens its own stream over it.
+
+        Returns:
+            tuple: (transcription_hindi, transcription_english)
+        """
+        if self.transcription_mode == 'single':
+            with recording.open() as audio_stream:
+                transcription_hindi = self.transcribe(audio_stream, language='hi')
+            return transcription_hindi, self.translate_to_english(transcription_hindi)
+
+        # Each request gets its own stream over the same buffer, so they can be read concurrently
+        with recording.open() as hindi_stream, recording.open() as english_stream:
+            hindi_future = _transcription_executor.submit(self.transcribe, hindi_stream, 'hi')
+            transcription_english = self.transcribe(english_stream, language='en')
+            return hindi_future.result(), transcription_english
+
+    def classify_intents(self, transcriptions):
+        """
+        Classify the intent of many calls with a single chat request.
+
+        Args:
+            transcriptions (dict): English transcriptions keyed by call id.
+
+        Returns:
+            dict: {call_id: {"intent": ..., "future_notify_interest": ...}} for
+            every call the model answered. Values are "yes", "no" or "unknown".
+
+        Raises:
+            Exception: If the request fails or the reply is not valid JSON.
+        """
+        calls = [{"id": call_id, "transcription": text} for call_id, text in transcriptions.items()]
+        prompt = (
+            "For each phone call transcription below, identify whether the person confirmed "
+            "they will come to the shift (intent) and whether they want to be notified about "
+            "future shifts (future_notify_interest). Answer each with \"yes\", \"no\" or \"unknown\".\n"
+            "Reply with JSON only, in the form "
+            "{\"results\": [{\"id\": \"...\", \"intent\": \"...\", \"future_notify_interest\": \"...\"}]}.\n\n"
+            f"Calls: {json.dumps(calls, ensure_ascii=False)}"
+        )
+        with track_dependency("openai", "classify_intents"):
+            response = openai.ChatCompletion.create(
+                model=self.intent_model,
+                messages=[
+                    {"role": "system", "content": "You are a helpful assistant that only replies with JSON."},
+                    {"role": "user", "content": prompt}
+                ],
+                n=1,
+                temperature=0,
+            )
+        content = response.choices[0].message['content'].strip()
+
+        # Tolerate replies wrapped in a markdown code fence
+        if content.startswith("```"):
+            content = content.strip("`")
+            content = content[content.index("{"):] if "{" in content else content
+
+        results = {}
+        for item in json.loads(content).get("results", []):
+            call_id = str(item.get("id", ""))
+            if call_id in transcriptions:
+                results[call_id] = {
+                    "intent": str(item.get("intent", "")).strip().lower(),
+                    "future_notify_interest": str(item.get("future_notify_interest", "")).strip().lower()
+                }
+        return results
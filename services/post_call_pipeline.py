@@ -0,0 +1,228 @@
+# services/post_call_pipeline.py
+
+import atexit
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from pymongo import ASCENDING, ReturnDocument
+
+from services.openai_service import OpenAIService
+from services.twilio_service import TwilioService
+from utils.retry import backoff_delay
+
+logger = logging.getLogger(__name__)
+
+
+class PostCallPipeline:
+    """
+    Background processing of finished calls.
+
+    The status callback only enqueues a job in the post_call_jobs collection.
+    A fixed pool of worker threads claims queued jobs, fetches the recording,
+    transcribes it and hands the transcript to the batch intent classifier,
+    recording the outcome of each stage on the call log (recording_status,
+    transcription_status, intent_status and processing_status). A failed job is
+    retried after an exponential backoff, so an outage does not use up its
+    attempts within seconds. Jobs survive restarts: anything left in 'processing'
+    longer than the stale timeout is queued again at startup.
+    """
+
+    def __init__(self, app, workers=2, poll_seconds=5, max_attempts=3, stale_seconds=600, retry_backoff_seconds=30):
+        """
+        Args:
+            app (Flask): Application whose context the workers run in.
+            workers (int): Number of worker threads.
+            poll_seconds (int): How often idle workers look for jobs enqueued by other processes.
+            max_attempts (int): Attempts before a job is marked as failed.
+            stale_seconds (int): Age after which a 'processing' job is considered abandoned.
+            retry_backoff_seconds (float): Delay before retrying a failed job, doubled on every further failure.
+        """
+        self.app = app
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts
+        self.stale_after = timedelta(seconds=stale_seconds)
+        self.retry_backoff_seconds = retry_backoff_seconds
+
+        self._condition = threading.Condition()
+        self._threads = []
+        self._stopped = False
+
+    @property
+    def collection(self):
+        return self.app.mongo.db.post_call_jobs
+
+    @property
+    def call_logs(self):
+        return self.app.mongo.db.call_logs
+
+    def start(self):
+        """
+        Requeue abandoned jobs and start the worker threads.
+        """
+        if self._threads:
+            return
+
+        requeued = self.collection.update_many(
+            {"status": "processing", "started_at": {"$lt": datetime.utcnow() - self.stale_after}},
+            {"$set": {"status": "queued"}}
+        )
+        if requeued.modified_count:
+            logger.warning(f"Requeued {requeued.modified_count} abandoned post-call jobs")
+
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"post-call-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        atexit.register(self.stop)
+        logger.info(f"Post-call pipeline started with {self.workers} workers")
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+
+    def enqueue(self, call_sid):
+        """
+        Queue a finished call for processing and mark its call log as queued.
+        Enqueuing the same CallSid twice is a no-op.
+
+        Returns:
+            bool: True if a new job was created.
+        """
+        result = self.collection.update_one(
+            {"call_sid": call_sid},
+            {"$setOnInsert": {
+                "call_sid": call_sid,
+                "status": "queued",
+                "attempts": 0,
+                "created_at": datetime.utcnow()
+            }},
+            upsert=True
+        )
+        if result.upserted_id is None:
+            return False
+
+        self._set_stages(call_sid, processing_status="queued")
+        with self._condition:
+            self._condition.notify()
+        return True
+
+    def _claim(self):
+        # Jobs waiting out a retry backoff are not due yet
+        return self.collection.find_one_and_update(
+            {"status": "queued", "next_attempt_at": {"$not": {"$gt": datetime.utcnow()}}},
+            {"$set": {"status": "processing", "started_at": datetime.utcnow()}, "$inc": {"attempts": 1}},
+            sort=[("created_at", ASCENDING)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    def _work(self):
+        while not self._stopped:
+            try:
+                job = self._claim()
+            except Exception as e:
+                logger.error(f"Error claiming post-call job: {str(e)}")
+                job = None
+
+            if job is None:
+                with self._condition:
+                    if not self._stopped:
+                        self._condition.wait(self.poll_seconds)
+                continue
+
+            self._run_job(job)
+
+    def _run_job(self, job):
+        call_sid = job["call_sid"]
+        try:
+            with self.app.app_context():
+                self.process_call(call_sid)
+            self.collection.update_one(
+                {"_id": job["_id"]},
+                {"$set": {"status": "done", "finished_at": datetime.utcnow()}}
+            )
+        except Exception as e:
+            logger.error(f"Post-call processing failed for CallSid {call_sid}: {str(e)}")
+            status = "failed" if job["attempts"] >= self.max_attempts else "queued"
+            update = {"status": status, "error": str(e)}
+            if status == "queued":
+                update["next_attempt_at"] = datetime.utcnow() + backoff_delay(job["attempts"], self.retry_backoff_seconds)
+            self.collection.update_one({"_id": job["_id"]}, {"$set": update})
+            self._set_stages(call_sid, processing_status=status, processing_error=str(e))
+
+    def _set_stages(self, call_sid, **fields):
+        # Consecutive stage updates of a call are merged into one write by the buffer
+        self.app.call_log_writer.update(call_sid, fields)
+
+    def process_call(self, call_sid):
+        """
+        Run every post-call stage for one call. Must be called inside an application context.
+
+        A recording that was processed before is served from the analysis cache,
+        by its Recording SID before download or by its content hash after it.
+        """
+        self._set_stages(call_sid, processing_status="processing", processing_started_at=datetime.utcnow())
+        cache = self.app.analysis_cache
+        openai_service = OpenAIService()
+        version = openai_service.transcription_version
+
+        # Stage 1: recording; a reprocessed call already knows its Recording SID
+        twilio_service = TwilioService()
+        call_log = self.call_logs.find_one({"call_sid": call_sid}, {"Recording SID": 1}) or {}
+        recording_sid = call_log.get("Recording SID") or twilio_service.fetch_recording_sid(call_sid)
+        if not recording_sid:
+            logger.warning(f"No recording found for CallSid {call_sid}")
+            self._set_stages(call_sid, recording_status="missing", processing_status="done",
+                             processing_finished_at=datetime.utcnow())
+            return
+
+        cached = cache.lookup(version, recording_sid=recording_sid)
+        if cached is None:
+            recording = twilio_service.download_recording(recording_sid)
+            if recording is None:
+                cache.record_lookup(False)
+                self._set_stages(call_sid, **{"Recording SID": recording_sid, "recording_status": "failed"})
+                raise RuntimeError(f"Failed to fetch recording {recording_sid}")
+            self._set_stages(call_sid, **{"Recording SID": recording_sid, "recording_status": "done"})
+
+            # Stage 2: transcription, every pass reading the same downloaded buffer
+            with recording:
+                cached = cache.lookup(version, recording_sid=recording_sid, audio_sha256=recording.sha256)
+                # One hit or miss per recording, however many lookups it took
+                cache.record_lookup(cached is not None)
+                if cached is None:
+                    transcription_hindi, transcription_english = openai_service.transcribe_call(recording)
+                    # Failed transcriptions come back empty; retry the job instead of classifying empty text
+                    if not transcription_hindi or not transcription_english:
+                        self._set_stages(call_sid, transcription_status="failed")
+                        raise RuntimeError(f"Transcription of recording {recording_sid} came back empty")
+                    cache.store_transcription(version, recording_sid, recording.sha256,
+                                              transcription_hindi, transcription_english)
+        else:
+            cache.record_lookup(True)
+            self._set_stages(call_sid, **{"Recording SID": recording_sid, "recording_status": "done"})
+
+        if cached is not None:
+            logger.info(f"Reusing cached analysis of recording {recording_sid} for CallSid {call_sid}")
+            transcription_hindi = cached.get("Transcription_Hindi", "")
+            transcription_english = cached.get("Transcription_English", "")
+
+        self._set_stages(call_sid, **{
+            "Transcription_Hindi": transcription_hindi,
+            "Transcription_English": transcription_english,
+            "transcription_mode": openai_service.transcription_mode,
+            "transcription_status": "done"
+        })
+
+        # Stage 3: intent, from the cache or classified in micro-batches by the intent classifier
+        cached_intent = cache.cached_intent(cached, openai_service.intent_model)
+        if cached_intent is not None:
+            self.app.call_rollups.record_intents({call_sid: cached_intent["Intent"]})
+            self._set_stages(call_sid, intent_status="done", processing_status="done",
+                             processing_finished_at=datetime.utcnow(), **cached_intent)
+            return
+
+        self._set_stages(call_sid, intent_status="pending")
+        self.app.intent_classifier.notify()
@@ -0,0 +1,296 @@
+# services/scheduler_service.py
+
+import atexit
+import heapq
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytz
+from bson.objectid import ObjectId
+from pymongo import ASCENDING, ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+
+class FollowUpScheduler:
+    """
+    Durable scheduler for follow-up calls.
+
+    Every job is stored in the ``followup_jobs`` collection. Only the jobs that
+    are due within the look-ahead window are kept in an in-memory heap, and a
+    single dispatcher thread sleeps until the earliest of them is due. Due jobs
+    are claimed atomically in MongoDB before they are handed to a small, fixed
+    worker pool, so a job never fires twice even when several processes share
+    the same database.
+    """
+
+    def __init__(self, app, handler, lookahead_seconds=300, max_in_memory=10000,
+                 workers=4, misfire_grace_seconds=300, stale_seconds=600):
+        """
+        Args:
+            app (Flask): Application whose context the handler runs in.
+            handler (callable): Called as ``handler(record_id, followup_type)``.
+            lookahead_seconds (int): How far ahead jobs are loaded into memory.
+            max_in_memory (int): Upper bound on the number of jobs held in the heap.
+            workers (int): Number of threads that run due jobs.
+            misfire_grace_seconds (int): Pending jobs older than this at load
+                time are marked as missed instead of being fired late.
+            stale_seconds (int): Age after which a 'running' job is considered
+                abandoned by a process that stopped while running it.
+        """
+        self.app = app
+        self.handler = handler
+        self.lookahead = timedelta(seconds=lookahead_seconds)
+        self.max_in_memory = max_in_memory
+        self.workers = workers
+        self.misfire_grace = timedelta(seconds=misfire_grace_seconds)
+        self.stale_after = timedelta(seconds=stale_seconds)
+
+        self._heap = []
+        self._queued_ids = set()
+        self._condition = threading.Condition()
+        self._next_refill = datetime.min
+        self._thread = None
+        self._executor = None
+        self._stopped = False
+
+    @property
+    def collection(self):
+        return self.app.mongo.db.followup_jobs
+
+    @property
+    def queue_depth(self):
+        """
+        Number of jobs currently held in the in-memory heap.
+        """
+        return len(self._heap)
+
+    def pending_count(self):
+        """
+        Number of follow-ups still waiting to fire, across all processes.
+        """
+        return self.collection.count_documents({"status": "pending"})
+
+    def start(self):
+        """
+        Recover abandoned jobs, mark stale jobs as missed, load the pending window and start the dispatcher thread.
+        """
+        if self._thread is not None:
+            return
+
+        self._recover_abandoned()
+
+        missed = self.collection.update_many(
+            {"status": "pending", "run_at": {"$lt": datetime.utcnow() - self.misfire_grace}},
+            {"$set": {"status": "missed", "finished_at": datetime.utcnow()}}
+        )
+        if missed.modified_count:
+            logger.warning(f"{missed.modified_count} follow-up jobs were overdue at startup and marked as missed")
+
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="followup")
+        self._thread = threading.Thread(target=self._run, name="followup-dispatcher", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+        logger.info("Follow-up scheduler started")
+
+    def _recover_abandoned(self):
+        """
+        Settle jobs left in 'running' by a process that stopped mid-call.
+
+        A job whose call log shows the call was placed is marked as done; any
+        other is queued again, and then falls under the misfire check like
+        every pending job.
+        """
+        abandoned = self.collection.find(
+            {"status": "running", "started_at": {"$lt": datetime.utcnow() - self.stale_after}},
+            {"record_id": 1, "followup_type": 1, "started_at": 1}
+        )
+        requeued = done = 0
+        for job in abandoned:
+            placed = self.app.mongo.db.call_logs.count_documents({
+                "record_id": job["record_id"],
+                "followup_type": job["followup_type"],
+                "call_initiated_timestamp": {"$gte": job["started_at"]}
+            }, limit=1)
+            if placed:
+                update = {"status": "done", "finished_at": datetime.utcnow()}
+                done += 1
+            else:
+                update = {"status": "pending"}
+                requeued += 1
+            self.collection.update_one({"_id": job["_id"], "status": "running"}, {"$set": update})
+
+        if requeued or done:
+            logger.warning(f"Recovered abandoned follow-up jobs: {requeued} requeued, "
+                           f"{done} marked done because their call was placed")
+
+    def stop(self):
+        """
+        Stop the dispatcher thread. Pending jobs stay in MongoDB and are reloaded on next start.
+        """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    def schedule(self, record_id, followup_type, run_at):
+        """
+        Persist a single follow-up job.
+
+        Args:
+            record_id (str): champ_details record to call.
+            followup_type (str): Label of the follow-up, e.g. '1st follow-up'.
+            run_at (datetime): Timezone-aware time at which the call should be placed.
+
+        Returns:
+            ObjectId: Id of the stored job.
+        """
+        return self.schedule_many([(record_id, followup_type, run_at)])[0]
+
+    def schedule_many(self, jobs):
+        """
+        Persist many follow-up jobs with a single insert.
+
+        Args:
+            jobs (list): List of ``(record_id, followup_type, run_at)`` tuples.
+
+        Returns:
+            list: Ids of the stored jobs, in input order.
+        """
+        if not jobs:
+            return []
+
+        now = datetime.utcnow()
+        documents = [
+            {
+                "record_id": record_id,
+                "followup_type": followup_type,
+                "run_at": self._to_utc(run_at),
+                "status": "pending",
+                "attempts": 0,
+                "created_at": now
+            }
+            for record_id, followup_type, run_at in jobs
+        ]
+        inserted_ids = self.collection.insert_many(documents).inserted_ids
+
+        with self._condition:
+            for document, job_id in zip(documents, inserted_ids):
+                self._push(str(job_id), document["run_at"])
+            self._condition.notify()
+
+        return inserted_ids
+
+    def cancel_for_record(self, record_id):
+        """
+        Cancel all pending follow-ups of a record.
+
+        Returns:
+            int: Number of cancelled jobs.
+        """
+        result = self.collection.update_many(
+            {"record_id": record_id, "status": "pending"},
+            {"$set": {"status": "cancelled", "finished_at": datetime.utcnow()}}
+        )
+        return result.modified_count
+
+    @staticmethod
+    def _to_utc(run_at):
+        """
+        Convert an aware datetime to the naive UTC form PyMongo stores.
+        """
+        if run_at.tzinfo is not None:
+            run_at = run_at.astimezone(pytz.utc).replace(tzinfo=None)
+        return run_at
+
+    def _push(self, job_id, run_at):
+        # Jobs outside the window, or beyond the memory bound, are picked up by a later refill
+        if job_id in self._queued_ids or len(self._heap) >= self.max_in_memory:
+            return
+        if run_at > datetime.utcnow() + self.lookahead:
+            return
+        heapq.heappush(self._heap, (run_at, job_id))
+        self._queued_ids.add(job_id)
+
+    def _refill(self, now):
+        """
+        Load pending jobs that fall inside the look-ahead window into the heap.
+        """
+        try:
+            cursor = self.collection.find(
+                {"status": "pending", "run_at": {"$lte": now + self.lookahead}},
+                {"run_at": 1}
+            ).sort("run_at", ASCENDING).limit(self.max_in_memory)
+            jobs = list(cursor)
+        except Exception as e:
+            logger.error(f"Error loading pending follow-up jobs: {str(e)}")
+            jobs = []
+
+        with self._condition:
+            for job in jobs:
+                self._push(str(job["_id"]), job["run_at"])
+            self._next_refill = now + self.lookahead / 2
+
+    def _pop_due(self, now):
+        due = []
+        with self._condition:
+            while self._heap and self._heap[0][0] <= now:
+                _, job_id = heapq.heappop(self._heap)
+                self._queued_ids.discard(job_id)
+                due.append(job_id)
+        return due
+
+    def _wait(self):
+        with self._condition:
+            if self._stopped:
+                return
+            now = datetime.utcnow()
+            timeout = (self._next_refill - now).total_seconds()
+            if self._heap:
+                timeout = min(timeout, (self._heap[0][0] - now).total_seconds())
+            if timeout > 0:
+                self._condition.wait(timeout)
+
+    def _run(self):
+        while not self._stopped:
+            now = datetime.utcnow()
+            if now >= self._next_refill:
+                self._refill(now)
+
+            due = self._pop_due(now)
+            for job_id in due:
+                self._executor.submit(self._execute, job_id)
+
+            if not due:
+                self._wait()
+
+    def _execute(self, job_id):
+        """
+        Claim a due job and run the handler for it.
+        """
+        try:
+            job = self.collection.find_one_and_update(
+                {"_id": ObjectId(job_id), "status": "pending"},
+                {"$set": {"status": "running", "started_at": datetime.utcnow()}, "$inc": {"attempts": 1}},
+                return_document=ReturnDocument.AFTER
+            )
+        except Exception as e:
+            logger.error(f"Error claiming follow-up job {job_id}: {str(e)}")
+            return
+
+        if not job:
+            # Cancelled, or already claimed by another process
+            return
+
+        try:
+            with self.app.app_context():
+                self.handler(job["record_id"], job["followup_type"])
+            update = {"status": "done", "finished_at": datetime.utcnow()}
+        except Exception as e:
+            logger.error(f"Error running {job['followup_type']} for record {job['record_id']}: {str(e)}")
+            update = {"status": "failed", "error": str(e), "finished_at": datetime.utcnow()}
+
+        self.collection.update_one({"_id": job["_id"]}, {"$set": update})
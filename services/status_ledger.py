@@ -0,0 +1,88 @@
+# services/status_ledger.py
+
+import logging
+from datetime import datetime
+
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+# Order in which a call moves through Twilio statuses. A call log only ever
+# moves to a status of higher rank; every final status shares the top rank.
+STATUS_RANKS = {
+    "queued": 0,
+    "initiated": 1,
+    "ringing": 2,
+    "answered": 3,
+    "in-progress": 3,
+    "completed": 4,
+    "busy": 4,
+    "no-answer": 4,
+    "failed": 4,
+    "canceled": 4,
+}
+
+
+def status_rank(call_status):
+    """
+    Rank of a Twilio CallStatus in STATUS_RANKS. Unknown statuses rank lowest.
+    """
+    return STATUS_RANKS.get(call_status, 0)
+
+
+class CallStatusLedger:
+    """
+    Ledger of the status callbacks already processed.
+
+    Every delivery is recorded in ``call_status_events`` under a unique
+    (call_sid, call_status, sequence_number) index, so a redelivered event is
+    rejected by the insert itself and can be dropped before any other work.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.duplicates = 0
+
+    @property
+    def collection(self):
+        return self.app.mongo.db.call_status_events
+
+    def record(self, call_sid, call_status, sequence_number=None):
+        """
+        Record a status event.
+
+        Args:
+            call_sid (str): Twilio CallSid.
+            call_status (str): Twilio CallStatus.
+            sequence_number (int, optional): Twilio SequenceNumber of the callback.
+
+        Returns:
+            bool: True the first time an event is seen, False for a duplicate.
+        """
+        try:
+            self.collection.insert_one({
+                "call_sid": call_sid,
+                "call_status": call_status,
+                "sequence_number": sequence_number,
+                "received_at": datetime.utcnow()
+            })
+            return True
+        except DuplicateKeyError:
+            self.duplicates += 1
+            logger.info(f"Dropping duplicate {call_status} callback for CallSid {call_sid}")
+            return False
+
+    def release(self, call_sid, call_status, sequence_number=None):
+        """
+        Forget a recorded event whose processing failed, so Twilio's retry of it is handled.
+
+        Args:
+            call_sid (str): Twilio CallSid.
+            call_status (str): Twilio CallStatus.
+            sequence_number (int, optional): Twilio SequenceNumber of the callback.
+        """
+        self.collection.delete_one({
+            "call_sid": call_sid,
+            "call_status": call_status,
+            "sequence_number": sequence_number
+        })
@@ -0,0 +1,97 @@
+# services/twilio_fake_transport.py
+
+import json
+import re
+import threading
+import uuid
+
+from twilio.http import HttpClient
+from twilio.http.response import Response
+
+
+class FakeTwilioHttpClient(HttpClient):
+    """
+    Local stand-in for the Twilio REST transport, for tests and offline runs.
+
+    Answers the subset of the API the app uses (creating calls, listing and
+    fetching recordings) without any network access, and keeps every request
+    it received in ``requests`` so callers can assert on them.
+    """
+    CALLS_PATH = re.compile(r"/Accounts/(?P<account>[^/]+)/Calls\.json$")
+    RECORDINGS_PATH = re.compile(r"/Accounts/(?P<account>[^/]+)/Recordings\.json$")
+    RECORDING_PATH = re.compile(r"/Accounts/(?P<account>[^/]+)/Recordings/(?P<sid>[^/.]+)\.json$")
+
+    def __init__(self, record_calls=True):
+        """
+        Args:
+            record_calls (bool): Whether every created call gets a recording.
+        """
+        self.record_calls = record_calls
+        self.requests = []
+        self.calls = {}
+        self.recordings = {}
+        self._lock = threading.Lock()
+
+    def request(self, method, url, params=None, data=None, headers=None, auth=None,
+                timeout=None, allow_redirects=False):
+        method = method.upper()
+        with self._lock:
+            self.requests.append({"method": method, "url": url, "params": params, "data": data})
+
+            match = self.CALLS_PATH.search(url)
+            if match and method == "POST":
+                return self._json(201, self._create_call(match.group("account"), data or {}))
+
+            match = self.RECORDINGS_PATH.search(url)
+            if match and method == "GET":
+                call_sid = (params or {}).get("CallSid")
+                recordings = [
+                    recording for recording in self.recordings.values()
+                    if call_sid is None or recording["call_sid"] == call_sid
+                ]
+                return self._json(200, {
+                    "recordings": recordings,
+                    "first_page_uri": url,
+                    "next_page_uri": None,
+                    "previous_page_uri": None,
+                    "page": 0,
+                    "page_size": 50,
+                    "uri": url
+                })
+
+            match = self.RECORDING_PATH.search(url)
+            if match and method == "GET":
+                recording = self.recordings.get(match.group("sid"))
+                if recording:
+                    return self._json(200, recording)
+
+        return self._json(404, {"code": 20404, "message": "The requested resource was not found", "status": 404})
+
+    def _create_call(self, account_sid, data):
+        call_sid = f"CA{uuid.uuid4().hex}"
+        call = {
+            "sid": call_sid,
+            "account_sid": account_sid,
+            "to": data.get("To"),
+            "from": data.get("From"),
+            "status": "queued",
+            "url": data.get("Url"),
+            "status_callback": data.get("StatusCallback"),
+            "uri": f"/2010-04-01/Accounts/{account_sid}/Calls/{call_sid}.json"
+        }
+        self.calls[call_sid] = call
+
+        if self.record_calls:
+            recording_sid = f"RE{uuid.uuid4().hex}"
+            self.recordings[recording_sid] = {
+                "sid": recording_sid,
+                "account_sid": account_sid,
+                "call_sid": call_sid,
+                "status": "completed",
+                "uri": f"/2010-04-01/Accounts/{account_sid}/Recordings/{recording_sid}.json"
+            }
+        return call
+
+    @staticmethod
+    def _json(status_code, payload):
+        return Response(status_code, json.dumps(payload), headers={"Content-Type": "application/json"})
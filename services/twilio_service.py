@@ -1,26 +1,97 @@
 # services/twilio_service.py
 
 from twilio.rest import Client
+from twilio.http.http_client import TwilioHttpClient
+from requests.adapters import HTTPAdapter
 from flask import current_app
 import logging
+import time
+import requests
+
+from services.twilio_fake_transport import FakeTwilioHttpClient
+from utils.recording_buffer import RecordingBuffer, RecordingTooLarge
+from utils.metrics import track_dependency, DEPENDENCY_ERRORS
+
+# Size of the pieces a recording is streamed in
+RECORDING_CHUNK_SIZE = 64 * 1024
+
+
+def create_twilio_client(config):
+    """
+    Build the application-wide Twilio REST client.
+
+    The client keeps one pooled HTTP session, so keep-alive connections and TLS
+    sessions are reused across calls and threads instead of being set up for
+    every request.
+
+    Args:
+        config (dict): Application config.
+
+    Returns:
+        Client: Twilio client backed by a pooled session, or by the local fake
+        transport when TWILIO_FAKE_TRANSPORT is set.
+    """
+    if config.get("TWILIO_FAKE_TRANSPORT"):
+        http_client = FakeTwilioHttpClient()
+    else:
+        http_client = TwilioHttpClient(timeout=config.get("TWILIO_TIMEOUT_SECONDS"))
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=config.get("TWILIO_POOL_SIZE", 10),
+            max_retries=config.get("TWILIO_MAX_RETRIES", 0)
+        )
+        http_client.session.mount("https://", adapter)
+        http_client.session.mount("http://", adapter)
+
+    client = Client(
+        config.get("TWILIO_ACCOUNT_SID"),
+        config.get("TWILIO_AUTH_TOKEN"),
+        http_client=http_client
+    )
+    client.api.base_url = config.get("TWILIO_API_BASE", "https://api.twilio.com").rstrip("/")
+    return client
+
+
+def create_recording_session(config):
+    """
+    Build the pooled HTTP session recordings are downloaded with.
+
+    Args:
+        config (dict): Application config.
+
+    Returns:
+        requests.Session: Session whose keep-alive connections are shared by all downloads.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=config.get("TWILIO_POOL_SIZE", 10),
+        max_retries=config.get("TWILIO_MAX_RETRIES", 0)
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
 
 class TwilioService:
     def __init__(self):
         self.account_sid = current_app.config.get("TWILIO_ACCOUNT_SID")
         self.auth_token = current_app.config.get("TWILIO_AUTH_TOKEN")
         self.from_number = current_app.config.get("TWILIO_PHONE_NUMBER")
-        self.client = Client(self.account_sid, self.auth_token)
+        # Shared, thread-safe client created once in create_app
+        self.client = current_app.twilio_client
 
     def initiate_call(self, to_number, twiml_url, status_callback_url):
         try:
-            call = self.client.calls.create(
-                to=to_number,
-                from_=self.from_number,
-                url=twiml_url,
-                status_callback=status_callback_url,
-                status_callback_event=['initiated', 'ringing', 'answered', 'completed'],
-                record=True  # Enable recording
-            )
+            with track_dependency("twilio", "initiate_call"):
+                call = self.client.calls.create(
+                    to=to_number,
+                    from_=self.from_number,
+                    url=twiml_url,
+                    status_callback=status_callback_url,
+                    status_callback_event=['initiated', 'ringing', 'answered', 'completed'],
+                    record=True  # Enable recording
+                )
             return call.sid
         except Exception as e:
             logging.error(f"Twilio Error initiating call to {to_number}: {str(e)}")
@@ -28,7 +99,8 @@ class TwilioService:
 
     def fetch_recording_sid(self, call_sid):
         try:
-            recordings = self.client.recordings.list(call_sid=call_sid)
+            with track_dependency("twilio", "fetch_recording_sid"):
+                recordings = self.client.recordings.list(call_sid=call_sid)
             if recordings:
                 return recordings[0].sid
             else:
@@ -36,3 +108,55 @@ class TwilioService:
         except Exception as e:
             logging.error(f"Twilio Error fetching recording for CallSid {call_sid}: {str(e)}")
             raise e
+
+    def download_recording(self, recording_sid):
+        """
+        Stream the MP3 of a recording into a RecordingBuffer.
+
+        The download runs over the app's pooled recording session, in chunks, so
+        only up to RECORDING_MEMORY_LIMIT_KB of it is held in memory. Recordings
+        larger than RECORDING_MAX_MB, or downloads slower than
+        RECORDING_DOWNLOAD_TIMEOUT_SECONDS, are abandoned.
+
+        Args:
+            recording_sid (str): Twilio Recording SID.
+
+        Returns:
+            RecordingBuffer: Buffer named "recording.mp3", or None if the download failed.
+                The caller must close it.
+        """
+        config = current_app.config
+        timeout = config.get("RECORDING_DOWNLOAD_TIMEOUT_SECONDS", 60)
+        with track_dependency("twilio", "fetch_recording"):
+            recording = self.client.recordings(recording_sid).fetch()
+        api_base = config.get("TWILIO_API_BASE", "https://api.twilio.com").rstrip("/")
+        recording_url = f"{api_base}{recording.uri.replace('.json', '.mp3')}"
+
+        # The name lets OpenAI infer the audio format
+        buffer = RecordingBuffer(
+            name="recording.mp3",
+            max_memory=config.get("RECORDING_MEMORY_LIMIT_KB", 1024) * 1024,
+            max_size=config.get("RECORDING_MAX_MB", 100) * 1024 * 1024
+        )
+        deadline = time.monotonic() + timeout
+        try:
+            with track_dependency("twilio", "download_recording"):
+                with current_app.recording_session.get(
+                    recording_url, auth=(self.account_sid, self.auth_token), stream=True, timeout=timeout
+                ) as response:
+                    if response.status_code != 200:
+                        DEPENDENCY_ERRORS.inc("twilio", "download_recording")
+                        logging.error(f"Twilio Error downloading recording {recording_sid}: HTTP {response.status_code}")
+                        buffer.close()
+                        return None
+
+                    for chunk in response.iter_content(chunk_size=RECORDING_CHUNK_SIZE):
+                        buffer.write(chunk)
+                        if time.monotonic() > deadline:
+                            raise TimeoutError(f"Download took longer than {timeout} seconds")
+            buffer.finish()
+            return buffer
+        except (requests.RequestException, RecordingTooLarge, TimeoutError) as e:
+            logging.error(f"Twilio Error downloading recording {recording_sid}: {str(e)}")
+            buffer.close()
+            return None
@@ -0,0 +1,46 @@
+# tests/conftest.py
+
+import os
+
+import pytest
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+TEST_MONGO_URI = os.environ.get("TEST_MONGO_URI", "mongodb://localhost:27017/hour4u_test")
+
+
+@pytest.fixture
+def db():
+    """
+    A real, emptied MongoDB database; skips the test when no mongod is reachable at TEST_MONGO_URI.
+    """
+    client = MongoClient(TEST_MONGO_URI, serverSelectionTimeoutMS=500)
+    try:
+        client.admin.command("ping")
+    except PyMongoError:
+        pytest.skip(f"No mongod reachable at {TEST_MONGO_URI}")
+
+    database = client.get_default_database()
+    # The database is dropped afterwards; never let the test touch a real one
+    if "test" not in database.name:
+        pytest.skip(f"Refusing to use database '{database.name}'; use a name containing 'test'")
+    client.drop_database(database.name)
+    yield database
+    client.drop_database(database.name)
+    client.close()
+
+
+@pytest.fixture
+def mock_db(monkeypatch):
+    """
+    An in-memory mongomock database, for logic that needs no server-side behaviour mongomock lacks.
+    """
+    mongomock = pytest.importorskip("mongomock")
+
+    # pymongo 4.11+ passes a sort option to bulk_write update operations, which mongomock predates
+    builder = mongomock.collection.BulkOperationBuilder
+    for name in ("add_update", "add_replace"):
+        method = getattr(builder, name)
+        monkeypatch.setattr(builder, name, lambda self, *args, _method=method, sort=None, **kwargs: _method(self, *args, **kwargs))
+
+    return mongomock.MongoClient().get_database("hour4u_test")
@@ -0,0 +1,37 @@
+# tests/test_analysis_cache.py
+
+from types import SimpleNamespace
+
+import pytest
+
+from services.analysis_cache import CallAnalysisCache
+
+VERSION = "dual:whisper-1"
+
+
+@pytest.fixture
+def cache(mock_db):
+    return CallAnalysisCache(SimpleNamespace(mongo=SimpleNamespace(db=mock_db)))
+
+
+def test_lookup_by_hash_remembers_the_recording_sid(cache):
+    cache.store_transcription(VERSION, "RE1", "abc", "namaste", "hello")
+
+    assert cache.lookup(VERSION, recording_sid="RE2") is None
+    assert cache.lookup(VERSION, recording_sid="RE2", audio_sha256="abc")["Transcription_English"] == "hello"
+    assert cache.lookup(VERSION, recording_sid="RE2")["Transcription_English"] == "hello"
+
+
+def test_lookups_are_counted_by_the_caller(cache):
+    cache.lookup(VERSION, recording_sid="RE1")
+    cache.lookup(VERSION, recording_sid="RE1", audio_sha256="abc")
+    cache.record_lookup(False)
+    cache.record_lookup(True)
+
+    assert cache.stats() == {"hits": 1, "misses": 1}
+
+
+def test_other_versions_miss(cache):
+    cache.store_transcription(VERSION, "RE1", "abc", "namaste", "hello")
+
+    assert cache.lookup("single:whisper-1", recording_sid="RE1") is None
@@ -0,0 +1,139 @@
+# tests/test_bulk_call_service.py
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+
+import services.bulk_call_service as bulk_call_service
+from services.bulk_call_service import BulkCallService
+from utils.rate_limiter import TokenBucket
+from utils.shift_time import IST
+
+
+class RecordingCallService:
+    dialed = []
+
+    def initiate_call(self, record, followup_type=None):
+        if record.get("Name") == "unreachable":
+            raise RuntimeError("Twilio rejected the number")
+        self.dialed.append(record["Name"])
+
+
+@pytest.fixture
+def app(mock_db, monkeypatch):
+    monkeypatch.setattr(bulk_call_service, "CallService", RecordingCallService)
+    RecordingCallService.dialed = []
+    app = Flask(__name__)
+    app.mongo = SimpleNamespace(db=mock_db)
+    return app
+
+
+@pytest.fixture
+def service(app, monkeypatch):
+    service = BulkCallService(app, rate_limiter=TokenBucket(rate=1000, capacity=1000), stale_seconds=300)
+    # Items are dialed by the tests, one at a time
+    monkeypatch.setattr(service, "_ensure_workers", lambda: None)
+    return service
+
+
+def champ(name, starts_in):
+    shift_start = datetime.now(IST) + starts_in
+    return {
+        "Name": name,
+        "sheet_name": "Site 1",
+        "date": shift_start.strftime("%Y-%m-%d"),
+        "Shift Timings": f"{shift_start.strftime('%H:%M')}-23:59"
+    }
+
+
+def dial_all(service):
+    while (item := service._claim()) is not None:
+        service._dial(item)
+
+
+def test_the_earliest_shift_is_dialed_first_and_started_shifts_are_skipped(app, service):
+    app.mongo.db.champ_details.insert_many([
+        champ("late", timedelta(hours=6)),
+        champ("started", -timedelta(hours=1)),
+        champ("soon", timedelta(hours=2)),
+    ])
+
+    batch = service.start_batch({"sheet_name": "Site 1"})
+    dial_all(service)
+
+    assert RecordingCallService.dialed == ["soon", "late"]
+    progress = service.progress(service.get_batch(batch["_id"]))
+    assert (progress["status"], progress["dialed"], progress["skipped"], progress["pending"]) == ("completed", 2, 1, 0)
+
+
+def test_failed_calls_are_reported_on_the_batch(app, service):
+    app.mongo.db.champ_details.insert_many([champ("unreachable", timedelta(hours=2)), champ("ok", timedelta(hours=3))])
+
+    batch = service.start_batch({"sheet_name": "Site 1"})
+    dial_all(service)
+
+    progress = service.progress(service.get_batch(batch["_id"]))
+    assert (progress["status"], progress["dialed"], progress["failed"]) == ("completed", 1, 1)
+    assert progress["errors"][0]["error"] == "Twilio rejected the number"
+
+
+def test_a_batch_being_filled_is_not_completed(app, service, monkeypatch):
+    monkeypatch.setattr(bulk_call_service, "BATCH_INSERT_CHUNK", 2)
+    app.mongo.db.champ_details.insert_many([
+        champ("started", -timedelta(hours=1)),
+        champ("first", timedelta(hours=1)),
+        champ("second", timedelta(hours=2)),
+    ])
+    add_items = service._add_items
+    states = []
+
+    def add_items_then_dial(batch, chunk):
+        add_items(batch, chunk)
+        # A worker finishes the first chunk before the second one is inserted
+        dial_all(service)
+        states.append(service.get_batch(batch["_id"])["status"])
+
+    monkeypatch.setattr(service, "_add_items", add_items_then_dial)
+    batch = service.start_batch({"sheet_name": "Site 1"})
+
+    assert states == ["running", "running"]
+    assert RecordingCallService.dialed == ["first", "second"]
+    assert service.progress(batch)["status"] == "completed"
+
+
+def test_startup_settles_interrupted_batches(app, service, monkeypatch):
+    app.mongo.db.champ_details.insert_many([champ("dialing", timedelta(hours=1)), champ("pending", timedelta(hours=2))])
+    batch = service.start_batch({"sheet_name": "Site 1"})
+    # The process stopped right after claiming the first item, long ago
+    item = service._claim()
+    service.items.update_one({"_id": item["_id"]}, {"$set": {"claimed_at": datetime.utcnow() - timedelta(hours=1)}})
+
+    restarted = BulkCallService(app, rate_limiter=service.rate_limiter, stale_seconds=300)
+    resumed = []
+    monkeypatch.setattr(restarted, "_ensure_workers", lambda: resumed.append(True))
+    restarted.start()
+
+    assert resumed == [True]
+    batch = service.get_batch(batch["_id"])
+    assert (batch["status"], batch["failed"]) == ("running", 1)
+    assert RecordingCallService.dialed == []
+
+    dial_all(service)
+    assert service.progress(service.get_batch(batch["_id"]))["status"] == "completed"
+    assert RecordingCallService.dialed == ["pending"]
+
+
+def test_a_batch_interrupted_while_filling_is_failed_at_startup(app, service):
+    batch_id = service.collection.insert_one({
+        "query": {"sheet_name": "Site 1"}, "status": "running", "filling": True,
+        "filled_at": datetime.utcnow() - timedelta(hours=1),
+        "total": 3, "dialed": 0, "failed": 0, "skipped": 0, "errors": []
+    }).inserted_id
+    service.items.insert_one({"batch_id": batch_id, "record_id": 1, "priority": 0, "status": "dialed"})
+
+    service.start()
+
+    batch = service.get_batch(batch_id)
+    assert (batch["status"], batch["dialed"]) == ("failed", 1)
@@ -0,0 +1,93 @@
+# tests/test_call_log_writer.py
+
+from types import SimpleNamespace
+
+import pytest
+
+from services.call_log_writer import CallLogWriteBuffer
+
+
+@pytest.fixture
+def app(mock_db):
+    mock_db.call_logs.insert_many([{"call_sid": "CA1"}, {"call_sid": "CA2"}])
+    return SimpleNamespace(mongo=SimpleNamespace(db=mock_db))
+
+
+@pytest.fixture
+def writer(app):
+    # Flushed by the tests themselves; the interval never elapses
+    writer = CallLogWriteBuffer(app, flush_interval_ms=60000, max_pending=1000)
+    writer.start()
+    yield writer
+    writer.stop()
+
+
+def call_log(app, call_sid):
+    return app.mongo.db.call_logs.find_one({"call_sid": call_sid}, {"_id": 0})
+
+
+def test_updates_of_a_call_are_merged_into_one_write(writer, app):
+    writer.update("CA1", {"recording_status": "pending", "transcription_status": "pending"})
+    writer.update("CA1", {"recording_status": "done"})
+
+    assert call_log(app, "CA1") == {"call_sid": "CA1"}
+    assert writer.flush() == 1
+    assert call_log(app, "CA1") == {"call_sid": "CA1", "recording_status": "done", "transcription_status": "pending"}
+
+
+def test_the_highest_ranked_buffered_status_wins(writer, app):
+    writer.update_status("CA1", 3, {"status": "completed"})
+    writer.update_status("CA1", 1, {"status": "ringing"})
+    writer.flush()
+
+    assert call_log(app, "CA1")["status"] == "completed"
+
+
+def test_a_late_status_never_moves_a_call_back(writer, app):
+    writer.update_status("CA1", 3, {"status": "completed"})
+    writer.flush()
+
+    writer.update_status("CA1", 1, {"status": "ringing"})
+    writer.flush()
+
+    assert call_log(app, "CA1") == {"call_sid": "CA1", "status": "completed", "status_rank": 3}
+
+
+def test_updates_are_written_through_until_started(app):
+    writer = CallLogWriteBuffer(app)
+
+    writer.update("CA1", {"recording_status": "done"})
+
+    assert call_log(app, "CA1")["recording_status"] == "done"
+
+
+class FailingOnce:
+    """
+    call_logs collection whose first bulk_write fails, as during a primary election.
+    """
+    def __init__(self, collection):
+        self.collection = collection
+        self.failed = False
+
+    def bulk_write(self, operations, ordered=True):
+        if not self.failed:
+            self.failed = True
+            raise ConnectionError("not primary")
+        return self.collection.bulk_write(operations, ordered=ordered)
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+
+def test_a_failed_flush_is_requeued_behind_newer_updates(writer, app):
+    app.mongo.db = SimpleNamespace(call_logs=FailingOnce(app.mongo.db.call_logs))
+    writer.update("CA1", {"recording_status": "pending", "transcription_status": "pending"})
+    writer.update_status("CA2", 2, {"status": "picked"})
+
+    assert writer.flush() == 0
+    writer.update("CA1", {"recording_status": "done"})
+    writer.update_status("CA2", 1, {"status": "ringing"})
+    assert writer.flush() == 2
+
+    assert call_log(app, "CA1") == {"call_sid": "CA1", "recording_status": "done", "transcription_status": "pending"}
+    assert call_log(app, "CA2")["status"] == "picked"
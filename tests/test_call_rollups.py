@@ -0,0 +1,43 @@
+# tests/test_call_rollups.py
+
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from services.call_rollups import CallRollups
+
+
+@pytest.fixture
+def rollups(mock_db):
+    app = SimpleNamespace(mongo=SimpleNamespace(db=mock_db), call_log_writer=SimpleNamespace(running=False))
+    mock_db.call_logs.insert_one({
+        "call_sid": "CA1", "sheet_name": "Site 1", "Work Description": "Event usher",
+        "call_initiated_timestamp": datetime(2024, 1, 5, 10, 0)
+    })
+    return CallRollups(app)
+
+
+def intent_counts(rollups):
+    rollup = rollups.collection.find_one({"sheet_name": "Site 1", "call_date": "2024-01-05"})
+    return {intent: count for intent, count in rollup.get("intent", {}).items() if count}
+
+
+def test_a_reclassified_call_is_counted_once(rollups):
+    rollups.record_intents({"CA1": "yes"})
+    rollups.record_intents({"CA1": "yes"})
+
+    assert intent_counts(rollups) == {"yes": 1}
+
+
+def test_a_changed_intent_moves_the_call(rollups):
+    rollups.record_intents({"CA1": "yes"})
+    rollups.record_intents({"CA1": "no"})
+
+    assert intent_counts(rollups) == {"no": 1}
+
+
+def test_unknown_calls_are_not_counted(rollups):
+    rollups.record_intents({"CA404": "yes"})
+
+    assert rollups.collection.count_documents({}) == 0
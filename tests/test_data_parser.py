@@ -0,0 +1,121 @@
+# tests/test_data_parser.py
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.data_parser import DataParser, create_parse_pool
+
+REQUIRED_FIELDS = ['Name', 'Number', 'Shift Name', 'Shift Timings', 'Dress Code', 'Work Description', 'date']
+
+
+def roster_frame(rows):
+    return pd.DataFrame(rows, columns=REQUIRED_FIELDS, dtype=object)
+
+
+@pytest.fixture
+def parser():
+    return DataParser()
+
+
+def test_normalize_frame_matches_normalize_record(parser):
+    df = roster_frame([
+        # Number formats: 10 digits, 91 + 10 digits, 91-prefixed 10 digits, '+' prefixed, padded, other
+        [" Aarav Sharma ", "9876543210", "Morning Shift", "07:00 - 15:00", "Formal", "Event usher", "05/01/2024"],
+        ["Priya Verma", "919876543210", "Day Shift", "09:00-17:00", "Company T-shirt", "Retail billing", "2024-01-05"],
+        ["Rohan Gupta", "9123456789", "Evening", " 15:00 -23:00 ", "Formal", "Housekeeping", "13/01/2024"],
+        ["Kavya Singh", "+919876500000", "Night  Shift", "23:00-07:00", "Safety vest", "Delivery loading", "2024-01-13"],
+        ["Neha Patel", " 9876511111 ", "Shift", "09:00-17:00", "Formal", "Event usher", "05/01/2024"],
+        ["Ishaan Rao", "12345", "Day Shift Shift", "9:00-17:00", "Formal", "Event usher", "2024-01-05"],
+        # Numeric cells as Excel delivers them
+        ["Arjun Mehta", 9876522222, "Day Shift", "09:00-17:00", "Formal", "Event usher", datetime(2024, 1, 7)],
+        ["Vivaan Joshi", 919876533333, "Day Shift", "09:00-17:00", "Formal", "Event usher", "07-01-2024"],
+    ])
+
+    by_row = [parser.normalize_record(record, "Site 1") for record in df.to_dict(orient='records')]
+
+    assert parser.normalize_frame(df, "Site 1") == by_row
+
+
+def test_normalize_frame_date_formats(parser):
+    df = roster_frame([
+        ["A", "9876543210", "Day", "09:00-17:00", "Formal", "Usher", "05/01/2024"],
+        ["B", "9876543211", "Day", "09:00-17:00", "Formal", "Usher", "2024-01-05"],
+    ])
+
+    assert [record["date"] for record in parser.normalize_frame(df, "Site 1")] == ["2024-01-05", "2024-01-05"]
+
+
+def test_vectorized_and_row_parsing_agree_on_blank_cells(parser):
+    rows = [
+        ["Aarav Sharma", "9876543210", "Morning Shift", "07:00-15:00", "Formal", "Event usher", "05/01/2024"],
+        # Incomplete rows are skipped by both paths
+        ["Priya Verma", np.nan, "Day Shift", "09:00-17:00", "Formal", "Retail billing", "2024-01-05"],
+        ["Rohan Gupta", "9123456789", "Evening", "15:00-23:00", None, "Housekeeping", "13/01/2024"],
+        [np.nan] * len(REQUIRED_FIELDS),
+        # Whitespace-only cells are present and normalize to empty strings
+        ["  ", "9876511111", " ", "09:00-17:00", "  ", "Event usher", "05/01/2024"],
+    ]
+
+    vectorized = parser._parse_sheet(roster_frame(rows), "Site 1", REQUIRED_FIELDS, vectorized=True)
+    by_row = parser._parse_sheet(roster_frame(rows), "Site 1", REQUIRED_FIELDS, vectorized=False)
+
+    assert vectorized == by_row
+    assert [record["Name"] for record in vectorized] == ["Aarav Sharma", ""]
+
+
+def test_normalize_frame_invalid_date_raises(parser):
+    df = roster_frame([["A", "9876543210", "Day", "09:00-17:00", "Formal", "Usher", "not a date"]])
+
+    with pytest.raises(ValueError):
+        parser.normalize_frame(df, "Site 1")
+
+
+def write_roster(path, sheets=1):
+    from openpyxl import Workbook
+
+    workbook = Workbook()
+    workbook.remove(workbook.active)
+    for index in range(sheets):
+        worksheet = workbook.create_sheet(f"Site {index + 1}")
+        worksheet.append(REQUIRED_FIELDS)
+        worksheet.append(["Aarav Sharma", 9876543210, "Morning Shift", "07:00-15:00", "Formal", "Event usher", datetime(2024, 1, 5)])
+        # A blank Number cell makes pandas read the whole column as float
+        worksheet.append(["Priya Verma", None, "Day Shift", "09:00-17:00", "Formal", "Retail billing", "05/01/2024"])
+        worksheet.append(["Rohan Gupta", 919876543211, "Evening Shift", "15:00-23:00", "Formal", "Housekeeping", "2024-01-13"])
+        worksheet.append(["Kavya Singh", "+919876500000", "Night", "23:00-07:00", "Safety vest", "Delivery loading", "13/01/2024"])
+    workbook.save(path)
+    return path
+
+
+def test_streaming_and_dataframe_parsing_agree(parser, tmp_path):
+    path = write_roster(str(tmp_path / "roster.xlsx"))
+
+    streamed = [record for chunk in parser.iter_excel_chunks(path, REQUIRED_FIELDS, chunk_size=2) for record in chunk]
+
+    assert streamed == parser.parse_excel(path, REQUIRED_FIELDS)
+    assert streamed == parser.parse_excel(path, REQUIRED_FIELDS, vectorized=False)
+    assert [record["Number"] for record in streamed] == ["+919876543210", "+919876543211", "+919876500000"]
+
+
+def test_pool_parsing_matches_serial_parsing(parser, tmp_path):
+    path = write_roster(str(tmp_path / "roster.xlsx"), sheets=3)
+    pool = create_parse_pool(2)
+    try:
+        assert parser.parse_excel(path, REQUIRED_FIELDS, pool=pool) == parser.parse_excel(path, REQUIRED_FIELDS)
+    finally:
+        pool.shutdown()
+
+
+def test_small_workbooks_skip_the_pool(parser, tmp_path):
+    path = write_roster(str(tmp_path / "roster.xlsx"), sheets=3)
+
+    class UnusablePool:
+        def submit(self, *args, **kwargs):
+            raise AssertionError("workbook below min_parallel_rows was handed to the pool")
+
+    records = parser.parse_excel(path, REQUIRED_FIELDS, pool=UnusablePool(), min_parallel_rows=1000)
+
+    assert len(records) == 9
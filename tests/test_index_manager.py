@@ -0,0 +1,67 @@
+# tests/test_index_manager.py
+
+import pytest
+
+from blueprints.calls import BULK_CALL_FILTER_FIELDS
+from blueprints.records import BULK_FILTER_FIELDS
+from services.index_manager import IndexManager, INDEX_SPECS, QUERY_SHAPES, SELECTIVE_FILTER_FIELDS
+
+
+def bulk_filter_shapes():
+    """
+    Every two-field filter the bulk endpoints accept: a selective field, narrowed by any other filter field.
+    """
+    fields = set(BULK_CALL_FILTER_FIELDS.values()) | BULK_FILTER_FIELDS
+    return [
+        ("champ_details", {selective: "value", field: "value"}, None)
+        for selective in SELECTIVE_FILTER_FIELDS for field in sorted(fields)
+    ]
+
+
+def test_every_query_shape_is_covered_by_an_index(db):
+    manager = IndexManager(db)
+    assert manager.ensure_indexes() == []
+
+    assert manager.uncovered_queries() == []
+
+
+def test_every_bulk_filter_is_covered_by_an_index(db):
+    manager = IndexManager(db, query_shapes=bulk_filter_shapes())
+    manager.ensure_indexes()
+
+    assert manager.uncovered_queries() == []
+
+
+def test_selective_filter_fields_lead_an_index():
+    leading_fields = {spec["keys"][0][0] for spec in INDEX_SPECS["champ_details"]}
+
+    assert set(SELECTIVE_FILTER_FIELDS) <= leading_fields
+    assert set(SELECTIVE_FILTER_FIELDS) <= set(BULK_CALL_FILTER_FIELDS.values()) | BULK_FILTER_FIELDS
+
+
+def test_every_queried_collection_declares_indexes():
+    assert {collection for collection, _, _ in QUERY_SHAPES} <= set(INDEX_SPECS)
+
+
+def test_indexes_created_in_this_run_are_not_reported_unused(db):
+    manager = IndexManager(db)
+    manager.ensure_indexes()
+
+    report = manager.report()
+
+    assert report["missing"] == []
+    assert report["unused"] == []
+    # A later process that created nothing reports indexes without accesses
+    assert IndexManager(db).report()["unused"]
+
+
+def test_unique_index_over_duplicates_fails_loudly(mock_db):
+    mock_db.champ_details.insert_many([
+        {"Number": "+919876543210", "date": "2024-01-05", "sheet_name": "Site 1", "Shift Timings": "07:00-15:00"},
+        {"Number": "+919876543210", "date": "2024-01-05", "sheet_name": "Site 1", "Shift Timings": "09:00-17:00"},
+    ])
+
+    with pytest.raises(RuntimeError, match="champ_number_date_sheet"):
+        IndexManager(mock_db).ensure_indexes()
+
+    assert IndexManager(mock_db).duplicate_keys("champ_details", INDEX_SPECS["champ_details"][0]["keys"])[0]["count"] == 2
@@ -0,0 +1,55 @@
+# tests/test_recording_buffer.py
+
+import hashlib
+import os
+
+import pytest
+
+from utils.recording_buffer import RecordingBuffer, RecordingTooLarge
+
+
+def test_small_recordings_stay_in_memory():
+    with RecordingBuffer(max_memory=10) as buffer:
+        buffer.write(b"12345")
+        buffer.write(b"67890")
+        buffer.finish()
+
+        assert buffer.in_memory
+        assert buffer.open().read() == b"1234567890"
+        assert buffer.open().name == "recording.mp3"
+
+
+def test_recordings_past_the_memory_limit_spill_to_disk():
+    buffer = RecordingBuffer(max_memory=10)
+    buffer.write(b"12345")
+    buffer.write(b"67890")
+    assert buffer.in_memory
+
+    buffer.write(b"x")
+    buffer.write(b"yz")
+    buffer.finish()
+
+    assert not buffer.in_memory
+    path = buffer._path
+    assert os.path.getsize(path) == 13
+    with buffer.open() as first, buffer.open() as second:
+        assert first.read() == b"1234567890xyz"
+        assert second.read() == b"1234567890xyz"
+    assert buffer.sha256 == hashlib.sha256(b"1234567890xyz").hexdigest()
+
+    buffer.close()
+    assert not os.path.exists(path)
+
+
+def test_size_cap_rejects_oversized_recordings():
+    buffer = RecordingBuffer(max_memory=4, max_size=8)
+    buffer.write(b"1234")
+    buffer.write(b"5678")
+
+    with pytest.raises(RecordingTooLarge):
+        buffer.write(b"9")
+
+    path = buffer._path
+    assert os.path.exists(path)
+    buffer.close()
+    assert not os.path.exists(path)
@@ -0,0 +1,132 @@
+# tests/test_records.py
+
+from types import SimpleNamespace
+
+import pytest
+from bson.objectid import ObjectId
+from flask import Flask
+
+from blueprints.records import records_bp, encode_cursor, decode_cursor
+from services.champ_cache import ChampLookupCache
+
+
+@pytest.fixture
+def app(mock_db):
+    app = Flask(__name__)
+    app.mongo = SimpleNamespace(db=mock_db)
+    app.champ_cache = ChampLookupCache()
+    app.register_blueprint(records_bp)
+    mock_db.champ_details.insert_many([
+        {"Name": f"Champ {index}", "Number": f"+91987654{index:04d}", "sheet_name": "Site 1" if index % 2 else "Site 2",
+         "Work Description": "Event usher", "date": "2024-01-05"}
+        for index in range(7)
+    ])
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def test_cursor_round_trip():
+    record_id = ObjectId()
+
+    token = encode_cursor(str(record_id))
+
+    assert "=" not in token
+    assert decode_cursor(token) == record_id
+
+
+@pytest.mark.parametrize("token", ["", "not-a-cursor", encode_cursor("123")])
+def test_malformed_cursors_are_rejected(token):
+    with pytest.raises(ValueError):
+        decode_cursor(token)
+
+
+def fetch_all(client, **params):
+    names, pages, cursor = [], 0, None
+    while True:
+        query = dict(params, **({"cursor": cursor} if cursor else {}))
+        data = client.get("/records", query_string=query).get_json()["data"]
+        names.extend(record["Name"] for record in data["records"])
+        pages += 1
+        cursor = data["next_cursor"]
+        if cursor is None:
+            return names, pages
+
+
+def test_keyset_pages_cover_every_record_once(client):
+    names, pages = fetch_all(client, per_page=3)
+
+    assert names == [f"Champ {index}" for index in range(7)]
+    assert pages == 3
+
+
+def test_a_full_last_page_has_no_next_cursor(client):
+    names, pages = fetch_all(client, per_page=7)
+
+    assert len(names) == 7 and pages == 1
+
+
+def test_keyset_pages_keep_their_filter(client):
+    names, _ = fetch_all(client, per_page=2, sheet_name="Site 1")
+
+    assert names == ["Champ 1", "Champ 3", "Champ 5"]
+
+
+def test_an_invalid_cursor_is_a_bad_request(client):
+    response = client.get("/records", query_string={"cursor": "not-a-cursor"})
+
+    assert response.status_code == 400
+
+
+def record_ids(app):
+    return {record["Name"]: str(record["_id"]) for record in app.mongo.db.champ_details.find({}, {"Name": 1})}
+
+
+def test_bulk_update_reports_every_item(app, client):
+    ids = record_ids(app)
+    missing_id = str(ObjectId())
+
+    response = client.patch("/records/bulk", json=[
+        {"id": ids["Champ 0"], "fields": {"Shift Timings": "09:00 - 17:00", "Number": "9876500000"}},
+        {"id": missing_id, "fields": {"Name": "Nobody"}},
+        {"id": "not-an-id", "fields": {"Name": "Nobody"}},
+        {"id": ids["Champ 1"], "fields": {"sheet_name": "Site 9"}},
+        {"id": ids["Champ 2"], "fields": {"date": "13/01/2024"}},
+    ])
+
+    assert response.status_code == 200
+    data = response.get_json()["data"]
+    assert [(result["index"], result["status"]) for result in data["results"]] == [
+        (0, "updated"), (1, "not_found"), (2, "invalid"), (3, "invalid"), (4, "updated")
+    ]
+    assert (data["matched_count"], data["modified_count"]) == (2, 2)
+
+    champ = app.mongo.db.champ_details.find_one({"Name": "Champ 0"})
+    # Values are normalized as uploaded records are
+    assert (champ["Shift Timings"], champ["Number"]) == ("09:00-17:00", "+919876500000")
+    assert app.mongo.db.champ_details.find_one({"Name": "Champ 2"})["date"] == "2024-01-13"
+    assert app.mongo.db.champ_details.count_documents({"sheet_name": "Site 9"}) == 0
+
+
+def test_bulk_update_by_filter(app, client):
+    response = client.patch("/records/bulk", json={"filter": {"sheet_name": "Site 1"}, "$set": {"Dress Code": " Formal "}})
+
+    assert response.get_json()["data"]["modified_count"] == 3
+    assert app.mongo.db.champ_details.count_documents({"Dress Code": "Formal"}) == 3
+
+
+@pytest.mark.parametrize("body", [
+    # Operators can't be smuggled in through filter values
+    {"filter": {"sheet_name": {"$ne": ""}}, "$set": {"Dress Code": "Formal"}},
+    # A filter without an indexed field would scan every record
+    {"filter": {"Dress Code": "Casual"}, "$set": {"Dress Code": "Formal"}},
+    {"filter": {"sheet_name": "Site 1"}, "$set": {"_id": "x"}},
+])
+def test_bulk_update_rejects_unsafe_filters(app, client, body):
+    response = client.patch("/records/bulk", json=body)
+
+    assert response.status_code == 400
+    assert app.mongo.db.champ_details.count_documents({"Dress Code": "Formal"}) == 0
@@ -0,0 +1,101 @@
+# tests/test_scheduler_service.py
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+
+from services.scheduler_service import FollowUpScheduler
+
+
+@pytest.fixture
+def app(mock_db):
+    app = Flask(__name__)
+    app.mongo = SimpleNamespace(db=mock_db)
+    return app
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+@pytest.fixture
+def scheduler(app, calls):
+    scheduler = FollowUpScheduler(
+        app, handler=lambda record_id, followup_type: calls.append((record_id, followup_type)),
+        misfire_grace_seconds=300, stale_seconds=600
+    )
+    yield scheduler
+    scheduler.stop()
+
+
+def test_a_job_is_claimed_and_run_once(scheduler, calls):
+    job_id = scheduler.schedule("record-1", "1st follow-up", datetime.utcnow())
+
+    scheduler._execute(str(job_id))
+    # Another process popping the same job finds it already claimed
+    scheduler._execute(str(job_id))
+
+    assert calls == [("record-1", "1st follow-up")]
+    job = scheduler.collection.find_one({"_id": job_id})
+    assert (job["status"], job["attempts"]) == ("done", 1)
+
+
+def test_a_cancelled_job_never_runs(scheduler, calls):
+    job_id = scheduler.schedule("record-1", "1st follow-up", datetime.utcnow())
+
+    assert scheduler.cancel_for_record("record-1") == 1
+    scheduler._execute(str(job_id))
+
+    assert calls == []
+
+
+def test_a_failing_handler_marks_the_job_failed(app):
+    def handler(record_id, followup_type):
+        raise RuntimeError("Twilio unavailable")
+
+    scheduler = FollowUpScheduler(app, handler=handler)
+    job_id = scheduler.schedule("record-1", "1st follow-up", datetime.utcnow())
+
+    scheduler._execute(str(job_id))
+
+    job = scheduler.collection.find_one({"_id": job_id})
+    assert (job["status"], job["error"]) == ("failed", "Twilio unavailable")
+
+
+def test_abandoned_jobs_are_recovered(scheduler, app):
+    long_ago = datetime.utcnow() - timedelta(hours=1)
+    jobs = scheduler.collection
+    placed, not_placed, recent = jobs.insert_many([
+        {"record_id": "placed", "followup_type": "1st follow-up", "status": "running", "started_at": long_ago,
+         "run_at": long_ago},
+        {"record_id": "not-placed", "followup_type": "1st follow-up", "status": "running", "started_at": long_ago,
+         "run_at": datetime.utcnow() + timedelta(hours=1)},
+        {"record_id": "recent", "followup_type": "1st follow-up", "status": "running", "started_at": datetime.utcnow(),
+         "run_at": datetime.utcnow()},
+    ]).inserted_ids
+    app.mongo.db.call_logs.insert_one({
+        "record_id": "placed", "followup_type": "1st follow-up",
+        "call_initiated_timestamp": long_ago + timedelta(seconds=5)
+    })
+
+    scheduler._recover_abandoned()
+
+    assert jobs.find_one({"_id": placed})["status"] == "done"
+    assert jobs.find_one({"_id": not_placed})["status"] == "pending"
+    # Still within stale_seconds: its process may be placing the call right now
+    assert jobs.find_one({"_id": recent})["status"] == "running"
+
+
+def test_jobs_overdue_past_the_grace_period_are_missed_at_startup(scheduler, calls):
+    overdue = scheduler.schedule("overdue", "1st follow-up", datetime.utcnow() - timedelta(hours=1))
+    upcoming = scheduler.schedule("upcoming", "1st follow-up", datetime.utcnow() + timedelta(hours=1))
+
+    scheduler.start()
+    scheduler.stop()
+
+    assert scheduler.collection.find_one({"_id": overdue})["status"] == "missed"
+    assert scheduler.collection.find_one({"_id": upcoming})["status"] == "pending"
+    assert calls == []
@@ -0,0 +1,75 @@
+# tests/test_status_ledger.py
+
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+
+from blueprints.calls import calls_bp
+from services.call_log_writer import CallLogWriteBuffer
+from services.index_manager import IndexManager, INDEX_SPECS
+from services.status_ledger import CallStatusLedger
+
+
+@pytest.fixture
+def ledger(mock_db):
+    IndexManager(mock_db, specs={"call_status_events": INDEX_SPECS["call_status_events"]}).ensure_indexes()
+    return CallStatusLedger(SimpleNamespace(mongo=SimpleNamespace(db=mock_db)))
+
+
+def test_a_redelivered_event_is_a_duplicate(ledger):
+    assert ledger.record("CA1", "completed", 4) is True
+    assert ledger.record("CA1", "completed", 4) is False
+    # Another status, or another sequence number of the same status, is a new event
+    assert ledger.record("CA1", "ringing", 2) is True
+    assert ledger.record("CA1", "completed", 5) is True
+    assert ledger.duplicates == 1
+
+
+def test_a_released_event_is_recorded_again(ledger):
+    ledger.record("CA1", "completed", 4)
+
+    ledger.release("CA1", "completed", 4)
+
+    assert ledger.record("CA1", "completed", 4) is True
+
+
+class FlakyPipeline:
+    def __init__(self, failures):
+        self.failures = failures
+        self.enqueued = []
+
+    def enqueue(self, call_sid):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("post_call_jobs unavailable")
+        self.enqueued.append(call_sid)
+
+
+@pytest.fixture
+def client(mock_db, ledger):
+    app = Flask(__name__)
+    app.mongo = SimpleNamespace(db=mock_db)
+    app.status_ledger = ledger
+    app.call_log_writer = CallLogWriteBuffer(app)
+    app.post_call_pipeline = FlakyPipeline(failures=1)
+    app.call_rollups = SimpleNamespace(record_status=lambda call_sid, mapped_status: None)
+    app.register_blueprint(calls_bp)
+    mock_db.call_logs.insert_one({"call_sid": "CA1"})
+    return app.test_client()
+
+
+COMPLETED = {"CallSid": "CA1", "CallStatus": "completed", "SequenceNumber": "4", "CallDuration": "31"}
+
+
+def test_a_failed_callback_is_processed_when_twilio_retries_it(client):
+    pipeline = client.application.post_call_pipeline
+
+    assert client.post("/call_status_callback", data=COMPLETED).status_code == 500
+    assert client.post("/call_status_callback", data=COMPLETED).status_code == 204
+    # The retry was handled; a further redelivery is dropped
+    assert client.post("/call_status_callback", data=COMPLETED).status_code == 204
+
+    assert pipeline.enqueued == ["CA1"]
+    call_log = client.application.mongo.db.call_logs.find_one({"call_sid": "CA1"})
+    assert (call_log["call_status"], call_log["Call Duration (seconds)"]) == ("completed", 31)
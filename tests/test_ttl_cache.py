@@ -0,0 +1,83 @@
+# tests/test_ttl_cache.py
+
+import pytest
+
+import utils.ttl_cache
+from services.champ_cache import ChampLookupCache
+from utils.ttl_cache import TTLCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(utils.ttl_cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_entries_expire_after_ttl(clock):
+    evicted = []
+    cache = TTLCache(maxsize=10, ttl=60, on_evict=lambda key, value: evicted.append(key))
+    cache.set("a", 1)
+
+    clock[0] += 59
+    assert cache.get("a") == 1
+
+    clock[0] += 1
+    assert cache.get("a") is None
+    assert evicted == ["a"]
+    assert cache.stats() == {"size": 0, "hits": 1, "misses": 1}
+
+
+def test_set_restarts_the_ttl(clock):
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", 1)
+    clock[0] += 50
+    cache.set("a", 2)
+    clock[0] += 50
+
+    assert cache.get("a") == 2
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    evicted = []
+    cache = TTLCache(maxsize=2, ttl=60, on_evict=lambda key, value: evicted.append((key, value)))
+    cache.set("a", 1)
+    cache.set("b", 2)
+    # Reading "a" makes "b" the least recently used entry
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert evicted == [("b", 2)]
+    assert cache.get("b", "missing") == "missing"
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_champ_cache_forgets_evicted_keys(clock):
+    cache = ChampLookupCache(maxsize=2, ttl=60)
+    cache.put({"_id": "r1", "Number": "+919876543210", "Name": "Aarav"}, call_sid="CA1")
+    # Evicts both keys of r1
+    cache.put({"_id": "r2", "Number": "+919876500000", "Name": "Priya"}, call_sid="CA2")
+
+    assert cache.get_by_call("CA1") is None
+    assert cache.get_by_number("+919876543210") is None
+    assert cache._keys_by_record == {"r2": {("number", "+919876500000"), ("call", "CA2")}}
+    assert set(cache._keys_by_number) == {"+919876500000"}
+
+
+def test_champ_cache_invalidation_drops_every_key_of_a_record(clock):
+    cache = ChampLookupCache(maxsize=10, ttl=60)
+    cache.put({"_id": "r1", "Number": "+919876543210", "Name": "Aarav"}, call_sid="CA1")
+    cache.put({"_id": "r2", "Number": "+919876500000", "Name": "Priya"})
+
+    cache.invalidate_record("r1")
+
+    assert cache.get_by_call("CA1") is None
+    assert cache.get_by_number("+919876543210") is None
+    assert cache.get_by_number("+919876500000")["Name"] == "Priya"
+
+    cache.invalidate_numbers(["+919876500000"])
+
+    assert cache.get_by_number("+919876500000") is None
+    assert cache.stats()["size"] == 0
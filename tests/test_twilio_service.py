@@ -0,0 +1,66 @@
+# tests/test_twilio_service.py
+
+import pytest
+from flask import Flask
+
+from services.twilio_service import TwilioService, create_twilio_client
+
+CONFIG = {
+    "TWILIO_FAKE_TRANSPORT": True,
+    "TWILIO_ACCOUNT_SID": "AC00000000000000000000000000000000",
+    "TWILIO_AUTH_TOKEN": "token",
+    "TWILIO_PHONE_NUMBER": "+15005550006",
+    "TWILIO_API_BASE": "https://api.twilio.test",
+}
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update(CONFIG)
+    app.twilio_client = create_twilio_client(app.config)
+    with app.app_context():
+        yield app
+
+
+@pytest.fixture
+def transport(app):
+    return app.twilio_client.http_client
+
+
+def test_initiate_call_posts_call_to_fake_transport(app, transport):
+    call_sid = TwilioService().initiate_call(
+        to_number="+919876543210",
+        twiml_url="https://example.test/voice",
+        status_callback_url="https://example.test/call_status_callback"
+    )
+
+    assert call_sid in transport.calls
+    request = transport.requests[-1]
+    assert request["method"] == "POST"
+    assert request["url"] == f"{CONFIG['TWILIO_API_BASE']}/2010-04-01/Accounts/{CONFIG['TWILIO_ACCOUNT_SID']}/Calls.json"
+    assert request["data"]["To"] == "+919876543210"
+    assert request["data"]["From"] == CONFIG["TWILIO_PHONE_NUMBER"]
+    assert request["data"]["Url"] == "https://example.test/voice"
+    assert request["data"]["StatusCallback"] == "https://example.test/call_status_callback"
+    assert str(request["data"]["Record"]).lower() == "true"
+
+
+def test_fetch_recording_sid_returns_recording_of_call(app, transport):
+    service = TwilioService()
+    call_sid = service.initiate_call("+919876543210", "https://example.test/voice", "https://example.test/status")
+    other_call_sid = service.initiate_call("+919876500000", "https://example.test/voice", "https://example.test/status")
+
+    recording_sid = service.fetch_recording_sid(call_sid)
+
+    assert transport.recordings[recording_sid]["call_sid"] == call_sid
+    assert service.fetch_recording_sid(other_call_sid) != recording_sid
+    assert transport.requests[-1]["params"]["CallSid"] == other_call_sid
+
+
+def test_fetch_recording_sid_without_recording_returns_none(app, transport):
+    transport.record_calls = False
+    service = TwilioService()
+    call_sid = service.initiate_call("+919876543210", "https://example.test/voice", "https://example.test/status")
+
+    assert service.fetch_recording_sid(call_sid) is None
@@ -0,0 +1,87 @@
+# tests/test_upload.py
+
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+
+from blueprints.upload import reject_key_collisions, upsert_records, insert_records
+from services.champ_cache import ChampLookupCache
+
+
+class RecordingScheduler:
+    def __init__(self):
+        self.scheduled = []
+        self.cancelled = []
+
+    def schedule_many(self, jobs):
+        self.scheduled.extend(jobs)
+
+    def cancel_for_record(self, record_id):
+        self.cancelled.append(record_id)
+
+
+def champ(number="+919876543210", shift="07:00-15:00", name="Aarav Sharma"):
+    return {
+        "Name": name, "Number": number, "Shift Name": "Morning", "Shift Timings": shift,
+        "Dress Code": "Formal", "Work Description": "Event usher", "date": "2999-01-05", "sheet_name": "Site 1"
+    }
+
+
+@pytest.fixture
+def app(mock_db):
+    app = Flask(__name__)
+    app.mongo = SimpleNamespace(db=mock_db)
+    app.mongo.db.champ_details.create_index(
+        [("Number", 1), ("date", 1), ("sheet_name", 1)], name="champ_number_date_sheet", unique=True
+    )
+    app.champ_cache = ChampLookupCache()
+    app.scheduler = RecordingScheduler()
+    with app.app_context():
+        yield app
+
+
+def test_rows_repeating_a_key_are_rejected_across_chunks():
+    seen_keys = set()
+
+    first, rejected_first = reject_key_collisions([champ(), champ(number="+919876543211")], seen_keys)
+    second, rejected_second = reject_key_collisions([champ(shift="16:00-20:00")], seen_keys)
+
+    assert len(first) == 2 and rejected_first == []
+    assert second == []
+    assert rejected_second[0]["Number"] == "+919876543210"
+    assert rejected_second[0]["Shift Timings"] == "16:00-20:00"
+
+
+def test_upsert_reschedules_a_moved_shift(app):
+    result = upsert_records([champ()])
+    record_id = str(result["inserted_ids"][0])
+    assert result["inserted"] == 1
+    assert {job[1] for job in app.scheduler.scheduled} == {"1st follow-up", "2nd follow-up"}
+
+    app.scheduler.scheduled.clear()
+    result = upsert_records([champ(shift="09:00-17:00")])
+
+    assert (result["inserted"], result["updated"]) == (0, 1)
+    assert app.scheduler.cancelled == [record_id]
+    assert {job[0] for job in app.scheduler.scheduled} == {record_id}
+    assert app.mongo.db.champ_details.count_documents({}) == 1
+
+
+def test_upsert_leaves_unchanged_records_scheduled(app):
+    upsert_records([champ()])
+    app.scheduler.scheduled.clear()
+
+    result = upsert_records([champ()])
+
+    assert result["unchanged"] == 1
+    assert app.scheduler.cancelled == [] and app.scheduler.scheduled == []
+
+
+def test_insert_counts_stored_keys_as_unchanged(app):
+    insert_records([champ()])
+
+    result = insert_records([champ(name="Renamed"), champ(number="+919876543211")])
+
+    assert (result["inserted"], result["unchanged"]) == (1, 1)
+    assert app.mongo.db.champ_details.find_one({"Number": "+919876543210"})["Name"] == "Aarav Sharma"
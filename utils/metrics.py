@@ -0,0 +1,237 @@
+# utils/metrics.py
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, request
+from pymongo import monitoring
+
+# Latency buckets in seconds, from fast Mongo round trips up to long transcriptions
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames, labelvalues, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """
+    Monotonic counter, optionally split by labels.
+    """
+    type = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = list(self._values.items())
+        for labelvalues, value in values:
+            yield self.name + _format_labels(self.labelnames, labelvalues), value
+
+
+class Histogram:
+    """
+    Histogram of observed values, optionally split by labels.
+    """
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labelvalues)
+            if series is None:
+                # Per-bucket counts (last slot is +Inf), sum, count
+                series = self._values[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self):
+        with self._lock:
+            values = [(labelvalues, (list(counts), total, count))
+                      for labelvalues, (counts, total, count) in self._values.items()]
+        for labelvalues, (counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                yield self.name + "_bucket" + _format_labels(self.labelnames, labelvalues, f'le="{le}"'), cumulative
+            yield self.name + "_sum" + _format_labels(self.labelnames, labelvalues), total
+            yield self.name + "_count" + _format_labels(self.labelnames, labelvalues), count
+
+
+class CallbackMetric:
+    """
+    Gauge or counter whose value is read from a callable at scrape time.
+    """
+    def __init__(self, name, documentation, callback, metric_type="gauge"):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.type = metric_type
+
+    def samples(self):
+        yield self.name, self.callback()
+
+
+class MetricsRegistry:
+    """
+    Thread-safe collection of metrics rendered in the Prometheus text exposition format.
+
+    Registering a name twice returns the existing metric (callback metrics are
+    replaced), so create_app can run more than once in a process.
+    """
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get_or_create(name, lambda: Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(name, lambda: Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name, documentation, callback, metric_type="gauge"):
+        metric = CallbackMetric(name, documentation, callback, metric_type)
+        with self._lock:
+            self._metrics[name] = metric
+        return metric
+
+    def _get_or_create(self, name, factory):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = factory()
+            return metric
+
+    def render(self):
+        """
+        Returns:
+            str: Every metric in Prometheus text format (version 0.0.4).
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        lines = []
+        for metric in metrics:
+            try:
+                samples = list(metric.samples())
+            except Exception:
+                # A failing callback must not break the whole scrape
+                continue
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for sample_name, value in samples:
+                lines.append(f"{sample_name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry; also reachable as app.metrics
+REGISTRY = MetricsRegistry()
+
+DEPENDENCY_LATENCY = REGISTRY.histogram(
+    "dependency_request_duration_seconds",
+    "Latency of calls to external dependencies",
+    ("dependency", "operation")
+)
+DEPENDENCY_ERRORS = REGISTRY.counter(
+    "dependency_errors_total",
+    "Failed calls to external dependencies",
+    ("dependency", "operation")
+)
+HTTP_LATENCY = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "Latency of HTTP requests by route",
+    ("method", "route", "status")
+)
+
+
+@contextmanager
+def track_dependency(dependency, operation):
+    """
+    Time a call to an external dependency and count it as an error if it raises.
+
+    Args:
+        dependency (str): e.g. 'twilio', 'openai', 'parser'.
+        operation (str): e.g. 'initiate_call', 'transcribe'.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        DEPENDENCY_ERRORS.inc(dependency, operation)
+        raise
+    finally:
+        DEPENDENCY_LATENCY.observe(time.perf_counter() - start, dependency, operation)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """
+    PyMongo command listener recording the latency and failures of every MongoDB command.
+    """
+    def __init__(self, registry=REGISTRY):
+        self.latency = registry.histogram(
+            "mongodb_command_duration_seconds",
+            "Latency of MongoDB commands",
+            ("command",)
+        )
+        self.errors = registry.counter(
+            "mongodb_command_errors_total",
+            "Failed MongoDB commands",
+            ("command",)
+        )
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self.latency.observe(event.duration_micros / 1e6, event.command_name)
+
+    def failed(self, event):
+        self.latency.observe(event.duration_micros / 1e6, event.command_name)
+        self.errors.inc(event.command_name)
+
+
+def instrument_app(app, registry=REGISTRY):
+    """
+    Record the latency of every request, labelled by route template rather than raw path.
+    """
+    app.metrics = registry
+
+    @app.before_request
+    def _start_timer():
+        g.request_started_at = time.perf_counter()
+
+    @app.after_request
+    def _record_latency(response):
+        started = g.pop("request_started_at", None)
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule else "unmatched"
+            HTTP_LATENCY.observe(time.perf_counter() - started, request.method, route, str(response.status_code))
+        return response
@@ -0,0 +1,239 @@
+# utils/profiler.py
+
+import cProfile
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+
+from flask import g, request
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ("sampler", "cprofile")
+PROFILE_EXTENSIONS = {"sampler": ".folded", "cprofile": ".prof"}
+PROFILE_NAME_PATTERN = re.compile(r"^[\w.-]+\.(folded|prof)$")
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    Samples the stacks of registered threads from one background thread.
+
+    Each sample walks the target thread's current frame, so the profiled request
+    pays nothing per function call; the cost is one stack walk per interval.
+    Stacks are counted in the collapsed format flamegraph.pl and speedscope read.
+    """
+
+    def __init__(self, interval_ms=5):
+        self.interval = interval_ms / 1000
+        self._targets = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def start(self, thread_id):
+        """
+        Begin sampling ``thread_id``.
+        """
+        with self._lock:
+            self._targets[thread_id] = Counter()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def stop(self, thread_id):
+        """
+        Stop sampling ``thread_id``.
+
+        Returns:
+            Counter: Sample counts keyed by collapsed stack, root frame first.
+        """
+        with self._lock:
+            return self._targets.pop(thread_id, Counter())
+
+    def _run(self):
+        while True:
+            with self._lock:
+                targets = list(self._targets.items())
+            if not targets:
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+
+            frames = sys._current_frames()
+            for thread_id, counts in targets:
+                frame = frames.get(thread_id)
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                if stack:
+                    counts[";".join(reversed(stack))] += 1
+            del frames
+            time.sleep(self.interval)
+
+
+class ProfileStore:
+    """
+    Bounded directory of recent profiles; writing one past the limit deletes the oldest.
+    """
+
+    def __init__(self, directory, max_profiles=50):
+        self.directory = directory
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def save(self, endpoint, duration_ms, mode, writer):
+        """
+        Write a profile and trim the directory to ``max_profiles`` files.
+
+        Args:
+            endpoint (str): Flask endpoint of the profiled request.
+            duration_ms (float): Request duration.
+            mode (str): 'sampler' or 'cprofile'.
+            writer (callable): Called with the destination path to write the profile.
+
+        Returns:
+            str: File name of the saved profile.
+        """
+        timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")[:-3]
+        safe_endpoint = re.sub(r"[^\w.]", "_", endpoint)
+        name = f"{timestamp}-{safe_endpoint}-{int(duration_ms)}ms-{uuid.uuid4().hex[:6]}{PROFILE_EXTENSIONS[mode]}"
+        writer(os.path.join(self.directory, name))
+
+        with self._lock:
+            profiles = self.list()
+            for stale in profiles[self.max_profiles:]:
+                try:
+                    os.remove(os.path.join(self.directory, stale["name"]))
+                except FileNotFoundError:
+                    pass
+        return name
+
+    def list(self):
+        """
+        Saved profiles, newest first.
+
+        Returns:
+            list: Dicts with name, size_bytes and created_at.
+        """
+        profiles = []
+        for entry in os.scandir(self.directory):
+            if not PROFILE_NAME_PATTERN.match(entry.name):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            profiles.append({
+                "name": entry.name,
+                "size_bytes": stat.st_size,
+                "created_at": datetime.fromtimestamp(stat.st_mtime, timezone.utc).isoformat(),
+                "_mtime": stat.st_mtime
+            })
+        profiles.sort(key=lambda profile: profile["_mtime"], reverse=True)
+        for profile in profiles:
+            del profile["_mtime"]
+        return profiles
+
+    def path(self, name):
+        """
+        Path of a saved profile, or None when the name is not a profile in this store.
+        """
+        if not PROFILE_NAME_PATTERN.match(name):
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.isfile(path) else None
+
+
+def _write_folded(counts):
+    def writer(path):
+        with open(path, "w") as profile_file:
+            for stack, count in counts.most_common():
+                profile_file.write(f"{stack} {count}\n")
+    return writer
+
+
+def install_profiler(app):
+    """
+    Profile requests picked by the admin header or the sampling rate, and keep the results in app.profile_store.
+
+    A request is profiled when its X-Profile header matches PROFILER_TOKEN, or at
+    random with probability PROFILER_SAMPLE_RATE among the PROFILER_ENDPOINTS
+    (every endpoint when empty). X-Profile-Mode picks 'sampler' or 'cprofile'
+    for header-triggered requests; otherwise PROFILER_MODE applies. Nothing is
+    registered unless this is called, so a disabled profiler costs nothing.
+    """
+    config = app.config
+    token = config["PROFILER_TOKEN"]
+    sample_rate = config["PROFILER_SAMPLE_RATE"]
+    default_mode = config["PROFILER_MODE"] if config["PROFILER_MODE"] in PROFILE_MODES else "sampler"
+    endpoints = {name.strip() for name in config["PROFILER_ENDPOINTS"].split(",") if name.strip()}
+
+    app.profile_store = ProfileStore(config["PROFILER_DIR"], max_profiles=config["PROFILER_MAX_PROFILES"])
+    sampler = StackSampler(interval_ms=config["PROFILER_SAMPLE_INTERVAL_MS"])
+
+    def _selected_mode():
+        # Reading profiles must not push the profiles being read out of the ring
+        if request.blueprint == "profiles":
+            return None
+        if token and request.headers.get("X-Profile") == token:
+            mode = request.headers.get("X-Profile-Mode", default_mode)
+            return mode if mode in PROFILE_MODES else default_mode
+        if sample_rate > 0 and (not endpoints or request.endpoint in endpoints) and random.random() < sample_rate:
+            return default_mode
+        return None
+
+    @app.before_request
+    def _start_profile():
+        mode = _selected_mode()
+        if mode is None:
+            return
+        if mode == "cprofile":
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another profiler is already active in this interpreter
+                return
+            g.profiler = profiler
+        else:
+            sampler.start(threading.get_ident())
+        g.profile_mode = mode
+        g.profile_started_at = time.perf_counter()
+
+    @app.teardown_request
+    def _save_profile(exc):
+        mode = g.pop("profile_mode", None)
+        if mode is None:
+            return
+        duration_ms = (time.perf_counter() - g.pop("profile_started_at")) * 1000
+        if mode == "cprofile":
+            profiler = g.pop("profiler")
+            profiler.disable()
+            writer = profiler.dump_stats
+        else:
+            counts = sampler.stop(threading.get_ident())
+            if not counts:
+                # Finished before the first sample was taken
+                return
+            writer = _write_folded(counts)
+
+        try:
+            name = app.profile_store.save(request.endpoint or "unmatched", duration_ms, mode, writer)
+            logger.info(f"Saved {mode} profile {name} for {request.method} {request.path} ({duration_ms:.0f} ms)")
+        except OSError as e:
+            logger.error(f"Could not save profile for {request.path}: {e}")
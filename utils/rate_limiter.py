@@ -0,0 +1,59 @@
+# utils/rate_limiter.py
+
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket used to keep outbound calls within the Twilio
+    calls-per-second quota of the account.
+
+    The bucket only limits the threads of its own process. When the app runs
+    in several processes, each one gets a bucket with its share of the quota:
+    app.py divides the rate and burst by CALL_RATE_LIMIT_PROCESSES. The
+    processes don't coordinate, so the burst is at least one call per process.
+    """
+    def __init__(self, rate, capacity=None):
+        """
+        Args:
+            rate (float): Tokens added per second.
+            capacity (int, optional): Maximum burst size. Defaults to one second of tokens.
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1, rate))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def try_acquire(self, tokens=1):
+        """
+        Take tokens if they are available right now.
+
+        Returns:
+            bool: True if the tokens were taken.
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens=1):
+        """
+        Block until the requested tokens are available and take them.
+        """
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
@@ -0,0 +1,125 @@
+# utils/recording_buffer.py
+
+import hashlib
+import os
+import tempfile
+from io import BytesIO
+
+
+class RecordingTooLarge(Exception):
+    """
+    Raised when a recording grows past the configured size cap.
+    """
+
+
+class RecordingBuffer:
+    """
+    Write-once buffer for a downloaded recording.
+
+    Chunks are kept in memory up to ``max_memory`` bytes; a larger recording is
+    spilled to a temporary file instead. After ``finish()`` any number of
+    independent read streams can be opened over the same data, one per
+    transcription pass, without copying it again. The SHA-256 of the content
+    is computed while it is written.
+    """
+    def __init__(self, name="recording.mp3", max_memory=1024 * 1024, max_size=None):
+        """
+        Args:
+            name (str): File name reported to consumers that infer the audio format from it.
+            max_memory (int): Bytes kept in memory before spilling to disk.
+            max_size (int, optional): Hard cap on the recording size in bytes.
+        """
+        self.name = name
+        self.max_memory = max_memory
+        self.max_size = max_size
+        self.size = 0
+
+        self._chunks = []
+        self._data = None
+        self._file = None
+        self._path = None
+        self._hash = hashlib.sha256()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def in_memory(self):
+        return self._path is None
+
+    @property
+    def sha256(self):
+        """
+        Hex digest of everything written so far.
+        """
+        return self._hash.hexdigest()
+
+    def write(self, chunk):
+        """
+        Append a chunk of the recording.
+
+        Raises:
+            RecordingTooLarge: If the recording exceeds ``max_size``.
+        """
+        self.size += len(chunk)
+        if self.max_size is not None and self.size > self.max_size:
+            raise RecordingTooLarge(f"Recording exceeds {self.max_size} bytes")
+        self._hash.update(chunk)
+
+        if self._file is None and self.size > self.max_memory:
+            self._spill()
+        if self._file is not None:
+            self._file.write(chunk)
+        else:
+            self._chunks.append(chunk)
+
+    def finish(self):
+        """
+        Mark the download as complete. Must be called before ``open()``.
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        elif self._data is None:
+            self._data = b"".join(self._chunks)
+            self._chunks = []
+
+    def open(self):
+        """
+        Open a new read stream positioned at the start of the recording.
+
+        Returns:
+            file-like: Stream with a ``name`` attribute. In-memory streams share one bytes object.
+        """
+        if self._path is not None:
+            return open(self._path, "rb")
+        stream = BytesIO(self._data)
+        stream.name = self.name
+        return stream
+
+    def close(self):
+        """
+        Release the buffered data and delete the temporary file, if any.
+        """
+        self._chunks = []
+        self._data = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._path is not None:
+            try:
+                os.remove(self._path)
+            except OSError:
+                pass
+            self._path = None
+
+    def _spill(self):
+        suffix = os.path.splitext(self.name)[1]
+        self._file = tempfile.NamedTemporaryFile(prefix="recording-", suffix=suffix, delete=False)
+        self._path = self._file.name
+        for buffered in self._chunks:
+            self._file.write(buffered)
+        self._chunks = []
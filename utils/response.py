@@ -1,6 +1,10 @@
 # utils/response.py
 
-from flask import jsonify
+from flask import jsonify, Response
+import csv
+import io
+import itertools
+import json
 
 def success_response(message, data=None, status=200):
     """
@@ -38,3 +42,47 @@ def error_response(message, status=400):
         "error": message
     }
     return jsonify(payload), status
+
+def ndjson_stream_response(records, status=200):
+    """
+    Stream records as newline-delimited JSON, one record per line, as they are produced.
+    
+    Args:
+        records (iterable): Records to send, e.g. a MongoDB cursor.
+        status (int): HTTP status code.
+    
+    Returns:
+        Response: Flask streaming response.
+    """
+    def generate():
+        for record in records:
+            # default=str covers ObjectId and datetime values
+            yield json.dumps(record, default=str, ensure_ascii=False) + "\n"
+    return Response(generate(), status=status, mimetype='application/x-ndjson')
+
+def csv_stream_response(records, fieldnames, filename="records.csv", status=200):
+    """
+    Stream records as CSV rows as they are produced.
+    
+    Args:
+        records (iterable): Records to send, e.g. a MongoDB cursor.
+        fieldnames (list): CSV columns; other record fields are left out.
+        filename (str): Name suggested to the client for the download.
+        status (int): HTTP status code.
+    
+    Returns:
+        Response: Flask streaming response.
+    """
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=fieldnames, extrasaction='ignore')
+        writer.writeheader()
+        for record in itertools.chain([None], records):
+            if record is not None:
+                writer.writerow(record)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+    response = Response(generate(), status=status, mimetype='text/csv')
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,18 @@
+# utils/retry.py
+
+from datetime import timedelta
+
+
+def backoff_delay(attempts, base_seconds, max_seconds=3600):
+    """
+    Exponential delay before the next attempt of a failed job.
+
+    Args:
+        attempts (int): Attempts made so far, including the one that just failed.
+        base_seconds (float): Delay after the first failed attempt; doubled after each further one.
+        max_seconds (float): Upper bound on the delay.
+
+    Returns:
+        timedelta: Time to wait before the next attempt.
+    """
+    return timedelta(seconds=min(max_seconds, base_seconds * 2 ** max(0, attempts - 1)))
@@ -0,0 +1,34 @@
+# utils/shift_time.py
+
+from datetime import datetime
+import pytz
+
+# IST Timezone
+IST = pytz.timezone('Asia/Kolkata')
+
+
+def extract_shift_start_time(shift_time):
+    """
+    Extract the start time from the shift time.
+    Example input: "12:00-14:00", return "12:00"
+    """
+    return shift_time.split('-')[0].strip()  # Extract "12:00"
+
+
+def shift_start_datetime(shift_date, shift_time):
+    """
+    Build the IST start datetime of a shift.
+
+    Args:
+        shift_date (str): Shift date in "YYYY-MM-DD" format.
+        shift_time (str): Shift timings, e.g. "12:00-14:00".
+
+    Returns:
+        datetime: Timezone-aware shift start in IST.
+
+    Raises:
+        ValueError: If the date or the timings cannot be parsed.
+    """
+    shift_start_time = extract_shift_start_time(shift_time)
+    shift_datetime = datetime.strptime(f"{shift_date} {shift_start_time}", '%Y-%m-%d %H:%M')
+    return IST.localize(shift_datetime)
@@ -0,0 +1,78 @@
+# utils/ttl_cache.py
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries also expire after a fixed time to live.
+    Keeps hit and miss counters.
+    """
+    def __init__(self, maxsize=10000, ttl=900, on_evict=None):
+        """
+        Args:
+            maxsize (int): Maximum number of entries; the least recently used one is evicted first.
+            ttl (float): Seconds an entry stays valid after it was set.
+            on_evict (callable, optional): Called as ``on_evict(key, value)`` whenever an
+                entry leaves the cache, while the cache lock is held.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.RLock()
+        self._data = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self.lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            while len(self._data) > self.maxsize:
+                self._remove(next(iter(self._data)))
+
+    def pop(self, key):
+        with self.lock:
+            if key in self._data:
+                self._remove(key)
+
+    def clear(self):
+        with self.lock:
+            for key in list(self._data):
+                self._remove(key)
+
+    def stats(self):
+        """
+        Returns:
+            dict: Current size and hit/miss counters.
+        """
+        with self.lock:
+            return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+    def _remove(self, key):
+        value, _ = self._data.pop(key)
+        if self.on_evict:
+            self.on_evict(key, value)